@@ -0,0 +1,40 @@
+import os
+
+
+# Packaged assets (colormaps, logos) ship next to the modules; the compiled Qt
+# resources are only used when the static directory is not available
+STATIC_DIRECTORY    = os.path.join(os.path.dirname(os.path.abspath(__file__)), "static")
+
+
+def asset_path(*parts):
+    """Return the file path of a packaged asset (e.g. "colormaps", name)"""
+    return os.path.join(STATIC_DIRECTORY, *parts)
+
+
+def resource_path(*parts):
+    """Return the Qt resource path of a packaged asset"""
+    return ":static/{}".format("/".join(parts))
+
+
+def read_asset(*parts):
+    """Read a packaged asset as bytes
+
+    Reads the file from the static directory, so headless and worker
+    processes need neither PyQt5 nor the compiled resources module.
+    """
+
+    path    = asset_path(*parts)
+    if os.path.exists(path):
+        with open(path, "rb") as f:
+            return f.read()
+
+    from PyQt5.QtCore import QFile, QIODevice
+    import resources
+
+    stream  = QFile(resource_path(*parts))
+    if not stream.open(QIODevice.ReadOnly):
+        raise FileNotFoundError(path)
+
+    data    = bytes(stream.readAll())
+    stream.close()
+    return data
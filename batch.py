@@ -0,0 +1,233 @@
+import os
+import sys
+import json
+import time
+
+import utils
+import constants
+
+
+# Inputs holding a file or directory path (resolved against the campaign file)
+PATH_INPUTS     = ["save_directory", "target_data_path", "reference_data_path", "channel_map_path", "grid_path", "zones_path"]
+
+# Inputs whose files are stamped into the job key, so edited data is re-run
+DATA_INPUTS     = ["target_data_path", "reference_data_path", "channel_map_path", "grid_path", "zones_path"]
+
+
+def resolve_paths(inputs, directory):
+    """Return the inputs with relative paths (and those of any parts) joined to the directory"""
+
+    def resolve(path):
+        return os.path.normpath(os.path.join(directory, path)) if path else path
+
+    inputs  = dict(inputs)
+    for name in PATH_INPUTS:
+        if inputs.get(name):
+            inputs[name]    = resolve(inputs[name])
+
+    if inputs.get("target_data_paths"):
+        inputs["target_data_paths"] = [resolve(path) for path in inputs["target_data_paths"]]
+    if inputs.get("parts"):
+        inputs["parts"]             = [resolve_paths(part, directory) for part in inputs["parts"]]
+
+    return inputs
+
+
+def read_campaign(filename):
+    """Read a campaign file and return its jobs
+
+    A campaign is a JSON file describing many plot jobs at once:
+
+        {
+            "output": "output/{name}",
+            "defaults": {"channel_map_path": "map.csv", "grid_path": "grid.stl", ...},
+            "jobs": [
+                {"name": "run11_vs_10", "target_data_paths": ["run11_D1.asc"], "reference_data_path": "run10_D1.asc"},
+                {"name": "run11_stats", "action": "repeatability", "target_data_paths": ["run11_D1.asc"]},
+                ...
+            ]
+        }
+
+    Each job is the defaults updated with its own inputs (those of
+    PressurePlotterForm.extract_inputs); its optional "action" and
+    "options" are those of daemon.RenderEngine. Jobs without a save
+    directory write to the output layout formatted with the job inputs.
+    Relative paths are relative to the campaign file. Returns the list of
+    {"name", "action", "inputs", "options"} jobs.
+    """
+
+    with open(filename, "r") as f:
+        campaign    = json.load(f)
+
+    directory   = os.path.dirname(os.path.abspath(filename))
+    output      = campaign.get("output", constants.CAMPAIGN_OUTPUT)
+    jobs        = []
+    for i, entry in enumerate(campaign.get("jobs", [])):
+        inputs              = dict(campaign.get("defaults", {}), **entry)
+        inputs["name"]      = inputs.get("name") or "job_{:03d}".format(i + 1)
+        action              = inputs.pop("action", "plot")
+        options             = inputs.pop("options", {})
+        if not inputs.get("save_directory"):
+            inputs["save_directory"]    = output.format(**inputs)
+
+        jobs.append({"name": inputs["name"], "action": action, "inputs": resolve_paths(inputs, directory), "options": options})
+
+    names   = [job["name"] for job in jobs]
+    if len(set(names)) != len(names):
+        raise ValueError("Campaign job names must be unique: {}".format(", ".join(sorted(set(name for name in names if names.count(name) > 1)))))
+
+    return jobs
+
+
+def add_job(filename, inputs, action="plot"):
+    """Append a job (e.g. the inputs of the form) to a campaign file, creating it if missing"""
+
+    campaign    = {"output": constants.CAMPAIGN_OUTPUT, "defaults": {}, "jobs": []}
+    if os.path.exists(filename):
+        with open(filename, "r") as f:
+            campaign    = json.load(f)
+
+    names   = [job.get("name") for job in campaign["jobs"]]
+    job     = dict(inputs, name=inputs.get("name") or "job_{:03d}".format(len(names) + 1))
+    if job["name"] in names:
+        raise ValueError("Campaign already has a job named '{}'".format(job["name"]))
+    if action != "plot":
+        job["action"]   = action
+
+    campaign["jobs"].append(job)
+    temporary   = utils.temporary_path(filename)
+    with open(temporary, "w") as f:
+        json.dump(campaign, f, indent=4)
+    os.replace(temporary, filename)
+    return job["name"]
+
+
+def job_key(job):
+    """Content hash of a job and the stamps of its data files"""
+
+    inputs  = job["inputs"]
+    paths   = [inputs.get(name) for name in DATA_INPUTS] + list(inputs.get("target_data_paths") or [])
+    for part in inputs.get("parts") or []:
+        paths   += [part.get(name) for name in DATA_INPUTS]
+
+    return utils.hash_arrays(json.dumps([job, [utils.file_stamp(path) for path in paths]], sort_keys=True, default=str))
+
+
+def result_summary(job, result):
+    """Return the checkpoint summary of a job result: its outputs, not its data
+
+    The data stay in the job's save directory (images, loads.csv,
+    repeatability.csv and the field store), so the checkpoint holds the
+    save directory, the number of rendered images and fields, the output
+    paths and the number of table rows.
+    """
+
+    from store import RenderManifest
+
+    save_directory  = job["inputs"]["save_directory"]
+    items           = result if isinstance(result, list) else [result]
+    stores          = [item for item in items if isinstance(item, dict) and "field_store" in item]
+    summary         = {"save_directory": save_directory, "images": len(RenderManifest(save_directory).images())}
+    if stores:
+        summary["fields"]   = sum(item["fields"] for item in stores)
+    if any(isinstance(item, str) for item in items):
+        summary["outputs"]  = [item for item in items if isinstance(item, str)]
+    if isinstance(result, list) and not stores and not summary.get("outputs"):
+        summary["rows"]     = len(result)
+
+    return summary
+
+
+class CampaignState(object):
+    """Checkpoint of a campaign run, written next to the campaign file
+
+    Maps each job name to the key it ran with (see job_key), its status
+    (done or failed), duration and result summary (see result_summary) or
+    error. Jobs done with an unchanged key are skipped when the campaign is
+    run again; within a job the images already rendered are skipped by the
+    render manifest of its save directory, so an interrupted job resumes
+    from its last image.
+    """
+
+    def __init__(self, filename):
+        self.path       = filename + constants.CAMPAIGN_STATE_SUFFIX
+        self.entries    = {}
+
+        if os.path.exists(self.path):
+            with open(self.path, "r") as f:
+                self.entries    = json.load(f)
+
+
+    def is_done(self, name, key):
+        entry   = self.entries.get(name, {})
+        return entry.get("status") == "done" and entry.get("key") == key
+
+
+    def update(self, name, key, status, **attributes):
+        attributes.update(key=key, status=status, finished=time.strftime("%Y-%m-%d %H:%M:%S"))
+        self.entries[name]  = attributes
+
+
+    def flush(self):
+        """Write the checkpoint"""
+
+        temporary   = utils.temporary_path(self.path)
+        with open(temporary, "w") as f:
+            json.dump(self.entries, f, indent=4, sort_keys=True)
+        os.replace(temporary, self.path)
+
+
+def run_campaign(filename, restart=False, callback=None):
+    """Run the jobs of a campaign file not yet done, checkpointing after each
+
+    Jobs run on the render daemon if one is running, otherwise in this
+    process (see daemon.run_job). A failed job is recorded and the campaign
+    carries on; it is run again next time. restart forgets the checkpoint.
+    callback is an optional function taking the job name and its entry (or
+    None when skipped). Returns the checkpoint entries of the campaign jobs.
+    """
+
+    import daemon
+
+    jobs    = read_campaign(filename)
+    state   = CampaignState(filename)
+    if restart:
+        state.entries   = {}
+
+    for job in jobs:
+        key     = job_key(job)
+        if state.is_done(job["name"], key):
+            if callback:
+                callback(job["name"], None)
+            continue
+
+        start   = time.perf_counter()
+        try:
+            reply   = daemon.run_job({"action": job["action"], "inputs": job["inputs"], "options": job["options"]})
+            state.update(job["name"], key, "done", seconds=time.perf_counter() - start, result=result_summary(job, reply["result"]))
+        except Exception as error:
+            state.update(job["name"], key, "failed", seconds=time.perf_counter() - start, error="{}: {}".format(type(error).__name__, error))
+
+        state.flush()
+        if callback:
+            callback(job["name"], state.entries[job["name"]])
+
+    return {job["name"]: state.entries.get(job["name"]) for job in jobs}
+
+
+# Run a campaign: python batch.py campaign.json [--restart]
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        sys.exit("Usage: python batch.py campaign.json [--restart]")
+
+    def report(name, entry):
+        if entry is None:
+            print("{}: skipped (done)".format(name))
+        else:
+            print("{}: {} in {:.1f} s{}".format(name, entry["status"], entry["seconds"], " ({})".format(entry["error"]) if "error" in entry else ""))
+        sys.stdout.flush()
+
+    entries = run_campaign(sys.argv[1], restart="--restart" in sys.argv[2:], callback=report)
+    failed  = [name for name, entry in entries.items() if entry["status"] != "done"]
+    if failed:
+        sys.exit("{} of {} jobs failed: {}".format(len(failed), len(entries), ", ".join(failed)))
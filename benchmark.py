@@ -0,0 +1,594 @@
+import os
+import sys
+import json
+import time
+import subprocess
+import tempfile
+import numpy
+import pandas
+
+import utils
+import constants
+
+
+def timeit(func, *args, repeat=10, **kwargs):
+    """Return the best wall time (s) of repeated calls and the last result"""
+
+    best    = float("inf")
+    result  = None
+    for i in range(repeat):
+        start   = time.perf_counter()
+        result  = func(*args, **kwargs)
+        best    = min(best, time.perf_counter() - start)
+
+    return best, result
+
+
+def write_d1(filename, n_points=500, n_channels=1000, n_extra=200, seed=0):
+    """Write a synthetic D1.asc file with tap channels and unused columns"""
+
+    rng         = numpy.random.RandomState(seed)
+    channels    = ["P{:04d}_psi".format(i + 1) for i in range(n_channels)]
+    extra       = ["AUX{:04d}".format(i + 1) for i in range(n_extra)]
+    columns     = list(constants.D1_COLUMNS.keys()) + channels + extra
+    data        = rng.random_sample((n_points, len(columns)))
+    data[:, 0]  = 11
+    data[:, 1]  = numpy.arange(n_points) + 1
+
+    with open(filename, "w") as f:
+        f.write("\n\n\n")
+        f.write(constants.D1_DELIMITER.join(columns) + "\n")
+        f.write(constants.D1_DELIMITER.join(["-"]*len(columns)) + "\n")
+        numpy.savetxt(f, data, delimiter=constants.D1_DELIMITER, fmt="%.6f")
+
+    return channels
+
+
+def write_stl(filename, nx=120, ny=40, length=20.0, width=8.0):
+    """Write a synthetic binary STL of a gently curved plate"""
+
+    x, y        = numpy.meshgrid(numpy.linspace(0, length, nx), numpy.linspace(0, width, ny))
+    points      = numpy.column_stack((x.ravel(), y.ravel(), 0.2*numpy.sin(x.ravel()/3.0)))
+    corner      = (numpy.arange(ny - 1)[:, None]*nx + numpy.arange(nx - 1)[None, :]).ravel()
+    triangles   = numpy.vstack((
+                    numpy.column_stack((corner, corner + 1, corner + nx + 1)),
+                    numpy.column_stack((corner, corner + nx + 1, corner + nx))))
+
+    facets              = numpy.zeros(len(triangles), dtype=[
+                            ("normal", "<f4", 3), ("vertices", "<f4", (3, 3)), ("attribute", "<u2")])
+    facets["normal"]    = [0, 0, 1]
+    facets["vertices"]  = points[triangles]
+    with open(filename, "wb") as f:
+        f.write(b"\0"*80)
+        f.write(numpy.uint32(len(triangles)).tobytes())
+        f.write(facets.tobytes())
+
+    return points, triangles
+
+
+def write_channel_map(filename, channels, length=20.0, width=8.0, seed=0):
+    """Write a synthetic channel map with taps scattered over the plate"""
+
+    rng     = numpy.random.RandomState(seed)
+    x       = rng.uniform(0.5, length - 0.5, len(channels))
+    y       = rng.uniform(0.5, width - 0.5, len(channels))
+    data    = pandas.DataFrame({"x": x, "y": y, "z": 0.2*numpy.sin(x/3.0), "channel": [c.split("_")[0] for c in channels]})
+    data.to_csv(filename, index=False)
+    return data
+
+
+def write_session(directory, n_points=1, n_channels=64, **kwargs):
+    """Write a synthetic target/reference session and return the plot inputs"""
+
+    target      = os.path.join(directory, "target_D1.asc")
+    reference   = os.path.join(directory, "reference_D1.asc")
+    channels    = write_d1(target, n_points=n_points, n_channels=n_channels, n_extra=0, seed=1)
+    write_d1(reference, n_points=n_points, n_channels=n_channels, n_extra=0, seed=2)
+    write_channel_map(os.path.join(directory, "channel_map.csv"), channels)
+    write_stl(os.path.join(directory, "grid.stl"), **kwargs)
+
+    # Plausible test conditions for every point
+    for filename in [target, reference]:
+        data                        = pandas.read_csv(filename, skiprows=constants.D1_SKIPROWS, delimiter="\t")
+        data["Run Number"]          = 11 if filename == target else 10
+        data["YAW"]                 = 0.0
+        data["RRS_SPEED"]           = 40.0
+        data["Ride-Height-Number"]  = 1
+        data["DYNPR"]               = 0.15
+        with open(filename, "w") as f:
+            f.write("\n\n\n")
+            f.write("\t".join(data.columns) + "\n")
+            f.write("\t".join(["-"]*len(data.columns)) + "\n")
+            data.to_csv(f, sep="\t", header=False, index=False)
+
+    return {
+        "save_directory": os.path.join(directory, "output"),
+        "target_data_path": target,
+        "reference_data_path": reference,
+        "channel_map_path": os.path.join(directory, "channel_map.csv"),
+        "grid_path": os.path.join(directory, "grid.stl"),
+        "target_label": "Run XX",
+        "reference_label": "Run YY",
+        "variable": "Cp",
+        "absolute_bounds": [0, 0.75],
+        "delta_bounds": [-0.15, 0.15],
+    }
+
+
+def read_d1_legacy(filename):
+    """The original untyped, all-column D1 parser (baseline for comparison)"""
+
+    data                = pandas.read_csv(filename, skiprows=constants.D1_SKIPROWS, delimiter="\t")
+    data["YAW"]         = data.YAW.round(2)
+    data["RRS_SPEED"]   = data.RRS_SPEED.round(1)
+    data["run_point"]   = data["Run Number"].round(0).astype(str) + "." + data["Point Number"].round(0).astype(str).str.zfill(2)
+    data["run_point"]   = data.run_point.astype(str)
+    return data
+
+
+def peak_memory(func, *args, **kwargs):
+    """Return the peak traced Python allocation (MB) of one call"""
+
+    import tracemalloc
+
+    tracemalloc.start()
+    try:
+        func(*args, **kwargs)
+        return tracemalloc.get_traced_memory()[1]/1e6
+    finally:
+        tracemalloc.stop()
+
+
+def bench_read_d1():
+    """Projected, typed read_d1 vs the legacy parser on a 1000-channel file
+
+    speedup is that of the projected parse (no cache); cached_speedup that
+    of repeated reads served by the sidecar cache.
+    """
+
+    with tempfile.TemporaryDirectory() as directory:
+        filename        = os.path.join(directory, "D1.asc")
+        channels        = write_d1(filename)
+        legacy, _       = timeit(read_d1_legacy, filename)
+        typed, _        = timeit(utils.read_d1, filename)
+        projected, _    = timeit(utils.read_d1, filename, channels=channels, cache=False)
+        cached, _       = timeit(utils.read_d1, filename, channels=channels)
+        legacy_mb       = peak_memory(read_d1_legacy, filename)
+        projected_mb    = peak_memory(utils.read_d1, filename, channels=channels, cache=False)
+
+    return {
+        "legacy_s": legacy,
+        "typed_s": typed,
+        "projected_s": projected,
+        "cached_s": cached,
+        "legacy_mb": legacy_mb,
+        "projected_mb": projected_mb,
+        "speedup": legacy/projected,
+        "cached_speedup": legacy/cached,
+    }
+
+
+def read_stl_vtk(filename):
+    """The original VTK STL reader (points, triangles and border; baseline for comparison)"""
+
+    import vtk
+    from vtk.util import numpy_support
+
+    reader  = vtk.vtkSTLReader()
+    reader.SetFileName(filename)
+    reader.Update()
+    data    = reader.GetOutput()
+    points  = numpy_support.vtk_to_numpy(data.GetPoints().GetData())
+
+    normals_filter  = vtk.vtkPolyDataNormals()
+    normals_filter.SetInputData(data)
+    normals_filter.ComputeCellNormalsOn()
+    normals_filter.Update()
+
+    feature_edges   = vtk.vtkFeatureEdges()
+    feature_edges.SetInputData(data)
+    feature_edges.BoundaryEdgesOn()
+    feature_edges.FeatureEdgesOff()
+    feature_edges.NonManifoldEdgesOff()
+    feature_edges.ManifoldEdgesOff()
+    feature_edges.Update()
+    border  = utils.sort_perimeter(numpy_support.vtk_to_numpy(feature_edges.GetOutput().GetPoints().GetData()))
+
+    n           = data.GetNumberOfCells()
+    triangles   = numpy.ndarray((n, 3), dtype=numpy.int64)
+    for i in range(n):
+        triangles[i, :] = [data.GetCell(i).GetPointId(j) for j in range(3)]
+
+    return points, triangles, border
+
+
+def write_ascii_stl(filename, points, triangles):
+    """Write an ASCII STL of a mesh"""
+
+    with open(filename, "w") as f:
+        f.write("solid grid\n")
+        for triangle in points[triangles]:
+            f.write("facet normal 0 0 1\nouter loop\n")
+            f.write("".join("vertex {:.7e} {:.7e} {:.7e}\n".format(*vertex) for vertex in triangle))
+            f.write("endloop\nendfacet\n")
+        f.write("endsolid grid\n")
+
+
+def bench_read_stl(nx=800, ny=300):
+    """NumPy read_stl vs the VTK reader on a binary and an ASCII STL"""
+
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        binary              = os.path.join(directory, "binary.stl")
+        ascii               = os.path.join(directory, "ascii.stl")
+        points, triangles   = write_stl(binary, nx=nx, ny=ny)
+        write_ascii_stl(ascii, points.astype(numpy.float32), triangles)
+        for label, filename in [("binary", binary), ("ascii", ascii)]:
+            results["{}_s".format(label)], _        = timeit(utils.read_stl, filename, True, repeat=3)
+            try:
+                results["{}_vtk_s".format(label)], _    = timeit(read_stl_vtk, filename, repeat=1)
+            except ImportError:
+                continue
+            results["{}_speedup".format(label)]     = results["{}_vtk_s".format(label)]/results["{}_s".format(label)]
+
+    return results
+
+
+def bench_precision(nx=400, ny=150, n_channels=256):
+    """Accuracy and speed of float32 vs float64 interpolation on one grid"""
+
+    from contour import ContourPlot
+
+    with tempfile.TemporaryDirectory() as directory:
+        grid_path   = os.path.join(directory, "grid.stl")
+        channels    = ["P{:04d}_psi".format(i + 1) for i in range(n_channels)]
+        write_stl(grid_path, nx=nx, ny=ny)
+        data            = write_channel_map(os.path.join(directory, "channel_map.csv"), channels)
+        data["value"]   = 0.375 + 0.3*numpy.sin(data.x/4.0)*numpy.cos(data.y/3.0)
+        results         = {}
+        fields          = {}
+        for precision in constants.PRECISIONS:
+            contour                             = ContourPlot(grid_path=grid_path, title="", precision=precision)
+            seconds, fields[precision]          = timeit(contour.interpolate, data[constants.XYZ].values, data.value.values, repeat=3)
+            results["{}_s".format(precision)]   = seconds
+            results["{}_mb".format(precision)]  = (contour.grid.nbytes + fields[precision].nbytes)/1e6
+
+    # Errors against float64, also as the share of vertices changing contour band
+    reference           = fields["float64"]
+    error               = fields["float32"].astype(numpy.float64) - reference
+    levels              = numpy.linspace(0.0, 0.75, 33)
+    results["max_abs_error"]    = numpy.abs(error).max()
+    results["rms_error"]        = numpy.sqrt(numpy.mean(error**2))
+    results["band_changes"]     = numpy.mean(numpy.digitize(fields["float32"], levels) != numpy.digitize(reference, levels))
+    results["speedup"]          = results["float64_s"]/results["float32_s"]
+    return results
+
+
+def leave_one_out(interpolator, points, values):
+    """Return the errors at each tap of fits to all the other taps"""
+
+    errors  = numpy.empty(len(points))
+    for i in range(len(points)):
+        mask        = numpy.arange(len(points)) != i
+        errors[i]   = interpolator(points[mask], values[mask], points[i:i + 1])[0] - values[i]
+
+    return errors
+
+
+INTERPOLATION_CASES = [
+    ("rbf", {}),
+    ("rbf", {"function": "thin_plate"}),
+    ("rbf", {"function": "multiquadric", "smooth": 1e-3}),
+    ("thin_plate", {}),
+    ("thin_plate", {"neighbors": 32}),
+    ("nearest", {}),
+    ("linear", {}),
+    ("geodesic", {}),
+]
+
+
+def bench_interpolation(nx=400, ny=150, n_channels=128):
+    """Leave-one-out tap accuracy vs fit + grid evaluation time per backend"""
+
+    import interpolation
+
+    with tempfile.TemporaryDirectory() as directory:
+        grid, triangles = write_stl(os.path.join(directory, "grid.stl"), nx=nx, ny=ny)
+        channels        = ["P{:04d}_psi".format(i + 1) for i in range(n_channels)]
+        data            = write_channel_map(os.path.join(directory, "channel_map.csv"), channels)
+
+    points  = data[constants.XYZ].values
+    values  = 0.375 + 0.3*numpy.sin(data.x.values/4.0)*numpy.cos(data.y.values/3.0)
+    results = {}
+    for name, options in INTERPOLATION_CASES:
+        label   = "_".join([name] + ["{}-{}".format(k, v) for k, v in sorted(options.items())])
+        try:
+            interpolator    = interpolation.make_interpolator(name, axes=[0, 1], **options)
+            interpolator.set_mesh(grid, triangles)
+            seconds, _      = timeit(interpolator, points, values, grid, repeat=3)
+        except ImportError:
+            continue
+
+        errors                                  = leave_one_out(interpolator, points, values)
+        results["{}_loo_rms".format(label)]     = numpy.sqrt(numpy.mean(errors**2))
+        results["{}_s".format(label)]           = seconds
+
+    return results
+
+
+def splitter_mesh(nx=400, ny=60, length=20.0, width=8.0, gap=0.3):
+    """Return a thin folded plate (splitter) mesh and the unfolded distance
+
+    The top surface (z = 0) folds round a half cylinder at x = length into
+    the bottom surface (z = -gap); s is the distance along the surface.
+    """
+
+    fold        = numpy.pi*gap/2.0
+    s, y        = numpy.meshgrid(numpy.linspace(0, 2*length + fold, nx), numpy.linspace(0, width, ny))
+    s, y        = s.ravel(), y.ravel()
+    angle       = numpy.clip((s - length)/fold, 0.0, 1.0)*numpy.pi
+    x           = numpy.where(s < length, s, numpy.where(s > length + fold, 2*length + fold - s, length + 0.5*gap*numpy.sin(angle)))
+    z           = -0.5*gap*(1.0 - numpy.cos(angle))
+    corner      = (numpy.arange(ny - 1)[:, None]*nx + numpy.arange(nx - 1)[None, :]).ravel()
+    triangles   = numpy.vstack((
+                    numpy.column_stack((corner, corner + 1, corner + nx + 1)),
+                    numpy.column_stack((corner, corner + nx + 1, corner + nx))))
+
+    return numpy.column_stack((x, y, z)), triangles, s
+
+
+def bench_geodesic(n_channels=128, seed=0):
+    """Field error on a splitter with different top and bottom pressures, rbf vs geodesic"""
+
+    import interpolation
+
+    grid, triangles, s  = splitter_mesh()
+    field               = lambda s, y: 0.375 + 0.3*numpy.tanh(s - s.max()/2.0) + 0.05*numpy.cos(y/2.0)
+    rng                 = numpy.random.RandomState(seed)
+    taps                = rng.choice(len(grid), n_channels, replace=False)
+    truth               = field(s, grid[:, 1])
+
+    results = {}
+    for name in ["rbf", "geodesic"]:
+        interpolator    = interpolation.make_interpolator(name, axes=[0, 1])
+        interpolator.set_mesh(grid, triangles)
+        start           = time.perf_counter()
+        values          = interpolator(grid[taps], truth[taps], grid)
+        results["{}_first_s".format(name)]  = time.perf_counter() - start
+        seconds, values = timeit(interpolator, grid[taps], truth[taps], grid, repeat=3)
+        results["{}_rms_error".format(name)]    = numpy.sqrt(numpy.mean((values - truth)**2))
+        results["{}_max_error".format(name)]    = numpy.abs(values - truth).max()
+        results["{}_s".format(name)]            = seconds
+
+    return results
+
+
+def bench_lod(nx=800, ny=300, n_channels=256):
+    """Vertex count, interpolation and render time per mesh level of detail"""
+
+    import io
+    from matplotlib import pyplot
+    from contour import ContourConfig, ContourPlot
+
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        grid_path       = os.path.join(directory, "grid.stl")
+        write_stl(grid_path, nx=nx, ny=ny)
+        channels        = ["P{:04d}_psi".format(i + 1) for i in range(n_channels)]
+        data            = write_channel_map(os.path.join(directory, "channel_map.csv"), channels)
+        points          = data[constants.XYZ].values
+        values          = 0.375 + 0.3*numpy.sin(data.x.values/4.0)*numpy.cos(data.y.values/3.0)
+
+        for level in constants.LOD_LEVELS:
+            start           = time.perf_counter()
+            contour         = ContourPlot(grid_path=grid_path, title="", lod=level)
+            results["{}_open_s".format(level)]  = time.perf_counter() - start
+            seconds, field  = timeit(contour.interpolate, points, values, repeat=3)
+            contour.set_configs([
+                                ContourConfig(points, values, "", values=field, colormap_path=constants.DEFAULT_ABSOLUTE_COLORMAP_PATH)
+                                for _ in range(3)])
+            start           = time.perf_counter()
+            contour.render().savefig(io.BytesIO(), format="png", bbox_inches="tight")
+            pyplot.close("all")
+            results["{}_vertices".format(level)]        = len(contour.grid)
+            results["{}_interpolate_s".format(level)]   = seconds
+            results["{}_render_s".format(level)]        = time.perf_counter() - start
+
+    return results
+
+
+def bench_workers(sizes=((200, 75), (800, 300), (1600, 600))):
+    """Worker start-up per mesh size: opening the grid file vs attaching shared memory"""
+
+    import pickle
+    import pipeline
+
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        for nx, ny in sizes:
+            grid_path       = os.path.join(directory, "grid_{}.stl".format(nx))
+            write_stl(grid_path, nx=nx, ny=ny)
+            inputs          = {"grid_path": grid_path, "save_directory": directory}
+            opened, contour = timeit(pipeline.open_contour, inputs, repeat=1)
+            shared, descriptor  = pipeline.share_contour(contour, inputs)
+            attached, (attached_contour, attached_shared)   = timeit(pipeline.attach_contour, descriptor, repeat=3)
+            label           = "{}k".format(nx*ny//1000)
+            results["{}_open_s".format(label)]              = opened
+            results["{}_attach_s".format(label)]            = attached
+            results["{}_descriptor_bytes".format(label)]    = len(pickle.dumps(descriptor))
+            results["{}_pickled_bytes".format(label)]       = len(pickle.dumps(contour.shared_arrays()))
+            attached_contour    = None
+            attached_shared.close()
+            shared.close()
+
+    return results
+
+
+def setup_point_legacy(contour, channel_map, item, item_ref, fields):
+    """The original per-point setup (channel map copies, one grid DataFrame per config)"""
+
+    target              = channel_map.copy()
+    reference           = channel_map.copy()
+    delta               = channel_map.copy()
+    target["value"]     = item*144.0/0.15
+    reference["value"]  = item_ref*144.0/0.15
+    delta["value"]      = target.value.values - reference.value.values
+    frames              = []
+    for values in fields:
+        interp          = pandas.DataFrame(columns=constants.XYZ, data=contour.grid)
+        interp["value"] = values
+        frames.append(interp)
+
+    return frames
+
+
+def setup_point(contour, points, item, item_ref, fields):
+    """The array per-point setup (shared tap points, one value vector per config)"""
+
+    from contour import ContourConfig
+
+    target      = item*144.0/0.15
+    reference   = item_ref*144.0/0.15
+    configs     = [
+        ContourConfig(points, tap_values, "", values=values, colormap_path=colormap_path)
+        for tap_values, values, colormap_path in zip(
+            [target, reference, target - reference],
+            fields,
+            [constants.DEFAULT_ABSOLUTE_COLORMAP_PATH]*2 + [constants.DEFAULT_DELTA_COLORMAP_PATH])]
+    contour.set_configs(configs)
+    return configs
+
+
+def allocated(func, *args):
+    """Return the peak memory (bytes) allocated during a call"""
+
+    import tracemalloc
+
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    start       = tracemalloc.get_traced_memory()[0]
+    func(*args)
+    peak        = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak - start
+
+
+def bench_allocations(nx=400, ny=150, n_channels=256):
+    """Per-point memory churn of the config setup, DataFrames vs arrays"""
+
+    from contour import ContourPlot
+    from pipeline import tap_points
+
+    with tempfile.TemporaryDirectory() as directory:
+        grid_path   = os.path.join(directory, "grid.stl")
+        channels    = ["P{:04d}_psi".format(i + 1) for i in range(n_channels)]
+        write_stl(grid_path, nx=nx, ny=ny)
+        channel_map = write_channel_map(os.path.join(directory, "channel_map.csv"), channels)
+        contour     = ContourPlot(grid_path=grid_path, title="")
+
+    rng         = numpy.random.RandomState(0)
+    item        = rng.random_sample(n_channels)
+    item_ref    = rng.random_sample(n_channels)
+    fields      = [rng.random_sample(contour.grid.shape[0]) for i in range(3)]
+    points      = tap_points(channel_map)
+
+    # Warm up (colormap reads, imports) before measuring
+    setup_point_legacy(contour, channel_map, item, item_ref, fields)
+    setup_point(contour, points, item, item_ref, fields)
+    legacy      = allocated(setup_point_legacy, contour, channel_map, item, item_ref, fields)
+    arrays      = allocated(setup_point, contour, points, item, item_ref, fields)
+    return {
+        "legacy_bytes": legacy,
+        "array_bytes": arrays,
+        "reduction": legacy/float(arrays),
+    }
+
+
+STARTUP_SCRIPT  = """
+import time
+start   = time.perf_counter()
+import os
+import sys
+import json
+from PyQt5.QtWidgets import QApplication
+import pressure_plotter
+
+application = QApplication([])
+window      = pressure_plotter.PressurePlotterWindow()
+window.show()
+application.processEvents()
+window_s    = time.perf_counter() - start
+
+import pipeline
+pipeline.plot(json.loads(sys.argv[1]))
+plot_s      = time.perf_counter() - start
+print(json.dumps({"window_s": window_s, "first_plot_s": plot_s}))
+"""
+
+
+def bench_startup():
+    """Time-to-window and time-to-first-plot of a fresh GUI process"""
+
+    with tempfile.TemporaryDirectory() as directory:
+        inputs          = write_session(directory)
+        environment     = dict(os.environ, QT_QPA_PLATFORM=os.environ.get("QT_QPA_PLATFORM", "offscreen"))
+        start           = time.perf_counter()
+        output          = subprocess.check_output(
+                            [sys.executable, "-c", STARTUP_SCRIPT, json.dumps(inputs)],
+                            cwd=os.path.dirname(os.path.abspath(__file__)),
+                            env=environment)
+        results             = json.loads(output.decode().strip().splitlines()[-1])
+        results["total_s"]  = time.perf_counter() - start
+
+    return results
+
+
+COLD_PLOT_SCRIPT    = """
+import sys, json
+import pipeline
+pipeline.plot(json.loads(sys.argv[1]))
+"""
+
+
+def bench_daemon(nx=800, ny=300, n_points=2):
+    """Plot job in a fresh process vs on a warm render engine (new output directory each)"""
+
+    import daemon
+
+    with tempfile.TemporaryDirectory() as directory:
+        inputs  = write_session(directory, n_points=n_points, nx=nx, ny=ny)
+        inputs["processes"] = 1
+
+        start   = time.perf_counter()
+        subprocess.check_call(
+            [sys.executable, "-c", COLD_PLOT_SCRIPT, json.dumps(dict(inputs, save_directory=os.path.join(directory, "cold")))],
+            cwd=os.path.dirname(os.path.abspath(__file__)))
+        cold_s  = time.perf_counter() - start
+
+        engine  = daemon.RenderEngine()
+        engine.run({"action": "warm", "inputs": inputs})
+        warm_s  = engine.run({"action": "plot", "inputs": dict(inputs, save_directory=os.path.join(directory, "warm"))})["seconds"]
+
+    return {"cold_s": cold_s, "warm_s": warm_s, "speedup": cold_s/warm_s}
+
+
+BENCHMARKS  = {
+    "read_d1": bench_read_d1,
+    "read_stl": bench_read_stl,
+    "startup": bench_startup,
+    "precision": bench_precision,
+    "allocations": bench_allocations,
+    "interpolation": bench_interpolation,
+    "geodesic": bench_geodesic,
+    "lod": bench_lod,
+    "workers": bench_workers,
+    "daemon": bench_daemon,
+}
+
+
+# Execute the benchmarks
+if __name__ == "__main__":
+    names   = sys.argv[1:] or list(BENCHMARKS.keys())
+    for name in names:
+        results = BENCHMARKS[name]()
+        print("{}: {}".format(name, ", ".join("{}={:.4g}".format(k, v) for k, v in results.items())))
@@ -0,0 +1,326 @@
+import numpy
+from matplotlib.cm import ScalarMappable
+from matplotlib.colors import BoundaryNorm
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg
+from PyQt5.QtCore import Qt
+from PyQt5.QtWidgets import (
+    QWidget,
+    QGridLayout,
+    QComboBox,
+    QSlider,
+    QLabel,
+    QLineEdit,
+)
+
+import utils
+import constants
+
+
+# Stored field kinds and the form bounds/levels/label they are shown with
+BROWSER_KINDS   = {
+    "target": ("absolute_bounds", 33, "{}"),
+    "reference": ("absolute_bounds", 33, "{}"),
+    "delta": ("delta_bounds", 17, "d{}"),
+}
+
+
+class PixelMap(object):
+    """Precomputed mapping of image pixels onto the grid triangles
+
+    Every pixel center inside the projected grid is located in its triangle
+    once and stores the triangle vertices and barycentric weights, so the
+    image of any field is a gather and a weighted sum (no triangulation or
+    contouring work per field).
+    """
+
+    def __init__(self, contour, extent, shape):
+        height, width   = shape
+        x               = contour.grid[:, contour.axes[0]]
+        y               = contour.grid[:, contour.axes[1]]
+
+        # Pixel centers (the image origin is the lower left corner)
+        dx      = (extent[1] - extent[0])/width
+        dy      = (extent[3] - extent[2])/height
+        px, py  = numpy.meshgrid(
+                    extent[0] + dx*(numpy.arange(width) + 0.5),
+                    extent[2] + dy*(numpy.arange(height) + 0.5))
+
+        triangles   = contour.triangulation.get_trifinder()(px, py).ravel()
+        inside      = numpy.flatnonzero(triangles >= 0)
+        vertices    = contour.triangulation.triangles[triangles[inside]]
+
+        # Barycentric weights of the pixel centers
+        x0, x1, x2  = x[vertices[:, 0]], x[vertices[:, 1]], x[vertices[:, 2]]
+        y0, y1, y2  = y[vertices[:, 0]], y[vertices[:, 1]], y[vertices[:, 2]]
+        u, v        = px.ravel()[inside], py.ravel()[inside]
+        area        = (y1 - y2)*(x0 - x2) + (x2 - x1)*(y0 - y2)
+        w0          = ((y1 - y2)*(u - x2) + (x2 - x1)*(v - y2))/area
+        w1          = ((y2 - y0)*(u - x2) + (x0 - x2)*(v - y2))/area
+
+        self.shape      = (height, width)
+        self.extent     = list(extent)
+        self.inside     = inside
+        self.vertices   = vertices
+        self.weights    = numpy.column_stack((w0, w1, 1.0 - w0 - w1)).astype(numpy.float32)
+
+
+    def values(self, field):
+        """Return the field values at the pixels inside the grid"""
+
+        field   = numpy.asarray(field, dtype=numpy.float32)
+        return numpy.einsum("ij,ij->i", field[self.vertices], self.weights)
+
+
+    def image(self, field, levels, colors):
+        """Return the (height, width, 4) RGBA image of a field
+
+        colors holds one RGBA row per contour band (len(levels) + 1, the
+        first and last being the extensions) plus the outside color.
+        """
+
+        bands               = numpy.full(self.shape[0]*self.shape[1], len(colors) - 1, dtype=numpy.intp)
+        bands[self.inside]  = numpy.digitize(self.values(field), levels)
+        return colors[bands].reshape(self.shape + (4,))
+
+
+
+def band_colors(colormap, levels):
+    """Return the RGBA (uint8) color of each contour band and the outside
+
+    The bands match the filled contours of ContourPlot (extend="both").
+    """
+
+    norm    = BoundaryNorm(levels, colormap.N, extend="both")
+    middle  = 0.5*(levels[:-1] + levels[1:])
+    values  = numpy.concatenate(([levels[0] - 1.0], middle, [levels[-1] + 1.0]))
+    colors  = colormap(norm(values), bytes=True)
+    return numpy.vstack((colors, numpy.zeros((1, 4), dtype=numpy.uint8)))
+
+
+
+class SessionBrowser(QWidget):
+    """Browse the stored fields of a session point by point
+
+    The figure (border, zones, colorbar) is drawn once and redrawn only
+    when the window, bounds or colormap change. Scrubbing maps the stored
+    field through the pixel map and the band colors and blits the image,
+    outlines and title over the cached background.
+    """
+
+    def __init__(self, contour, store, inputs, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.setWindowTitle("Session Browser")
+        self.contour    = contour
+        self.store      = store
+        self.inputs     = inputs
+        self.index      = store.current_index
+        self.rows       = []
+        self.pixel_map  = None
+        self.background = None
+        self.colorbar   = None
+        self.field      = None
+
+        self.setup_ui()
+        self.set_kind(self._kind_edit.currentText())
+
+
+    def setup_ui(self):
+        """Set the canvas and the point, kind and scale controls"""
+
+        # Configure the canvas
+        x               = self.contour.grid[:, self.contour.axes[0]]
+        y               = self.contour.grid[:, self.contour.axes[1]]
+        self.figure     = Figure(figsize=(12, 5), dpi=100)
+        self.canvas     = FigureCanvasQTAgg(self.figure)
+        self.axes       = self.figure.add_subplot(111)
+        self.axes.set_aspect("equal")
+        self.axes.axis("off")
+        self.axes.set_xlim([x.min() - self.contour.margin, x.max() + self.contour.margin])
+        self.axes.set_ylim([y.min() - self.contour.margin, y.max() + self.contour.margin])
+        self.mappable   = ScalarMappable()
+        self.image      = self.figure.figimage(numpy.zeros((1, 1, 4), dtype=numpy.uint8), origin="lower", animated=True)
+        self.title      = self.axes.set_title(" ", fontsize=8, animated=True)
+
+        # The border and zone outlines are blitted over the image
+        static          = set(self.axes.get_children())
+        self.axes.plot(
+            self.contour.border[:, self.contour.axes[0]],
+            self.contour.border[:, self.contour.axes[1]],
+            "-k",
+            linewidth=0.5)
+        self.contour.render_zones(self.axes)
+        self.overlays   = [artist for artist in self.axes.get_children() if artist not in static]
+        for artist in self.overlays:
+            artist.set_animated(True)
+
+        self.canvas.mpl_connect("draw_event", self.on_draw)
+
+        # Configure the controls
+        self._kind_edit         = QComboBox()
+        self._colormap_edit     = QComboBox()
+        self._min_edit          = QLineEdit()
+        self._max_edit          = QLineEdit()
+        self._point_slider      = QSlider(Qt.Horizontal)
+        self._point_label       = QLabel()
+        kinds                   = [kind for kind in BROWSER_KINDS if kind in set(self.index.kind)]
+        self._kind_edit.addItems(kinds or list(BROWSER_KINDS))
+        self._colormap_edit.addItems(constants.COLORMAP_PATHS)
+        self._point_slider.setFocusPolicy(Qt.StrongFocus)
+
+        layout  = QGridLayout(self)
+        layout.addWidget(self.canvas, 0, 0, 1, 6)
+        layout.addWidget(QLabel("Point"), 1, 0)
+        layout.addWidget(self._point_slider, 1, 1, 1, 4)
+        layout.addWidget(self._point_label, 1, 5)
+        layout.addWidget(QLabel("Field"), 2, 0)
+        layout.addWidget(self._kind_edit, 2, 1)
+        layout.addWidget(QLabel("Colormap"), 2, 2)
+        layout.addWidget(self._colormap_edit, 2, 3)
+        layout.addWidget(self._min_edit, 2, 4)
+        layout.addWidget(self._max_edit, 2, 5)
+
+        # Connect signals and slots
+        self._kind_edit.currentTextChanged.connect(self.set_kind)
+        self._colormap_edit.currentTextChanged.connect(self.set_scale)
+        self._min_edit.editingFinished.connect(self.set_scale)
+        self._max_edit.editingFinished.connect(self.set_scale)
+        self._point_slider.valueChanged.connect(self.show_point)
+
+
+    def set_kind(self, kind):
+        """Select the field kind and its rows ordered by test condition"""
+
+        bounds, levels, label   = BROWSER_KINDS[kind]
+        bounds                  = self.inputs.get(bounds)
+        index                   = self.index[self.index.kind == kind]
+        index                   = index.sort_values(["ride_height", "yaw", "speed", "run_point"])
+        self.rows               = list(index.index.values)
+        self.n_levels           = levels
+        self.label              = label.format(self.inputs.get("variable", ""))
+
+        colormap    = constants.DEFAULT_DELTA_COLORMAP_PATH if kind == "delta" else constants.DEFAULT_ABSOLUTE_COLORMAP_PATH
+        widgets     = [self._colormap_edit, self._min_edit, self._max_edit, self._point_slider]
+        for widget in widgets:
+            widget.blockSignals(True)
+        self._colormap_edit.setCurrentText(colormap)
+        self._min_edit.setText(str(bounds[0]))
+        self._max_edit.setText(str(bounds[1]))
+        self._point_slider.setRange(0, max(len(self.rows) - 1, 0))
+        self._point_slider.setValue(0)
+        for widget in widgets:
+            widget.blockSignals(False)
+
+        self.set_scale()
+
+
+    def set_scale(self):
+        """Apply the colormap and bounds (no interpolation, one redraw)"""
+
+        try:
+            bounds  = [float(self._min_edit.text()), float(self._max_edit.text())]
+        except ValueError:
+            return
+
+        if bounds[1] <= bounds[0]:
+            return
+
+        colormap    = utils.read_colormap(self._colormap_edit.currentText())
+        self.levels = numpy.linspace(bounds[0], bounds[1], self.n_levels)
+        self.colors = band_colors(colormap, self.levels)
+        self.mappable.set_cmap(colormap)
+        self.mappable.set_norm(BoundaryNorm(self.levels, colormap.N, extend="both"))
+        if self.colorbar is None:
+            self.colorbar   = self.figure.colorbar(self.mappable, ax=self.axes, extend="both")
+        else:
+            self.colorbar.update_normal(self.mappable)
+
+        self.colorbar.ax.set_title(self.label)
+        self.show_point(self._point_slider.value(), blit=False)
+        self.canvas.draw_idle()
+
+
+    def on_draw(self, event):
+        """Cache the static background and draw the animated artists over it
+
+        The pixel map is rebuilt when the axes size changes, so the image is
+        drawn unresampled at the screen resolution.
+        """
+
+        bbox    = self.axes.get_window_extent()
+        shape   = (int(round(bbox.height)), int(round(bbox.width)))
+        extent  = list(self.axes.get_xlim()) + list(self.axes.get_ylim())
+        if self.pixel_map is None or self.pixel_map.shape != shape or self.pixel_map.extent != extent:
+            self.pixel_map  = PixelMap(self.contour, extent, shape)
+            self.image.ox   = int(round(bbox.x0))
+            self.image.oy   = int(round(bbox.y0))
+            self.update_image()
+
+        self.background = self.canvas.copy_from_bbox(self.figure.bbox)
+        self.draw_animated()
+
+
+    def draw_animated(self):
+        """Draw the image, outlines and title over the background"""
+
+        self.figure.draw_artist(self.image)
+        for artist in self.overlays + [self.title]:
+            self.axes.draw_artist(artist)
+
+
+    def update_image(self):
+        """Color the current field through the pixel map"""
+
+        if self.field is None or self.pixel_map is None:
+            self.image.set_data(numpy.zeros((1, 1, 4), dtype=numpy.uint8))
+            return
+
+        self.image.set_data(self.pixel_map.image(self.field, self.levels, self.colors))
+
+
+    def show_point(self, position, blit=True):
+        """Show the stored field at a slider position"""
+
+        if not self.rows:
+            self.field  = None
+            self.title.set_text("No stored fields")
+            self._point_label.setText("0/0")
+            return
+
+        row         = self.rows[position]
+        record      = self.store.records[row]
+        self.field  = self.store.get(row)
+        self.update_image()
+        self.title.set_text("{}: Run {}, RH-{}, Yaw {}, Speed {}".format(
+            record["kind"].capitalize(),
+            record["run_point"],
+            int(record["ride_height"]),
+            record["yaw"],
+            record["speed"]))
+        self._point_label.setText("{}/{}".format(position + 1, len(self.rows)))
+
+        if not blit or self.background is None:
+            return
+
+        self.canvas.restore_region(self.background)
+        self.draw_animated()
+        self.canvas.blit(self.figure.bbox)
+
+
+    def keyPressEvent(self, event):
+        """Step through the points with the arrow, page and home/end keys"""
+
+        steps   = {
+            Qt.Key_Left: -1,
+            Qt.Key_Right: 1,
+            Qt.Key_PageUp: -10,
+            Qt.Key_PageDown: 10,
+        }
+        if event.key() in steps:
+            self._point_slider.setValue(self._point_slider.value() + steps[event.key()])
+        elif event.key() == Qt.Key_Home:
+            self._point_slider.setValue(0)
+        elif event.key() == Qt.Key_End:
+            self._point_slider.setValue(self._point_slider.maximum())
+        else:
+            super().keyPressEvent(event)
@@ -0,0 +1,57 @@
+import matplotlib
+matplotlib.use("Agg")
+from matplotlib import pyplot
+
+import utils
+
+
+class CompositePlot(object):
+    """Contour plots of several grid parts (e.g. underbody, diffuser, wing) in one figure
+
+    parts are (name, ContourPlot) pairs with their configs set; config i of
+    every part is drawn in row i, one column per part (widths in proportion
+    to the part extents), with one colorbar per row.
+    """
+
+    def __init__(self, parts):
+        self.parts  = list(parts)
+
+
+    def render_key(self, configs):
+        """Content hash of the part render keys (configs are the per-part config lists)"""
+
+        return utils.hash_arrays(*[
+            utils.hash_arrays(name, contour.render_key(part_configs))
+            for (name, contour), part_configs in zip(self.parts, configs)])
+
+
+    def render(self):
+        """Render the matplotlib figure"""
+
+        widths  = []
+        for name, contour in self.parts:
+            xlim, ylim  = contour.limits()
+            widths.append(xlim[1] - xlim[0])
+
+        rows    = len(self.parts[0][1].configs)
+        figure  = pyplot.figure(figsize=(16, 9), dpi=100)
+        axes    = figure.subplots(rows, len(self.parts), squeeze=False, gridspec_kw={"width_ratios": widths})
+
+        for i in range(rows):
+            for j, (name, contour) in enumerate(self.parts):
+                config  = contour.configs[i]
+                filled  = contour.render_config(axes[i, j], config, title="{}: {}".format(name, config.title))
+
+            colorbar    = figure.colorbar(filled, ax=list(axes[i, :]))
+            colorbar.ax.set_title(config.colorbar_label)
+
+        return figure
+
+
+    def save(self, filename):
+        """Render the figure and save to file"""
+
+        figure  = self.render()
+        if figure:
+            figure.savefig(filename, bbox_inches="tight")
+            pyplot.close("all")
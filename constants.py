@@ -1,3 +1,77 @@
 XYZ                             = ["x", "y", "z"]
 DEFAULT_ABSOLUTE_COLORMAP_PATH  = "rainbow_desaturated_grey.json"
 DEFAULT_DELTA_COLORMAP_PATH     = "cool_to_warm_extended.json"
+COLORMAP_PATHS                  = [DEFAULT_ABSOLUTE_COLORMAP_PATH, "rainbow_desaturated.json", DEFAULT_DELTA_COLORMAP_PATH]
+FIELD_STORE_DIRECTORY           = ".fields"
+MESH_CACHE_SUFFIX               = ".cache"
+RENDER_MANIFEST_PATH            = "manifest.json"
+
+# Part of every render key: bump whenever a change alters the drawn pixels
+# so images rendered by older code are redrawn
+RENDERER_VERSION                = "3"
+
+# Floating point precision of the grid and interpolated fields; the field
+# store keeps float32 rows whatever the plot precision (read back in it)
+PRECISIONS                      = ["float64", "float32"]
+DEFAULT_PRECISION               = "float64"
+FIELD_STORE_PRECISION           = "float32"
+INTERPOLATION_CHUNK_SIZE        = 4096
+
+# Interpolation backends (interpolation.INTERPOLATORS)
+INTERPOLATIONS                  = ["rbf", "thin_plate", "nearest", "linear", "geodesic"]
+DEFAULT_INTERPOLATION           = "rbf"
+
+# Precision of the cached (vertices x taps) geodesic weight operators
+GEODESIC_OPERATOR_PRECISION     = "float32"
+
+# Bytes of ASCII STL lines parsed at a time (utils.read_stl_facets)
+STL_ASCII_BLOCK_SIZE            = 1 << 24
+
+# Mesh levels of detail (lod.py): a target vertex count or a screen-space
+# error in pixels of one plot (about LOD_VIEWPORT pixels in the saved figure)
+LOD_VIEWPORT                    = (1050, 200)
+LOD_LEVELS                      = {
+    "full": None,
+    "final": {"error": 1.0},
+    "preview": {"error": 3.0},
+}
+DEFAULT_LOD                     = "full"
+
+# D1.asc layout (header on line 3, units on line 4) and the typed columns
+D1_HEADER_ROW                   = 3
+D1_SKIPROWS                     = [0, 1, 2, 4]
+D1_DELIMITER                    = "\t"
+D1_COLUMNS                      = {
+    "Run Number": "float64",
+    "Point Number": "float64",
+    "Ride-Height-Number": "float64",
+    "YAW": "float64",
+    "RRS_SPEED": "float64",
+    "DYNPR": "float64",
+}
+D1_CONDITIONS                   = ["Ride-Height-Number", "YAW", "RRS_SPEED"]
+D1_CHANNEL_DTYPE                = "float32"
+D1_CACHE_SUFFIX                 = ".cache"
+D1_CACHE_VERSION                = 2
+
+# Render daemon (daemon.py): the per-user directory of its socket and
+# token, the local TCP address used where Unix sockets are not available,
+# and the contour plots it keeps open
+DAEMON_DIRECTORY                = "~/.pressure_plotter"
+DAEMON_SOCKET                   = "daemon.sock"
+DAEMON_TOKEN                    = "daemon.token"
+DAEMON_HOST                     = "127.0.0.1"
+DAEMON_PORT                     = 8765
+CONTOUR_CACHE_SIZE              = 4
+
+# Campaign files (batch.py): default save directory layout of the jobs
+# (relative to the campaign file) and the checkpoint written next to it
+CAMPAIGN_OUTPUT                 = "output/{name}"
+CAMPAIGN_STATE_SUFFIX           = ".state.json"
+
+# Shared directory work queue (workqueue.py): seconds between heartbeats,
+# without a heartbeat before a worker's jobs are re-queued, and between
+# polls of an idle worker
+QUEUE_HEARTBEAT_INTERVAL        = 15
+QUEUE_HEARTBEAT_TIMEOUT         = 120
+QUEUE_POLL_INTERVAL             = 5
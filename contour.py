@@ -1,25 +1,36 @@
+import json
 import numpy
-import pandas
 import matplotlib
 matplotlib.use("Agg")
 from matplotlib import pyplot
-from scipy.interpolate import Rbf, NearestNDInterpolator
+from matplotlib.tri import Triangulation
 
 import utils
 import constants
+import lod
+import zones
+import interpolation
 
 
 class ContourConfig(object):
-    """Plot configuration specifications"""
+    """Plot configuration specifications
 
-    def __init__(self, data, title, **kwargs):
-        self.data               = data
+    The tap data are plain arrays: the tap points (taps x 3, shared by the
+    configs of a plot) and the tap values. values holds the grid values once
+    interpolated (or given).
+    """
+
+    def __init__(self, points, tap_values, title, **kwargs):
+        self.points             = points
+        self.tap_values         = tap_values
         self.title              = title
         self.colormap_path      = kwargs.get("colormap_path")
         self.colormap           = utils.read_colormap(self.colormap_path)
         self.colorbar_bounds    = kwargs.get("colorbar_bounds", [0, 0.75])
         self.colorbar_levels    = kwargs.get("colorbar_levels", 33)
         self.colorbar_label     = kwargs.get("colorbar_label", "Cp")
+        self.values             = kwargs.get("values")
+        self.key                = kwargs.get("key")
 
     
     def set_colormap_path(self, filename):
@@ -35,43 +46,219 @@ class ContourPlot(object):
         self.grid           = None
         self.triangulation  = None
         self.border         = None
-        self.set_grid_path(grid_path)
+        self.zones          = []
+        self.zone_masks     = None
+        self.precision      = kwargs.get("precision", constants.DEFAULT_PRECISION)
+        self.dtype          = numpy.dtype(self.precision)
+        self.lod            = lod.resolve_level(kwargs.get("lod", constants.DEFAULT_LOD))
+        shared              = kwargs.get("shared")
+        if shared:
+            self.set_mesh(grid_path, shared["grid"], shared["triangles"], list(shared["axes"]), shared["border"], shared.get("grid_hash"))
+        else:
+            self.set_grid_path(grid_path)
+        self.set_interpolation(
+            kwargs.get("interpolation", constants.DEFAULT_INTERPOLATION),
+            kwargs.get("interpolation_options", {}))
+        if shared:
+            self.interpolator.attach_arrays(shared)
+        self.set_zones(kwargs.get("zones", []))
         self.set_configs(configs)
         
     
     def set_grid_path(self, filename):
-        """Set the grid to interpolate onto"""
+        """Set the grid to interpolate onto (in the plot precision)
+
+        With a level of detail the grid is the decimated mesh of that level
+        (the border stays that of the full mesh).
+        """
+
+        (grid, triangulation, axes, border) = utils.read_stl(filename, triangulation=True, dtype=self.dtype)
+        triangles                           = triangulation.triangles
+        if self.lod:
+            (points, triangles) = lod.cached_level(
+                                    filename,
+                                    utils.hash_arrays(grid, triangles),
+                                    grid,
+                                    triangles,
+                                    axes,
+                                    self.lod)
+            grid                = points.astype(self.dtype)
+
+        self.set_mesh(filename, grid, triangles, axes, border)
+
+
+    def set_mesh(self, filename, grid, triangles, axes, border, grid_hash=None):
+        """Set the grid mesh (points in the plot precision) read from a grid file
+
+        grid_hash is the known content hash of the mesh (computed if None).
+        """
+
+        self.grid_path      = filename
+        self.grid           = grid
+        self.triangulation  = Triangulation(grid[:, axes[0]], grid[:, axes[1]], triangles=triangles)
+        self.axes           = axes
+        self.border         = border
+        self.margin         = 0.5
+        self.grid_hash      = grid_hash or utils.hash_arrays(grid, self.triangulation.triangles)
+
+
+    def shared_arrays(self, interpolation=True):
+        """Return the arrays handed to worker processes (see the shared option)
+
+        The grid, triangles, plot axes and border, plus the cached arrays of
+        the interpolation backend unless the workers only render.
+        """
+
+        arrays  = {
+            "grid": self.grid,
+            "triangles": self.triangulation.triangles,
+            "axes": numpy.asarray(self.axes),
+            "border": self.border,
+        }
+        if interpolation:
+            arrays.update(self.interpolator.shared_arrays())
+        return arrays
+
+
+    def set_interpolation(self, name, options={}):
+        """Set the interpolation backend (see interpolation.INTERPOLATORS)"""
+
+        self.interpolator   = interpolation.make_interpolator(name, axes=self.axes, **options)
+        self.interpolator.set_mesh(
+            self.grid,
+            self.triangulation.triangles,
+            self.grid_path + constants.MESH_CACHE_SUFFIX,
+            self.grid_hash)
+
+
+    def set_zones(self, definitions):
+        """Set the named surface zones (polygons or vertex id lists)"""
+
+        self.zones      = list(definitions)
+        self.zone_masks = None
+        if self.zones:
+            self.zone_masks = zones.cached_zone_masks(
+                                self.grid_path,
+                                self.grid_hash,
+                                self.grid,
+                                self.triangulation.triangles,
+                                self.axes,
+                                self.zones)
+
+
+    def interpolate(self, points, values):
+        """Interpolate the tap values at the (taps x 3) points onto the grid vertices"""
+        return self.interpolator(points, values, self.grid, self.dtype)
+
+
+    def render_key(self, configs):
+        """Content hash of everything that determines the rendered image
+
+        Configs are identified by their interpolation input key (falling back
+        to a hash of the data) plus their colormap, bounds, levels and labels.
+        The grid, border outline and zone definitions identify the geometry.
+        """
+
+        items   = [
+            constants.RENDERER_VERSION,
+            self.grid_hash,
+            utils.hash_arrays(numpy.asarray(self.border if self.border is not None else [], dtype=numpy.float64)),
+            self.interpolator.key,
+            str(self.title),
+            str(self.margin),
+            json.dumps(self.zones, sort_keys=True),
+        ]
+        for config in configs:
+            key = config.key
+            if key is None:
+                key = utils.hash_arrays(
+                        numpy.asarray(config.points, dtype=numpy.float64),
+                        numpy.asarray(config.tap_values, dtype=numpy.float64))
 
-        (grid, triangulation, axes, border) = utils.read_stl(filename, triangulation=True)
-        self.grid_path                      = filename
-        self.grid                           = grid
-        self.triangulation                  = triangulation
-        self.axes                           = axes
-        self.border                         = border
-        self.margin                         = 0.5
+            items   += [
+                key,
+                str(config.title),
+                str(config.colormap_path),
+                str(list(config.colorbar_bounds)),
+                str(config.colorbar_levels),
+                str(config.colorbar_label),
+            ]
+
+        return utils.hash_arrays(*items)
 
 
     def set_configs(self, configs):
-        """Set the configs (data and plot attributes)"""
+        """Set the configs (data and plot attributes)
+
+        Configs with precomputed grid values are not interpolated again; the
+        values are kept as one vector per config (no copy of the grid).
+        """
 
         self.configs    = configs
         for config in configs:
-            data            = config.data
-            func            = Rbf(data.x, data.y, data.z, data.value.astype(float))
-            values          = func(self.grid[:, 0], self.grid[:, 1], self.grid[:, 2])
-            interp          = pandas.DataFrame(columns=constants.XYZ, data=self.grid)
-            interp["value"] = values
+            if config.values is None:
+                config.values   = self.interpolate(config.points, config.tap_values)
+
             levels          = numpy.linspace(
                                 config.colorbar_bounds[0], 
                                 config.colorbar_bounds[1], 
                                 config.colorbar_levels)
 
             # Update the config specification
-            config.data             = interp
+            config.values           = numpy.asarray(config.values, dtype=self.dtype)
             config.colorbar_levels  = levels
 
 
 
+    def limits(self):
+        """Return the x and y limits of the plot (the grid extent plus the margin)"""
+
+        xlim    = [self.grid[:, self.axes[0]].min() - self.margin, 
+                    self.grid[:, self.axes[0]].max() + self.margin]
+        ylim    = [self.grid[:, self.axes[1]].min() - self.margin, 
+                    self.grid[:, self.axes[1]].max() + self.margin]
+        return xlim, ylim
+
+
+    def render_config(self, axes, config, title=None):
+        """Draw a config (border, contours and zones) into the axes
+
+        Returns the filled contour set (for the colorbar).
+        """
+
+        xlim, ylim  = self.limits()
+        axes.set_aspect("equal")
+        axes.axis("off")
+        axes.set_title(config.title if title is None else title, fontsize=8)
+
+        axes.plot(
+            self.border[:, self.axes[0]], 
+            self.border[:, self.axes[1]], 
+            "-k",
+            linewidth=0.5)
+
+        contour = axes.tricontourf(
+            self.triangulation, 
+            config.values,
+            extend="both",
+            cmap=config.colormap,
+            levels=config.colorbar_levels)
+       
+        axes.tricontour(
+            self.triangulation,
+            config.values,
+            extend="both",
+            levels=config.colorbar_levels,
+            linewidths=0.5,
+            colors="k")
+       
+        self.render_zones(axes)
+
+        axes.set_xlim(xlim)
+        axes.set_ylim(ylim)
+        return contour
+
+
     def render(self):
         """Render the matplotlib figure"""        
 
@@ -81,38 +268,10 @@ class ContourPlot(object):
         if not isinstance(axes, (list, numpy.ndarray)):
             axes    = [axes]
 
-        xlim    = [self.grid[:, self.axes[0]].min() - self.margin, 
-                    self.grid[:, self.axes[0]].max() + self.margin]
-        ylim    = [self.grid[:, self.axes[1]].min() - self.margin, 
-                    self.grid[:, self.axes[1]].max() + self.margin]
-
+        xlim, ylim  = self.limits()
         for i, config in enumerate(self.configs):
-            axes[i].set_aspect("equal")
-            axes[i].axis("off")
-            axes[i].set_title(config.title, fontsize=8)
-
-            axes[i].plot(
-                self.border[:, self.axes[0]], 
-                self.border[:, self.axes[1]], 
-                "-k",
-                linewidth=0.5)
-
-            contour = axes[i].tricontourf(
-                self.triangulation, 
-                config.data.value,
-                extend="both",
-                cmap=config.colormap,
-                levels=config.colorbar_levels)
-           
-            axes[i].tricontour(
-                self.triangulation,
-                config.data.value,
-                extend="both",
-                levels=config.colorbar_levels,
-                linewidths=0.5,
-                colors="k")
-           
-            colorbar = figure.colorbar(contour, ax=axes[i])
+            contour     = self.render_config(axes[i], config)
+            colorbar    = figure.colorbar(contour, ax=axes[i])
             colorbar.ax.set_title(config.colorbar_label)
 
             axes[i].set_xlim(xlim)
@@ -121,6 +280,38 @@ class ContourPlot(object):
         return figure
 
 
+    def render_zones(self, axes):
+        """Draw the zone outlines and names over a contour plot"""
+
+        if self.zone_masks is None:
+            return
+
+        x   = self.grid[:, self.axes[0]]
+        y   = self.grid[:, self.axes[1]]
+        for zone, mask in zip(self.zones, self.zone_masks):
+            inside  = mask.indices
+            if len(inside) == 0:
+                continue
+
+            indicator           = numpy.zeros(self.grid.shape[0])
+            indicator[inside]   = 1.0
+            axes.tricontour(
+                self.triangulation,
+                indicator,
+                levels=[0.5],
+                linewidths=1.0,
+                linestyles="--",
+                colors="k")
+
+            axes.text(
+                x[inside].mean(),
+                y[inside].mean(),
+                zone.get("name", ""),
+                fontsize=7,
+                ha="center",
+                va="center")
+
+
     def save(self, filename):
         """Render the figure and save to file"""
 
@@ -0,0 +1,399 @@
+import os
+import sys
+import hmac
+import json
+import time
+import socket
+import secrets
+import threading
+import http.client
+import socketserver
+from http.server import HTTPServer, BaseHTTPRequestHandler
+
+import constants
+
+
+def summarize(result):
+    """Return a JSON-compatible summary of a pipeline result"""
+
+    from store import FieldStore
+
+    if isinstance(result, FieldStore):
+        return {"field_store": result.path, "fields": len(result)}
+    if isinstance(result, (list, tuple)):
+        return [summarize(item) for item in result]
+    if isinstance(result, dict):
+        return {key: summarize(value) for key, value in result.items()}
+    if hasattr(result, "to_json"):
+        return json.loads(result.to_json(orient="records"))
+
+    return result
+
+
+class RenderEngine(object):
+    """Runs plot jobs in one long-lived process
+
+    The opened contour plots (grids, zones, levels of detail and
+    interpolation operators, see pipeline.CONTOUR_CACHE), the thumbnail
+    process pool, the colormaps and the imported libraries stay warm
+    between jobs. A job is the dictionary
+
+        {"action": "plot", "inputs": {...}, "options": {...}}
+
+    where inputs are those of PressurePlotterForm.extract_inputs and options
+    the extra keyword arguments of the action (see ACTIONS).
+    """
+
+    ACTIONS = ("plot", "repeatability", "export", "animate", "report", "warm")
+
+    def __init__(self):
+        import pipeline
+
+        self.pipeline   = pipeline
+        self.jobs       = 0
+        if pipeline.CONTOUR_CACHE is None:
+            pipeline.CONTOUR_CACHE  = {}
+        if pipeline.THUMBNAIL_EXECUTOR is None:
+            from concurrent.futures import ProcessPoolExecutor
+
+            pipeline.THUMBNAIL_EXECUTOR = ProcessPoolExecutor()
+
+
+    def run(self, job, progress=None):
+        """Run a job and return its action, duration (s) and result summary"""
+
+        action  = job.get("action", "plot")
+        if action not in self.ACTIONS:
+            raise ValueError("Unknown action '{}', expected one of {}".format(action, ", ".join(self.ACTIONS)))
+
+        start       = time.perf_counter()
+        result      = getattr(self, action)(job.get("inputs") or {}, progress, **(job.get("options") or {}))
+        self.jobs   += 1
+        return {"action": action, "seconds": time.perf_counter() - start, "result": summarize(result)}
+
+
+    def close(self):
+        """Stop the thumbnail process pool"""
+
+        if self.pipeline.THUMBNAIL_EXECUTOR is not None:
+            self.pipeline.THUMBNAIL_EXECUTOR.shutdown()
+            self.pipeline.THUMBNAIL_EXECUTOR    = None
+
+
+    def status(self):
+        """Return the process id, job count and warm grids"""
+
+        return {
+            "pid": os.getpid(),
+            "jobs": self.jobs,
+            "contours": [json.loads(key)[0][0] for key in self.pipeline.CONTOUR_CACHE],
+        }
+
+
+    # Actions
+    def plot(self, inputs, progress=None):
+        return self.pipeline.plot(inputs, progress=progress)
+
+
+    def repeatability(self, inputs, progress=None):
+        return self.pipeline.plot_repeatability(inputs, progress=progress)
+
+
+    def export(self, inputs, progress=None):
+        return self.pipeline.export_fields(inputs)
+
+
+    def animate(self, inputs, progress=None, **options):
+        return self.pipeline.animate_sweeps(inputs, **options)
+
+
+    def report(self, inputs, progress=None):
+        return self.pipeline.write_report(inputs)
+
+
+    def warm(self, inputs, progress=None):
+        """Open the contour plots of the inputs (and their parts) ahead of the jobs"""
+
+        for part in self.pipeline.part_inputs(inputs) if inputs.get("parts") else [inputs]:
+            self.pipeline.open_contour(part)
+
+        return self.status()["contours"]
+
+
+# Access: the daemon reads and writes files with its user's permissions,
+# so only that user may drive it
+def daemon_path(name):
+    """Return the path of a file in the per-user daemon directory"""
+    return os.path.join(os.path.expanduser(constants.DAEMON_DIRECTORY), name)
+
+
+def default_address():
+    """Return the daemon's Unix socket path, or its (host, port) where Unix sockets are not available"""
+
+    if hasattr(socket, "AF_UNIX"):
+        return daemon_path(constants.DAEMON_SOCKET)
+
+    return (constants.DAEMON_HOST, constants.DAEMON_PORT)
+
+
+def read_token(create=False):
+    """Return the per-user token of the daemon, creating it if asked
+
+    The token file lives in a directory of the user's home only its owner
+    can enter (0700) and is only readable by its owner (0600); a token
+    other users can read is refused with PermissionError.
+    """
+
+    path    = daemon_path(constants.DAEMON_TOKEN)
+    if create:
+        os.makedirs(os.path.dirname(path), mode=0o700, exist_ok=True)
+        os.chmod(os.path.dirname(path), 0o700)
+        try:
+            descriptor  = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+        except FileExistsError:
+            pass
+        else:
+            with os.fdopen(descriptor, "w") as f:
+                f.write(secrets.token_hex(32))
+
+    with open(path, "r") as f:
+        status  = os.fstat(f.fileno())
+        if hasattr(os, "getuid") and (status.st_uid != os.getuid() or status.st_mode & 0o077):
+            raise PermissionError("The daemon token {} must be owned by this user and readable by no one else (chmod 600)".format(path))
+        token   = f.read().strip()
+
+    if not token:
+        raise PermissionError("The daemon token {} is empty".format(path))
+
+    return token
+
+
+class JobHandler(BaseHTTPRequestHandler):
+    """HTTP API of the render daemon
+
+        GET  /status    process id, job count and warm grids
+        POST /jobs      run the JSON job of the request body (see RenderEngine)
+        POST /shutdown  stop the daemon
+
+    Every request must carry the daemon token (Authorization: Bearer
+    <token>, see read_token) and POST bodies must be sent as
+    application/json. Requests with an Origin header come from a web page
+    and are refused, so a website open in the user's browser cannot drive
+    the daemon. Jobs are run one at a time in the order received.
+    """
+
+    def reply(self, status, data):
+        body    = json.dumps(data).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+    def address_string(self):
+        # Unix socket clients have no address
+        return self.client_address[0] if isinstance(self.client_address, tuple) and self.client_address else "local"
+
+
+    def authorized(self):
+        """Reply with an error and return False unless the request may drive the daemon"""
+
+        if self.headers.get("Origin") is not None:
+            self.reply(403, {"error": "Requests from web pages are refused"})
+            return False
+
+        token   = self.headers.get("Authorization") or ""
+        if not hmac.compare_digest(token.encode("utf-8"), "Bearer {}".format(self.server.token).encode("utf-8")):
+            self.reply(401, {"error": "Missing or wrong daemon token"})
+            return False
+
+        return True
+
+
+    def do_GET(self):
+        if not self.authorized():
+            return
+
+        if self.path == "/status":
+            self.reply(200, self.server.engine.status())
+        else:
+            self.reply(404, {"error": "Not found: {}".format(self.path)})
+
+
+    def do_POST(self):
+        # The body is read first so that refused clients get their reply
+        length  = int(self.headers.get("Content-Length") or 0)
+        body    = self.rfile.read(length)
+        if not self.authorized():
+            return
+
+        if (self.headers.get("Content-Type") or "").split(";")[0].strip().lower() != "application/json":
+            self.reply(415, {"error": "Requests must be sent as application/json"})
+            return
+
+        if self.path == "/shutdown":
+            self.reply(200, self.server.engine.status())
+            threading.Thread(target=self.server.shutdown).start()
+
+        elif self.path == "/jobs":
+            try:
+                self.reply(200, self.server.engine.run(json.loads(body.decode("utf-8"))))
+            except ValueError as error:
+                self.reply(400, {"error": "{}: {}".format(type(error).__name__, error)})
+            except Exception as error:
+                self.reply(500, {"error": "{}: {}".format(type(error).__name__, error)})
+
+        else:
+            self.reply(404, {"error": "Not found: {}".format(self.path)})
+
+
+class UnixHTTPServer(HTTPServer):
+    """HTTP server listening on a Unix socket"""
+
+    address_family  = getattr(socket, "AF_UNIX", None)
+
+    def server_bind(self):
+        socketserver.TCPServer.server_bind(self)
+        os.chmod(self.server_address, 0o600)
+        self.server_name    = "localhost"
+        self.server_port    = 0
+
+
+def serve(address=None):
+    """Run the render daemon until shut down
+
+    The daemon listens on a Unix socket in the per-user daemon directory
+    (on the local TCP port where Unix sockets are not available, or when
+    given a (host, port) address) and only runs the requests carrying the
+    user's token (see JobHandler).
+    """
+
+    address = address or default_address()
+    token   = read_token(create=True)
+    if isinstance(address, str):
+        if is_running(address, timeout=1.0):
+            raise OSError("A daemon is already listening on {}".format(address))
+        if os.path.exists(address):
+            os.remove(address)
+        server  = UnixHTTPServer(address, JobHandler)
+    else:
+        server  = HTTPServer(address, JobHandler)
+
+    server.token    = token
+    server.engine   = RenderEngine()
+    try:
+        server.serve_forever()
+    finally:
+        server.engine.close()
+        server.server_close()
+        if isinstance(address, str) and os.path.exists(address):
+            os.remove(address)
+
+
+# Client
+class UnixHTTPConnection(http.client.HTTPConnection):
+    """HTTP connection over a Unix socket"""
+
+    def __init__(self, socket_path, timeout=None):
+        http.client.HTTPConnection.__init__(self, "localhost", timeout=timeout)
+        self.socket_path    = socket_path
+
+
+    def connect(self):
+        self.sock   = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(self.timeout)
+        self.sock.connect(self.socket_path)
+
+
+def request(path, data=None, address=None, timeout=None):
+    """Send a request to the daemon and return the decoded JSON reply
+
+    address is a Unix socket path or (host, port), the default address
+    (see default_address) if None. Raises RuntimeError with the daemon's
+    message if the request failed and OSError if no daemon is listening or
+    the token cannot be read.
+    """
+
+    address = address or default_address()
+    headers = {"Authorization": "Bearer {}".format(read_token())}
+    if isinstance(address, str):
+        connection  = UnixHTTPConnection(address, timeout=timeout)
+    else:
+        connection  = http.client.HTTPConnection(*address, timeout=timeout)
+
+    try:
+        if data is None:
+            connection.request("GET", path, headers=headers)
+        else:
+            headers["Content-Type"] = "application/json"
+            connection.request("POST", path, body=json.dumps(data).encode("utf-8"), headers=headers)
+        response    = connection.getresponse()
+        reply       = json.loads(response.read().decode("utf-8"))
+    finally:
+        connection.close()
+
+    if response.status != 200:
+        raise RuntimeError(reply.get("error"))
+
+    return reply
+
+
+def submit(job, address=None, timeout=None):
+    """Run a job on the daemon and return its reply (see RenderEngine.run)"""
+    return request("/jobs", job, address, timeout)
+
+
+def is_running(address=None, timeout=0.2):
+    """Return True if a daemon answers at the address"""
+
+    try:
+        request("/status", address=address, timeout=timeout)
+    except (OSError, RuntimeError, ValueError, http.client.HTTPException):
+        return False
+
+    return True
+
+
+_engine = None
+
+def run_job(job, progress=None):
+    """Run a job on the daemon if one is running, otherwise in this process
+
+    Jobs run here use a process-wide engine, so this process stays warm
+    too. progress is only reported for jobs run here.
+    """
+
+    global _engine
+
+    if is_running():
+        return submit(job)
+
+    if _engine is None:
+        _engine = RenderEngine()
+
+    return _engine.run(job, progress)
+
+
+# Run or talk to the daemon, on the per-user socket or the local TCP port:
+#   python daemon.py serve [port]
+#   python daemon.py submit job.json [port]
+#   python daemon.py status|shutdown [port]
+if __name__ == "__main__":
+    def address(argument):
+        return (constants.DAEMON_HOST, int(sys.argv[argument])) if len(sys.argv) > argument else None
+
+    command = sys.argv[1] if len(sys.argv) > 1 else "serve"
+    if command == "serve":
+        serve(address(2))
+
+    elif command == "submit":
+        with open(sys.argv[2], "r") as f:
+            job = json.load(f)
+        print(json.dumps(submit(job, address(3)), indent=4))
+
+    elif command in ("status", "shutdown"):
+        print(json.dumps(request("/" + command, None if command == "status" else {}, address(2)), indent=4))
+
+    else:
+        sys.exit("Unknown command '{}', expected serve, submit, status or shutdown".format(command))
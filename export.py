@@ -0,0 +1,67 @@
+import numpy
+
+
+VTK_TYPES   = {
+    numpy.dtype("<f4"): "Float32",
+    numpy.dtype("<i8"): "Int64",
+}
+
+
+def write_vtp(filename, points, triangles, arrays):
+    """Write a triangulated surface and its point data as a binary VTK PolyData file
+
+    arrays is a list of (name, values) pairs with one value per point (for
+    example rows of the memory-mapped field store), written as Float32. The
+    geometry is written once and every array is streamed into the appended
+    raw data section, without building any VTK objects.
+    """
+
+    float32     = numpy.dtype("<f4")
+    int64       = numpy.dtype("<i8")
+    header      = numpy.dtype("<u8")
+    offsets     = numpy.arange(1, len(triangles) + 1, dtype=int64)*3
+    data        = [(name, values, float32, 1) for name, values in arrays]
+    geometry    = [
+        ("Points", points, float32, 3),
+        ("connectivity", triangles, int64, 1),
+        ("offsets", offsets, int64, 1),
+    ]
+
+    # Lay out the appended blocks (each a UInt64 byte count and the data)
+    tags        = []
+    position    = 0
+    for name, values, dtype, components in data + geometry:
+        tags.append('<DataArray type="{}" Name="{}" NumberOfComponents="{}" format="appended" offset="{}"/>'.format(
+            VTK_TYPES[dtype], name, components, position))
+        position    += header.itemsize + numpy.size(values)*dtype.itemsize
+
+    n           = len(data)
+    lines       = [
+        '<?xml version="1.0"?>',
+        '<VTKFile type="PolyData" version="1.0" byte_order="LittleEndian" header_type="UInt64">',
+        '<PolyData>',
+        '<Piece NumberOfPoints="{}" NumberOfVerts="0" NumberOfLines="0" NumberOfStrips="0" NumberOfPolys="{}">'.format(
+            len(points), len(triangles)),
+        '<PointData>',
+    ] + tags[:n] + [
+        '</PointData>',
+        '<Points>',
+        tags[n],
+        '</Points>',
+        '<Polys>',
+        tags[n + 1],
+        tags[n + 2],
+        '</Polys>',
+        '</Piece>',
+        '</PolyData>',
+        '<AppendedData encoding="raw">',
+    ]
+
+    with open(filename, "wb") as f:
+        f.write(("\n".join(lines) + "\n_").encode("utf-8"))
+        for name, values, dtype, components in data + geometry:
+            values  = numpy.ascontiguousarray(values, dtype=dtype)
+            f.write(numpy.array(values.nbytes, dtype=header).tobytes())
+            f.write(values.tobytes())
+
+        f.write(b"\n</AppendedData>\n</VTKFile>\n")
@@ -0,0 +1,448 @@
+import os
+import json
+import numpy
+
+import utils
+import constants
+
+
+# Kernels of scipy Rbf's named functions (r the distance, e epsilon)
+RBF_KERNELS     = {
+    "multiquadric": lambda r, e: numpy.sqrt((r/e)**2 + 1),
+    "inverse": lambda r, e: 1.0/numpy.sqrt((r/e)**2 + 1),
+    "gaussian": lambda r, e: numpy.exp(-(r/e)**2),
+    "linear": lambda r, e: r,
+    "cubic": lambda r, e: r**3,
+    "quintic": lambda r, e: r**5,
+    "thin_plate": lambda r, e: r**2*numpy.log(numpy.where(r > 0, r, 1)),
+}
+
+
+def evaluate_rbf(func, points, dtype=numpy.float64, chunk_size=constants.INTERPOLATION_CHUNK_SIZE):
+    """Evaluate a fitted Rbf at the points in the given precision
+
+    The tap weights are solved by Rbf in double precision; for the named
+    kernels (RBF_KERNELS) with the Euclidean norm the kernel matrix is
+    formed chunk by chunk (chunk_size points x taps) in the given dtype.
+    Other kernels and norms are evaluated by the Rbf itself, in chunks.
+    """
+
+    dtype   = numpy.dtype(dtype)
+    values  = numpy.empty(len(points), dtype=dtype)
+    kernel  = RBF_KERNELS.get(func.function) if isinstance(func.function, str) else None
+    if kernel is None or func.norm != "euclidean":
+        for start in range(0, len(points), chunk_size):
+            block                               = numpy.asarray(points[start:start + chunk_size], dtype=numpy.float64)
+            values[start:start + chunk_size]    = func(*block.T)
+        return values
+
+    nodes   = func.xi.T.astype(dtype)
+    weights = func.nodes.astype(dtype)
+    epsilon = dtype.type(func.epsilon)
+    for start in range(0, len(points), chunk_size):
+        block                               = numpy.asarray(points[start:start + chunk_size], dtype=dtype)
+        r                                   = numpy.sqrt(((block[:, None, :] - nodes[None, :, :])**2).sum(axis=2))
+        values[start:start + chunk_size]    = kernel(r, epsilon).dot(weights)
+
+    return values
+
+
+class Interpolator(object):
+    """Interpolation backend interface
+
+    A backend is fitted to the (taps x 3) tap points and values and then
+    evaluated at the (n x 3) grid vertices. axes are the two coordinates of
+    the projected plot plane; options are the backend settings.
+    """
+
+    name    = ""
+
+    def __init__(self, axes=(0, 1), **options):
+        self.axes       = list(axes)
+        self.options    = options
+
+
+    @property
+    def key(self):
+        """Identity of the backend and its settings (part of the field keys)"""
+        return json.dumps([self.name, self.options], sort_keys=True)
+
+
+    def set_mesh(self, grid, triangles, cache_directory=None, grid_hash=None):
+        """Set the grid mesh (only used by mesh-aware backends)"""
+        pass
+
+
+    def shared_arrays(self):
+        """Return the cached arrays worth handing to worker processes by name"""
+        return {}
+
+
+    def attach_arrays(self, arrays):
+        """Reuse the cached arrays of shared_arrays (e.g. attached shared memory)"""
+        pass
+
+
+    def fit(self, points, values):
+        raise NotImplementedError
+
+
+    def evaluate(self, grid, dtype=numpy.float64):
+        raise NotImplementedError
+
+
+    def __call__(self, points, values, grid, dtype=numpy.float64):
+        """Fit the tap data and evaluate it at the grid vertices"""
+
+        self.fit(numpy.asarray(points, dtype=numpy.float64), numpy.asarray(values, dtype=numpy.float64))
+        return self.evaluate(grid, dtype)
+
+
+
+class RbfInterpolator(Interpolator):
+    """Global radial basis function (scipy Rbf) with a kernel and smoothing
+
+    options: function (multiquadric, thin_plate, gaussian, ...), smooth and
+    epsilon, as for scipy.interpolate.Rbf.
+    """
+
+    name    = "rbf"
+
+    def fit(self, points, values):
+        from scipy.interpolate import Rbf
+
+        self.func   = Rbf(points[:, 0], points[:, 1], points[:, 2], values, **self.options)
+
+
+    def evaluate(self, grid, dtype=numpy.float64):
+        return evaluate_rbf(self.func, grid, dtype)
+
+
+
+class ThinPlateInterpolator(Interpolator):
+    """Thin-plate spline (scipy RBFInterpolator, SciPy 1.7+)
+
+    options: neighbors (limit each evaluation to the nearest taps, None for
+    all) and smoothing.
+    """
+
+    name    = "thin_plate"
+
+    def fit(self, points, values):
+        try:
+            from scipy.interpolate import RBFInterpolator
+        except ImportError:
+            raise ImportError("The thin_plate interpolation requires SciPy 1.7 or newer")
+
+        self.func   = RBFInterpolator(
+                        points,
+                        values,
+                        kernel="thin_plate_spline",
+                        neighbors=self.options.get("neighbors"),
+                        smoothing=self.options.get("smoothing", 0.0))
+
+
+    def evaluate(self, grid, dtype=numpy.float64):
+        values  = numpy.empty(len(grid), dtype=dtype)
+        size    = constants.INTERPOLATION_CHUNK_SIZE
+        for start in range(0, len(grid), size):
+            values[start:start + size]  = self.func(numpy.asarray(grid[start:start + size], dtype=numpy.float64))
+
+        return values
+
+
+
+class NearestInterpolator(Interpolator):
+    """Value of the nearest tap (3D distance)"""
+
+    name    = "nearest"
+
+    def fit(self, points, values):
+        from scipy.interpolate import NearestNDInterpolator
+
+        self.func   = NearestNDInterpolator(points, values)
+
+
+    def evaluate(self, grid, dtype=numpy.float64):
+        return self.func(numpy.asarray(grid, dtype=numpy.float64)).astype(dtype)
+
+
+
+class LinearInterpolator(Interpolator):
+    """Linear on the Delaunay triangulation of the taps in the plot plane
+
+    Vertices outside the convex hull of the taps take the nearest tap value.
+    """
+
+    name    = "linear"
+
+    def fit(self, points, values):
+        from scipy.interpolate import LinearNDInterpolator, NearestNDInterpolator
+
+        plane           = points[:, self.axes]
+        self.func       = LinearNDInterpolator(plane, values)
+        self.nearest    = NearestNDInterpolator(plane, values)
+
+
+    def evaluate(self, grid, dtype=numpy.float64):
+        plane           = numpy.asarray(grid, dtype=numpy.float64)[:, self.axes]
+        values          = self.func(plane)
+        outside         = numpy.isnan(values)
+        values[outside] = self.nearest(plane[outside])
+        return values.astype(dtype)
+
+
+
+def mesh_graph(grid, triangles, rings=1):
+    """Return the sparse (vertices x vertices) edge length graph of a mesh
+
+    With rings > 1 every vertex is also joined to the vertices up to that
+    many edges away by a straight edge, so that shortest paths are no longer
+    bound to the zig-zag of the mesh edges (closer to the true geodesic).
+    """
+
+    from scipy import sparse
+
+    edges       = numpy.vstack((triangles[:, [0, 1]], triangles[:, [1, 2]], triangles[:, [2, 0]]))
+    count       = len(grid)
+    adjacency   = sparse.coo_matrix((numpy.ones(len(edges)), (edges[:, 0], edges[:, 1])), shape=(count, count)).tocsr()
+    adjacency   = adjacency + adjacency.T
+    reach       = adjacency
+    for _ in range(rings - 1):
+        reach   = reach + reach.dot(adjacency)
+        reach.data[:]   = 1.0
+
+    reach       = sparse.triu(reach, k=1).tocoo()
+    points      = numpy.asarray(grid, dtype=numpy.float64)
+    lengths     = numpy.linalg.norm(points[reach.row] - points[reach.col], axis=1)
+    return sparse.csr_matrix((lengths, (reach.row, reach.col)), shape=(count, count))
+
+
+
+def embed_distances(between, distances, dimensions=3):
+    """Return Euclidean coordinates matching geodesic distances (landmark MDS)
+
+    between are the (taps x taps) and distances the (taps x vertices)
+    distances from the taps (the landmarks); returns the (taps x dimensions)
+    and (vertices x dimensions) coordinates. A folded surface is unfolded,
+    so surfaces far apart along the mesh end up far apart in space.
+    """
+
+    squared         = between**2
+    centering       = numpy.eye(len(between)) - 1.0/len(between)
+    (eigenvalues, eigenvectors)    = numpy.linalg.eigh(-0.5*centering.dot(squared).dot(centering))
+    order           = numpy.argsort(eigenvalues)[::-1][:dimensions]
+    order           = order[eigenvalues[order] > 1e-9*eigenvalues[order[0]]]
+    projection      = eigenvectors[:, order]/numpy.sqrt(eigenvalues[order])
+
+    mean            = squared.mean(axis=0)
+    taps            = -0.5*(squared - mean).dot(projection)
+    vertices        = -0.5*(distances.T**2 - mean).dot(projection)
+    return (taps, vertices)
+
+
+
+class GeodesicInterpolator(Interpolator):
+    """Radial basis functions of the geodesic distance over the mesh
+
+    Each tap is snapped to its nearest vertex and the shortest path distance
+    over the mesh (scipy.sparse.csgraph.dijkstra on the mesh_graph) from
+    every tap to every vertex is computed once. Those distances are embedded
+    in Euclidean space (embed_distances), where a multiquadric RBF is fitted
+    to the taps; the fit is linear in the tap values, so it is kept as a
+    float32 (vertices x taps) weight operator, cached per mesh and tap
+    layout next to the grid file, and each field is one matrix-vector
+    product. Pressure no
+    longer leaks between surfaces that are close in space but far apart
+    along the surface (e.g. the top and bottom of a splitter).
+
+    options: rings (mesh_graph, default 3), epsilon (default as for scipy
+    Rbf) and smooth.
+    """
+
+    name    = "geodesic"
+
+    def __init__(self, axes=(0, 1), **options):
+        super().__init__(axes=axes, **options)
+        self.grid               = None
+        self.triangles          = None
+        self.cache_directory    = None
+        self.grid_hash          = None
+        self._graph             = None
+        self._tree              = None
+        self.distances          = {}
+        self.operators          = {}
+
+
+    def set_mesh(self, grid, triangles, cache_directory=None, grid_hash=None):
+        self.grid               = numpy.asarray(grid, dtype=numpy.float64)
+        self.triangles          = triangles
+        self.cache_directory    = cache_directory
+        self.grid_hash          = grid_hash or utils.hash_arrays(self.grid, triangles)
+        self._graph             = None
+        self._tree              = None
+        self.distances          = {}
+        self.operators          = {}
+
+
+    @property
+    def key(self):
+        """Identity of the backend, its settings and the operator precision"""
+        return json.dumps([self.name, self.options, constants.GEODESIC_OPERATOR_PRECISION], sort_keys=True)
+
+
+    @property
+    def graph(self):
+        """The mesh_graph of the mesh (built on first use)"""
+
+        if self._graph is None:
+            self._graph = mesh_graph(self.grid, self.triangles, self.options.get("rings", 3))
+        return self._graph
+
+
+    @property
+    def tree(self):
+        """The cKDTree of the mesh vertices (built on first use)"""
+
+        from scipy.spatial import cKDTree
+
+        if self._tree is None:
+            self._tree  = cKDTree(self.grid)
+        return self._tree
+
+
+    def shared_arrays(self):
+        return {"geodesic_{}".format(key): operator for key, operator in self.operators.items()}
+
+
+    def attach_arrays(self, arrays):
+        for name, array in arrays.items():
+            if name.startswith("geodesic_"):
+                self.operators  = {name[len("geodesic_"):]: array}
+
+
+    def source_distances(self, sources):
+        """Return the (sources x vertices) geodesic distances (rows are kept)
+
+        Vertices on a part of the mesh not connected to a source are placed
+        beyond the farthest connected vertex (plus the straight-line distance).
+        """
+
+        from scipy.sparse.csgraph import dijkstra
+
+        missing = sorted(set(sources) - set(self.distances))
+        if missing:
+            rows    = dijkstra(self.graph, directed=False, indices=missing)
+            for vertex, row in zip(missing, numpy.atleast_2d(rows)):
+                self.distances[vertex]  = row
+
+        distances   = numpy.vstack([self.distances[vertex] for vertex in sources])
+        unreachable = ~numpy.isfinite(distances)
+        if unreachable.any():
+            (rows, columns)         = numpy.nonzero(unreachable)
+            farthest                = distances[numpy.isfinite(distances)].max()
+            straight                = numpy.linalg.norm(self.grid[numpy.asarray(sources)[rows]] - self.grid[columns], axis=1)
+            distances[rows, columns]    = farthest + straight
+
+        return distances
+
+
+    def build_operator(self, points):
+        """Return the (vertices x taps) weight operator of the tap points
+
+        The operator is solved in double precision and stored in
+        constants.GEODESIC_OPERATOR_PRECISION, a chunk at a time.
+        """
+
+        sources         = list(self.tree.query(points)[1])
+        distances       = self.source_distances(sources)
+        (taps, vertices)    = embed_distances(distances[:, sources], distances)
+
+        epsilon         = self.options.get("epsilon")
+        if not epsilon:
+            extent      = taps.max(axis=0) - taps.min(axis=0)
+            extent      = extent[extent > 0]
+            epsilon     = numpy.power(numpy.prod(extent)/len(taps), 1.0/len(extent))
+
+        def kernel(a, b):
+            r   = numpy.sqrt(((a[:, None, :] - b[None, :, :])**2).sum(axis=2))
+            return numpy.sqrt((r/epsilon)**2 + 1.0)
+
+        system          = kernel(taps, taps) - self.options.get("smooth", 0.0)*numpy.eye(len(taps))
+        # Taps snapped to the same vertex coincide (the pseudo-inverse averages them)
+        inverse         = numpy.linalg.pinv(system, 1e-12)
+        operator        = numpy.empty((len(vertices), len(taps)), dtype=constants.GEODESIC_OPERATOR_PRECISION)
+        size            = constants.INTERPOLATION_CHUNK_SIZE
+        for start in range(0, len(vertices), size):
+            operator[start:start + size]    = kernel(vertices[start:start + size], taps).dot(inverse)
+
+        return operator
+
+
+    def operator(self, points):
+        """Return the weight operator of the tap points (cached in memory and on disk)
+
+        Only the operator of the last tap layout is kept in memory.
+        """
+
+        key = utils.hash_arrays(self.grid_hash, self.key, points)
+        if key in self.operators:
+            return self.operators[key]
+
+        path    = None
+        if self.cache_directory:
+            path    = os.path.join(self.cache_directory, "geodesic_{}.npy".format(key[:16]))
+
+        if path and os.path.exists(path):
+            operator    = numpy.load(path)
+        else:
+            operator    = self.build_operator(points)
+            if path:
+                try:
+                    if not os.path.exists(self.cache_directory):
+                        os.makedirs(self.cache_directory)
+                    temporary   = utils.temporary_path(path)
+                    numpy.save(temporary, operator)
+                    os.replace(temporary, path)
+                except OSError:
+                    pass
+
+        self.operators      = {key: operator}
+        return operator
+
+
+    def fit(self, points, values):
+        if self.grid is None:
+            raise ValueError("The geodesic interpolation needs the grid mesh (set_mesh)")
+
+        self.weights    = self.operator(points)
+        self.values     = values
+
+
+    def evaluate(self, grid, dtype=numpy.float64):
+        """Return the values at the mesh vertices (nearest vertex for other points)"""
+
+        values  = self.weights.dot(numpy.asarray(self.values, dtype=self.weights.dtype))
+        if len(grid) != len(self.grid) or not numpy.array_equal(grid, self.grid):
+            values  = values[self.tree.query(numpy.asarray(grid, dtype=numpy.float64))[1]]
+
+        return values.astype(dtype)
+
+
+
+INTERPOLATORS   = {
+    RbfInterpolator.name: RbfInterpolator,
+    ThinPlateInterpolator.name: ThinPlateInterpolator,
+    NearestInterpolator.name: NearestInterpolator,
+    LinearInterpolator.name: LinearInterpolator,
+    GeodesicInterpolator.name: GeodesicInterpolator,
+}
+
+
+def make_interpolator(name, axes=(0, 1), **options):
+    """Return the interpolation backend of a name (see INTERPOLATORS)"""
+
+    if name not in INTERPOLATORS:
+        raise ValueError("Unknown interpolation '{}', expected one of {}".format(name, ", ".join(INTERPOLATORS)))
+
+    return INTERPOLATORS[name](axes=axes, **options)
@@ -0,0 +1,64 @@
+import numpy
+import pandas
+
+
+LOAD_COLUMNS    = ["Fx", "Fy", "Fz", "Mx", "My", "Mz", "Cp_mean"]
+
+
+def triangle_area_vectors(points, triangles):
+    """Return the area vectors (area x unit normal) and centroids of the triangles"""
+
+    p0, p1, p2  = (points[triangles[:, j]].astype(numpy.float64) for j in range(3))
+    areas       = 0.5*numpy.cross(p1 - p0, p2 - p0)
+    centroids   = (p0 + p1 + p2)/3.0
+    return areas, centroids
+
+
+def vertex_operator(triangles, contributions, n_vertices):
+    """Distribute per-triangle contributions equally to their three vertices"""
+
+    indices     = triangles.ravel()
+    operator    = numpy.empty((n_vertices, contributions.shape[1]))
+    for j in range(contributions.shape[1]):
+        weights         = numpy.repeat(contributions[:, j]/3.0, 3)
+        operator[:, j]  = numpy.bincount(indices, weights=weights, minlength=n_vertices)
+
+    return operator
+
+
+def load_operator(points, triangles, origin=(0.0, 0.0, 0.0)):
+    """Build the (vertices x loads) operator of the surface integrals
+
+    A field of vertex pressure coefficients times the operator gives the
+    force (-sum Cp dA) and moment (about the origin) coefficients integrated
+    over the surface, in grid length units squared (cubed for moments), and
+    the area-weighted mean Cp. Triangle values are the mean of their
+    vertices and the triangle winding is taken as the outward normal.
+    """
+
+    areas, centroids    = triangle_area_vectors(points, triangles)
+    lever               = centroids - numpy.asarray(origin, dtype=numpy.float64)
+    magnitude           = numpy.linalg.norm(areas, axis=1)
+    contributions       = numpy.column_stack((
+                            -areas,
+                            -numpy.cross(lever, areas),
+                            magnitude/magnitude.sum()))
+
+    return vertex_operator(triangles, contributions, len(points))
+
+
+def integrate(fields, operator, chunk_size=1024, rows=None):
+    """Integrate every field (row), or the given rows, with the load operator
+
+    The fields (e.g. the memory-mapped session store) are processed in
+    chunks of rows, each as one matrix product.
+    """
+
+    rows    = numpy.arange(fields.shape[0]) if rows is None else numpy.asarray(rows)
+    n       = len(rows)
+    loads   = numpy.empty((n, operator.shape[1]))
+    for start in range(0, n, chunk_size):
+        block                           = numpy.asarray(fields[rows[start:start + chunk_size]], dtype=numpy.float64)
+        loads[start:start + chunk_size] = block.dot(operator)
+
+    return pandas.DataFrame(loads, columns=LOAD_COLUMNS[:operator.shape[1]])
@@ -0,0 +1,119 @@
+import os
+import json
+import numpy
+
+import utils
+import constants
+
+
+def boundary_vertices(triangles, count):
+    """Return a mask of the vertices on a boundary edge (used by one triangle)"""
+
+    mask                                            = numpy.zeros(count, dtype=bool)
+    mask[utils.boundary_edges(triangles).ravel()]   = True
+    return mask
+
+
+def cluster_vertices(points, cell_size):
+    """Return the cluster of each vertex (cubic cells of the given size)"""
+
+    cells           = numpy.floor((points - points.min(axis=0))/cell_size).astype(numpy.int64)
+    _, clusters     = numpy.unique(cells, axis=0, return_inverse=True)
+    return clusters.ravel()
+
+
+def decimate(points, triangles, cell_size):
+    """Decimate a mesh by vertex clustering
+
+    The vertices in each cubic cell of the given size are merged into one
+    (the mean of its boundary vertices if it has any, so the outline stays
+    on the border, otherwise of all of them); triangles that collapse are
+    dropped. Returns the points and triangles of the coarse mesh.
+    """
+
+    points      = numpy.asarray(points, dtype=numpy.float64)
+    clusters    = cluster_vertices(points, cell_size)
+    count       = clusters.max() + 1
+
+    boundary    = boundary_vertices(triangles, len(points))
+    weights     = (boundary | (numpy.bincount(clusters, boundary, count) == 0)[clusters]).astype(numpy.float64)
+    coarse      = numpy.column_stack([numpy.bincount(clusters, weights*points[:, i], count) for i in range(3)])
+    coarse      /= numpy.bincount(clusters, weights, count)[:, None]
+
+    merged      = clusters[triangles]
+    keep        = (merged[:, 0] != merged[:, 1]) & (merged[:, 1] != merged[:, 2]) & (merged[:, 2] != merged[:, 0])
+    merged      = merged[keep]
+    _, first    = numpy.unique(numpy.sort(merged, axis=1), axis=0, return_index=True)
+    merged      = merged[numpy.sort(first)]
+
+    # Clusters left without a triangle are dropped
+    used                = numpy.unique(merged)
+    renumber            = numpy.full(count, -1, dtype=numpy.int64)
+    renumber[used]      = numpy.arange(len(used))
+    return coarse[used], renumber[merged]
+
+
+def cell_size_for_vertices(points, vertices, iterations=20):
+    """Return the cell size decimating a mesh to about the given vertex count"""
+
+    points  = numpy.asarray(points, dtype=numpy.float64)
+    low     = 0.0
+    high    = (points.max(axis=0) - points.min(axis=0)).max()
+    for _ in range(iterations):
+        size    = 0.5*(low + high)
+        if cluster_vertices(points, size).max() + 1 > vertices:
+            low     = size
+        else:
+            high    = size
+
+    return high
+
+
+def pixel_size(points, axes, margin=0.5, viewport=constants.LOD_VIEWPORT):
+    """Return the size of a screen pixel in grid units for a rendered plot"""
+
+    points  = numpy.asarray(points, dtype=numpy.float64)
+    extent  = points[:, axes].max(axis=0) - points[:, axes].min(axis=0) + 2*margin
+    return max(extent[0]/viewport[0], extent[1]/viewport[1])
+
+
+def level_cell_size(points, axes, level):
+    """Return the cell size of a level ({"vertices": n} or {"error": pixels})"""
+
+    if "vertices" in level:
+        return cell_size_for_vertices(points, level["vertices"])
+
+    return level["error"]*pixel_size(points, axes)
+
+
+def resolve_level(level):
+    """Return the level spec of a level name (see constants.LOD_LEVELS) or spec"""
+
+    if isinstance(level, str):
+        if level not in constants.LOD_LEVELS:
+            raise ValueError("Unknown level of detail '{}', expected one of {}".format(level, ", ".join(constants.LOD_LEVELS)))
+        level   = constants.LOD_LEVELS[level]
+
+    return level or None
+
+
+def cached_level(grid_path, grid_hash, points, triangles, axes, level):
+    """Return the points and triangles of a mesh level, cached next to the grid file"""
+
+    key     = utils.hash_arrays(grid_hash, json.dumps(level, sort_keys=True))
+    path    = os.path.join(grid_path + constants.MESH_CACHE_SUFFIX, "lod_{}.npz".format(key[:16]))
+    if os.path.exists(path):
+        with numpy.load(path) as data:
+            return data["points"], data["triangles"]
+
+    coarse, coarse_triangles    = decimate(points, triangles, level_cell_size(points, axes, level))
+    try:
+        if not os.path.exists(os.path.dirname(path)):
+            os.makedirs(os.path.dirname(path))
+        temporary   = utils.temporary_path(path)
+        numpy.savez(temporary, points=coarse, triangles=coarse_triangles)
+        os.replace(temporary, path)
+    except OSError:
+        pass
+
+    return coarse, coarse_triangles
@@ -0,0 +1,801 @@
+import os
+import json
+import numpy
+import pandas
+
+import loads
+import export
+import report
+import sweep
+import composite
+import utils
+import zones
+import constants
+import repeatability
+from store import FieldStore, RenderManifest
+from shared import SharedArrays
+from contour import ContourConfig, ContourPlot
+
+
+# Opened contour plots by inputs (see open_contour), None to open every
+# plot anew. Long-running processes (daemon.RenderEngine) set it to a dict
+# so the grids, zones and interpolation operators stay warm between jobs.
+CONTOUR_CACHE   = None
+
+# Process pool writing the report thumbnails (see write_report), None to
+# start one per report. Long-running processes set it to keep one pool.
+THUMBNAIL_EXECUTOR  = None
+
+
+def contour_key(inputs):
+    """Return the cache key of the contour plot of the inputs
+
+    The grid and zones files are identified by path, modification time and
+    size, so edited files are read again.
+    """
+
+    return json.dumps([
+        utils.file_stamp(inputs.get("grid_path")),
+        utils.file_stamp(inputs.get("zones_path")),
+        inputs.get("precision") or constants.DEFAULT_PRECISION,
+        inputs.get("interpolation") or constants.DEFAULT_INTERPOLATION,
+        inputs.get("interpolation_options") or {},
+        inputs.get("lod") or constants.DEFAULT_LOD], sort_keys=True, default=str)
+
+
+def open_contour(inputs, shared=None):
+    """Return the contour plot of the input grid, zones, precision, interpolation and level of detail
+
+    shared are the contour arrays attached from shared memory (attach_contour).
+    Plots are reused from CONTOUR_CACHE when it is set (the least recently
+    used dropped beyond constants.CONTOUR_CACHE_SIZE plots).
+    """
+
+    if shared is not None or CONTOUR_CACHE is None:
+        return read_contour(inputs, shared)
+
+    key     = contour_key(inputs)
+    contour = CONTOUR_CACHE.pop(key, None)
+    if contour is None:
+        contour = read_contour(inputs)
+
+    CONTOUR_CACHE[key]  = contour
+    while len(CONTOUR_CACHE) > constants.CONTOUR_CACHE_SIZE:
+        CONTOUR_CACHE.pop(next(iter(CONTOUR_CACHE)))
+
+    return contour
+
+
+def read_contour(inputs, shared=None):
+    """Open the contour plot of the inputs (see open_contour)"""
+
+    return ContourPlot(
+        grid_path=inputs.get("grid_path"),
+        title="",
+        zones=zones.read_zones(inputs.get("zones_path")),
+        precision=inputs.get("precision") or constants.DEFAULT_PRECISION,
+        interpolation=inputs.get("interpolation") or constants.DEFAULT_INTERPOLATION,
+        interpolation_options=inputs.get("interpolation_options") or {},
+        lod=inputs.get("lod") or constants.DEFAULT_LOD,
+        shared=shared)
+
+
+def open_field_store(contour, save_directory):
+    """Open the session field store of a grid and interpolation backend in the save directory (read in the plot precision)"""
+
+    name    = "{}_{}".format(contour.grid_hash[:16], utils.hash_arrays(contour.interpolator.key)[:8])
+    path    = os.path.join(save_directory, constants.FIELD_STORE_DIRECTORY, name)
+    return FieldStore(path, contour.grid.shape[0], precision=contour.dtype)
+
+
+def field_key(contour, points, values):
+    """Hash of the interpolation inputs (grid, backend, tap coordinates and values)"""
+
+    return utils.hash_arrays(
+        contour.grid_hash,
+        contour.interpolator.key,
+        numpy.asarray(points, dtype=numpy.float64),
+        numpy.asarray(values, dtype=numpy.float64))
+
+
+def store_field(store, key, kind, item, interpolate):
+    """Return the stored grid values of a field key (computed if missing)"""
+
+    row = store.find(key)
+    if row is None:
+        row = store.append(
+                interpolate(),
+                key,
+                kind=kind,
+                run_point=item["run_point"],
+                yaw=item["YAW"],
+                speed=item["RRS_SPEED"],
+                ride_height=item["Ride-Height-Number"])
+
+    return store.get(row)
+
+
+def interpolate_field(contour, store, config, kind, item):
+    """Return the grid values of the config tap data, reusing stored fields"""
+    return store_field(store, config.key, kind, item, lambda: contour.interpolate(config.points, config.tap_values))
+
+
+def target_data_paths(inputs):
+    """Return the list of target D1 paths of the inputs"""
+
+    paths   = inputs.get("target_data_paths") or [inputs.get("target_data_path")]
+    return [path for path in paths if path]
+
+
+def resolve_channels(channel_map, data):
+    """Return the D1 column names matching the channel map channels"""
+    return [data.columns[data.columns.str.startswith(channel)][0] for channel in channel_map.channel]
+
+
+def tap_points(channel_map):
+    """Return the (taps x 3) tap coordinates as a read-only array"""
+
+    points                  = channel_map[constants.XYZ].values.astype(numpy.float64)
+    points.flags.writeable  = False
+    return points
+
+
+def reference_points(reference_data):
+    """Group the reference points by test condition
+
+    Returns {(ride height, yaw, speed): (point, indices)} where repeated
+    points are merged into their mean.
+    """
+
+    points  = {}
+    for condition, group in reference_data.groupby(constants.D1_CONDITIONS, sort=False):
+        if group.shape[0] > 1:
+            point               = group.mean(numeric_only=True)
+            point["run_point"]  = group.run_point.iloc[0]
+        else:
+            point   = group.iloc[0]
+
+        points[tuple(condition)]    = (point, list(group.index.values))
+
+    return points
+
+
+def matched_points(target_data, references):
+    """Yield the (row, item, reference item) of every plotted target point
+
+    Points below 20 mph or without a reference point at the same condition
+    are skipped; repeated reference points are merged into their mean.
+    """
+
+    skip_index  = []
+    for j, (index, item) in enumerate(target_data.iterrows()):
+        if index in skip_index or item.RRS_SPEED < 20.0:
+            continue
+
+        # Extract the matching reference point (merged if > 1 found)
+        condition   = tuple(item[constants.D1_CONDITIONS].values)
+        if condition not in references:
+            continue
+
+        item_ref, indices   = references[condition]
+        if len(indices) > 1:
+            skip_index  += indices
+
+        yield j, item, item_ref
+
+
+def plot(inputs, progress=None):
+    """Plot every target point against the matching reference point
+
+    The inputs are the dictionary collected by the PressurePlotterForm, with
+    one or more target D1 files compared against a single reference. The
+    grid, reference data and reference fields are shared by every target.
+    The fields of the points not yet rendered are interpolated (or reused)
+    first, then rendered (see render_points). progress is an optional
+    callback taking the percentage complete. Inputs with several grid parts
+    are plotted by plot_parts.
+
+    Work queue jobs (workqueue.py) plot a subset of the points: only the
+    target run points in inputs["run_points"] (if given) are plotted, and
+    with inputs["shard_directory"] the fields and render manifest are kept
+    there (merged into the save directory later) and no loads or report
+    are written.
+    """
+
+    if inputs.get("parts"):
+        return plot_parts(inputs, progress)
+
+    # Read any data
+    working_directory   = inputs.get("save_directory")
+    channel_map         = utils.read_channel_map(inputs.get("channel_map_path"))
+    targets             = [utils.read_d1(path, channels=channel_map.channel) for path in target_data_paths(inputs)]
+    reference_data      = utils.read_d1(inputs.get("reference_data_path"), channels=channel_map.channel)
+    references          = reference_points(reference_data)
+    state_directory     = inputs.get("shard_directory") or working_directory
+    run_points          = inputs.get("run_points")
+    contour             = open_contour(inputs)
+    store               = open_field_store(contour, state_directory)
+    manifest            = RenderManifest(state_directory)
+    points              = tap_points(channel_map)
+    total               = sum(len(target_data) for target_data in targets)
+
+    # Loop through each target session and data point, skipping images
+    # rendered from the same inputs
+    i       = 0
+    pending = []
+    keys    = []
+    for target_data in targets:
+        channels    = resolve_channels(channel_map, target_data)
+        pressures   = target_data[channels].values
+        for j, item, item_ref in matched_points(target_data, references):
+            if run_points is not None and item["run_point"] not in run_points:
+                continue
+
+            configs = point_configs(contour, inputs, points, pressures[j], item_ref[channels].values, item, item_ref)
+            path    = point_path(inputs, item, item_ref)
+            key     = contour.render_key(configs)
+            keys    += [config.key for config in configs]
+            if not manifest.is_current(path, key):
+                store_point_fields(contour, store, configs, item, item_ref)
+                pending.append((path, key, [configs], point_attributes(item, item_ref)))
+
+            percentage  = 50.0*(i + 1)/total
+            if progress:
+                progress(percentage)
+            i           += 1
+
+    store.set_current(keys)
+    store.flush()
+    render_points(inputs, [inputs], [contour], [store], contour, manifest, pending, progress)
+    if not inputs.get("shard_directory"):
+        write_loads(contour, store, working_directory, inputs.get("moment_origin", [0.0, 0.0, 0.0]))
+        write_report(inputs)
+    return store
+
+
+def share_contour(contour, inputs, interpolation=True):
+    """Publish the mesh (and interpolation) arrays of a contour plot in shared memory
+
+    Returns the SharedArrays (closed once the workers are done) and the
+    small descriptor the workers open the plot from (attach_contour).
+    Workers that only render need no interpolation arrays.
+    """
+
+    shared  = SharedArrays.publish(contour.shared_arrays(interpolation))
+    return shared, {"inputs": inputs, "arrays": shared.descriptor, "grid_hash": contour.grid_hash}
+
+
+def attach_contour(descriptor):
+    """Open a contour plot from the shared memory of share_contour (no grid read)
+
+    Returns the plot and the SharedArrays, which must be kept open with it.
+    """
+
+    shared  = SharedArrays.attach(descriptor["arrays"])
+    arrays  = dict(shared.arrays, grid_hash=descriptor["grid_hash"])
+    return open_contour(descriptor["inputs"], shared=arrays), shared
+
+
+def render_fields(figure, contours, stores, path, configs):
+    """Render the stored fields of the point configs (a list per contour plot)
+
+    figure is the plot rendered: the contour plot itself, or the composite
+    plot of the contour plots.
+    """
+
+    for contour, store, part_configs in zip(contours, stores, configs):
+        for config in part_configs:
+            config.values   = store.get(store.find(config.key))
+        contour.set_configs(part_configs)
+
+    # Workers (and nodes) render into the same directories concurrently
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    figure.save(path)
+    return path
+
+
+# State of a render worker process (see start_render_worker)
+_worker = {}
+
+
+def start_render_worker(descriptors, names):
+    """Attach a render worker process to the shared contour plots
+
+    Run once per worker (the ProcessPoolExecutor initializer), so the tasks
+    only carry the image path and the configs.
+    """
+
+    contours    = []
+    stores      = []
+    attached    = []
+    for descriptor in descriptors:
+        contour, shared = attach_contour(descriptor)
+        contours.append(contour)
+        inputs  = descriptor["inputs"]
+        stores.append(open_field_store(contour, inputs.get("shard_directory") or inputs.get("save_directory")))
+        attached.append(shared)
+
+    _worker["shared"]   = attached
+    _worker["contours"] = contours
+    _worker["stores"]   = stores
+    _worker["figure"]   = composite.CompositePlot(zip(names, contours)) if names else contours[0]
+
+
+def render_task(path, configs):
+    """Render one image in a render worker process"""
+    return render_fields(_worker["figure"], _worker["contours"], _worker["stores"], path, configs)
+
+
+def render_points(inputs, parts, contours, stores, figure, manifest, pending, progress=None, names=None):
+    """Render the pending (path, key, configs, attributes) images from the stored fields
+
+    With more than one process (inputs["processes"], default one per CPU)
+    the images are rendered by worker processes. The grid, triangles,
+    border and interpolation arrays are published once in shared memory
+    and attached by each worker, and the fields are read from the field
+    store files, so the start-up and per-image cost of a worker does not
+    grow with the mesh. progress covers 50 to 100%.
+    """
+
+    processes   = min(len(pending), inputs.get("processes") or os.cpu_count() or 1)
+    if processes <= 1:
+        results = (render_fields(figure, contours, stores, path, configs) for path, key, configs, attributes in pending)
+    else:
+        from concurrent.futures import ProcessPoolExecutor
+
+        published   = [share_contour(contour, part, interpolation=False) for part, contour in zip(parts, contours)]
+        executor    = ProcessPoolExecutor(
+                        max_workers=processes,
+                        initializer=start_render_worker,
+                        initargs=([descriptor for shared, descriptor in published], names))
+        results     = executor.map(render_task, *zip(*[(path, configs) for path, key, configs, attributes in pending]))
+
+    try:
+        for i, ((path, key, configs, attributes), result) in enumerate(zip(pending, results)):
+            manifest.update(path, key, **attributes)
+            manifest.flush()
+            if progress:
+                progress(50.0 + 50.0*(i + 1)/len(pending))
+    finally:
+        if processes > 1:
+            executor.shutdown()
+            for shared, descriptor in published:
+                shared.close()
+
+
+def part_inputs(inputs):
+    """Return the inputs of each grid part
+
+    inputs["parts"] lists the parts as dictionaries with a grid_path, a
+    channel_map_path and optionally a name (default the grid file name) and
+    a zones_path; the other inputs are shared by every part.
+    """
+
+    parts   = []
+    for part in inputs.get("parts") or []:
+        merged  = dict(inputs, zones_path=None)
+        merged.pop("parts")
+        merged.update(part)
+        merged.setdefault("name", os.path.splitext(os.path.basename(merged["grid_path"]))[0])
+        parts.append(merged)
+
+    return parts
+
+
+def part_fields(descriptor, points):
+    """Interpolate (or reuse) the stored fields of one grid part at every point
+
+    descriptor is the shared contour plot of the part (share_contour) and
+    points are the (target taps, reference taps, item, reference item) of
+    the part channels. Run in a worker process per part by plot_parts.
+    """
+
+    part            = descriptor["inputs"]
+    contour, shared = attach_contour(descriptor)
+    store           = open_field_store(contour, part.get("save_directory"))
+    taps            = tap_points(utils.read_channel_map(part.get("channel_map_path")))
+    for target_taps, reference_taps, item, item_ref in points:
+        configs = point_configs(contour, part, taps, target_taps, reference_taps, item, item_ref)
+        store_point_fields(contour, store, configs, item, item_ref)
+
+    # Drop the views of the shared arrays before detaching
+    contour = None
+    shared.close()
+    return len(points)
+
+
+def plot_parts(inputs, progress=None):
+    """Plot every target point against its reference point over several grid parts
+
+    Each part (see part_inputs) has its own grid, channel map, field store
+    and cached interpolation data. The parts are published in shared memory
+    once; the fields of the points not yet rendered are interpolated part
+    by part in parallel worker processes, then every point is rendered as
+    one composite figure (composite.CompositePlot, see render_points).
+    """
+
+    from concurrent.futures import ProcessPoolExecutor
+
+    # Read any data
+    working_directory   = inputs.get("save_directory")
+    parts               = part_inputs(inputs)
+    names               = [part["name"] for part in parts]
+    channel_maps        = [utils.read_channel_map(part.get("channel_map_path")) for part in parts]
+    all_channels        = pandas.concat([channel_map.channel for channel_map in channel_maps], ignore_index=True)
+    targets             = [utils.read_d1(path, channels=all_channels) for path in target_data_paths(inputs)]
+    reference_data      = utils.read_d1(inputs.get("reference_data_path"), channels=all_channels)
+    references          = reference_points(reference_data)
+    contours            = [open_contour(part) for part in parts]
+    points              = [tap_points(channel_map) for channel_map in channel_maps]
+    manifest            = RenderManifest(working_directory)
+    composite_plot      = composite.CompositePlot(zip(names, contours))
+
+    # Collect the points whose composite image is not current
+    pending = []
+    taps    = []
+    keys    = [[] for part in parts]
+    for target_data in targets:
+        channels    = [resolve_channels(channel_map, target_data) for channel_map in channel_maps]
+        pressures   = [target_data[part_channels].values for part_channels in channels]
+        for j, item, item_ref in matched_points(target_data, references):
+            point_taps  = [(part_pressures[j], item_ref[part_channels].values) for part_pressures, part_channels in zip(pressures, channels)]
+            configs     = [
+                point_configs(contour, part, part_points, target_taps, reference_taps, item, item_ref)
+                for part, contour, part_points, (target_taps, reference_taps) in zip(parts, contours, points, point_taps)]
+            path        = point_path(inputs, item, item_ref)
+            key         = composite_plot.render_key(configs)
+            for part_keys, part_configs in zip(keys, configs):
+                part_keys   += [config.key for config in part_configs]
+            if not manifest.is_current(path, key):
+                pending.append((path, key, configs, point_attributes(item, item_ref)))
+                taps.append((point_taps, item, item_ref))
+
+    # Interpolate the fields of every part in parallel
+    if pending:
+        published   = [share_contour(contour, part) for part, contour in zip(parts, contours)]
+        try:
+            with ProcessPoolExecutor(max_workers=inputs.get("processes")) as executor:
+                jobs    = [
+                    [(point_taps[k][0], point_taps[k][1], item, item_ref) for point_taps, item, item_ref in taps]
+                    for k in range(len(parts))]
+                list(executor.map(part_fields, [descriptor for shared, descriptor in published], jobs))
+        finally:
+            for shared, descriptor in published:
+                shared.close()
+
+        if progress:
+            progress(50.0)
+
+    # Composite the parts of each point
+    stores  = [open_field_store(contour, working_directory) for contour in contours]
+    for store, part_keys in zip(stores, keys):
+        store.set_current(part_keys)
+        store.flush()
+    render_points(inputs, parts, contours, stores, composite_plot, manifest, pending, progress, names)
+
+    for part, contour, store in zip(parts, contours, stores):
+        write_loads(contour, store, working_directory, inputs.get("moment_origin", [0.0, 0.0, 0.0]), "loads_{}.csv".format(part["name"]))
+    write_report(inputs)
+    return stores
+
+
+def export_fields(inputs):
+    """Export the stored fields of a save directory for ParaView
+
+    Writes fields.vtp with the grid geometry once and one Float32 point data
+    array per current field (see FieldStore.set_current), named by kind and
+    run point.
+    """
+
+    working_directory   = inputs.get("save_directory")
+    contour             = open_contour(inputs)
+    store               = open_field_store(contour, working_directory)
+    rows                = store.current_rows()
+    path                = os.path.join(working_directory, "fields.vtp")
+    export.write_vtp(
+        path,
+        contour.grid,
+        contour.triangulation.triangles,
+        [("{} {}".format(store.records[row]["kind"], store.records[row]["run_point"]), store.get(row)) for row in rows])
+    return path
+
+
+def animate_sweeps(inputs, kind="target", vary="yaw", extension=".gif", duration=0.2):
+    """Animate the stored fields of a kind swept over one condition
+
+    Every sweep (e.g. all yaws at one ride height and speed) is rendered
+    from the session field store with a cached figure skeleton and written
+    to Sweeps/ in the save directory (.gif/.png via Pillow, .npy raw frames).
+    """
+
+    working_directory   = inputs.get("save_directory")
+    save_directory      = os.path.join(working_directory, "Sweeps")
+    contour             = open_contour(inputs)
+    store               = open_field_store(contour, working_directory)
+    delta               = kind == "delta"
+    bounds              = inputs.get("delta_bounds" if delta else "absolute_bounds")
+    colormap_path       = constants.DEFAULT_DELTA_COLORMAP_PATH if delta else constants.DEFAULT_ABSOLUTE_COLORMAP_PATH
+    label               = "d{}".format(inputs.get("variable")) if delta else inputs.get("variable")
+    levels              = numpy.linspace(bounds[0], bounds[1], 17 if delta else 33)
+    renderer            = sweep.SweepRenderer(contour, utils.read_colormap(colormap_path), levels, label)
+    index               = store.current_index
+    paths               = []
+
+    if not os.path.exists(save_directory):
+        os.makedirs(save_directory)
+
+    for fixed, rows in sweep.sweep_groups(index, kind=kind, vary=vary):
+        frames  = []
+        for row in rows:
+            record  = store.records[row]
+            title   = "{}: Run {}, RH-{}, Yaw {}, Speed {}".format(
+                        kind.capitalize(),
+                        record["run_point"],
+                        int(record["ride_height"]),
+                        record["yaw"],
+                        record["speed"])
+            frames.append(renderer.frame(store.get(row), title))
+
+        name    = "{}_{}_sweep_{}{}".format(
+                    kind,
+                    vary,
+                    "_".join("{}-{}".format(k, v) for k, v in sorted(fixed.items())),
+                    extension)
+        paths.append(sweep.write_frames(os.path.join(save_directory, name), frames, duration))
+
+    return paths
+
+
+def write_report(inputs):
+    """Write the HTML index (and optional PDF) of the rendered images
+
+    Thumbnails are downsampled from the rendered PNG files in parallel and
+    the images are listed in a table sortable by run, ride height, yaw and
+    speed. A multi-page PDF of the images is written if inputs["report_pdf"].
+    """
+
+    working_directory   = inputs.get("save_directory")
+    manifest            = RenderManifest(working_directory)
+    images              = manifest.images()
+    thumbnail_directory = os.path.join(working_directory, report.THUMBNAIL_DIRECTORY)
+    if not os.path.exists(thumbnail_directory):
+        os.makedirs(thumbnail_directory)
+
+    sources             = [path for path, attributes in images]
+    thumbnails          = [
+        os.path.join(thumbnail_directory, manifest.relative(path).replace("/", "__"))
+        for path in sources]
+    report.make_thumbnails(sources, thumbnails, executor=THUMBNAIL_EXECUTOR)
+
+    columns = ["Folder", "Target", "Reference", "Ride Height", "Yaw", "Speed"]
+    rows    = []
+    for (path, attributes), thumb in zip(images, thumbnails):
+        rows.append((path, thumb, [
+            os.path.basename(os.path.dirname(path)),
+            attributes.get("target", ""),
+            attributes.get("reference", ""),
+            attributes.get("ride_height", ""),
+            attributes.get("yaw", ""),
+            attributes.get("speed", ""),
+        ]))
+
+    report.write_html(os.path.join(working_directory, "index.html"), "Pressure Plots", columns, rows)
+    if inputs.get("report_pdf"):
+        report.write_pdf(os.path.join(working_directory, "report.pdf"), sources)
+
+
+def write_loads(contour, store, directory, origin=(0.0, 0.0, 0.0), filename="loads.csv"):
+    """Integrate the surface loads of the current stored fields and write them
+
+    The load operator is built once from the grid triangles and applied to
+    the whole (memory-mapped) field store as one chunked matrix product, as
+    are the zone masks for the zone mean Cp (delta Cp for delta fields).
+    The table (store index, loads and zone means) is written to filename.
+    """
+
+    rows        = store.current_rows()
+    operator    = loads.load_operator(contour.grid, contour.triangulation.triangles, origin)
+    table       = pandas.concat([store.current_index.reset_index(drop=True), loads.integrate(store.fields, operator, rows=rows)], axis=1)
+    if contour.zone_masks is not None:
+        means   = zones.zone_averages(store.fields, contour.zone_masks, rows=rows)
+        for j, zone in enumerate(contour.zones):
+            table["Cp_{}".format(zone.get("name", j))]  = means[:, j]
+
+    table.to_csv(os.path.join(directory, filename), index=False)
+    return table
+
+
+def point_configs(contour, inputs, points, target_taps, reference_taps, item, item_ref):
+    """Return the target, reference and delta configs of one point (no values yet)
+
+    points are the (taps x 3) tap coordinates shared by every point and the
+    taps are the target and reference tap pressures (psi) of the point.
+    """
+
+    # Calculate the values
+    target      = numpy.asarray(target_taps, dtype=numpy.float64)*144.0/item["DYNPR"]
+    reference   = numpy.asarray(reference_taps, dtype=numpy.float64)*144.0/item_ref["DYNPR"]
+    delta       = target - reference
+
+    # Setup the contour configs
+    target_config   = ContourConfig(
+        points=points,
+        tap_values=target,
+        key=field_key(contour, points, target),
+        title="Target: Run {}".format(item["run_point"]),
+        colormap_path=constants.DEFAULT_ABSOLUTE_COLORMAP_PATH,
+        colorbar_bounds=inputs.get("absolute_bounds"),
+        colorbar_levels=33,
+        colorbar_label=inputs.get("variable"),
+    )
+
+    reference_config   = ContourConfig(
+        points=points,
+        tap_values=reference,
+        key=field_key(contour, points, reference),
+        title="Reference: {}".format(item_ref["run_point"]),
+        colormap_path=constants.DEFAULT_ABSOLUTE_COLORMAP_PATH,
+        colorbar_bounds=inputs.get("absolute_bounds"),
+        colorbar_levels=33,
+        colorbar_label=inputs.get("variable"),
+    )
+
+    delta_config    = ContourConfig(
+        points=points,
+        tap_values=delta,
+        key=field_key(contour, points, delta),
+        title="Target - Reference",
+        colormap_path=constants.DEFAULT_DELTA_COLORMAP_PATH,
+        colorbar_bounds=inputs.get("delta_bounds"),
+        colorbar_levels=17,
+        colorbar_label="d{}".format(inputs.get("variable")),
+    )
+
+    return [target_config, reference_config, delta_config]
+
+
+def store_point_fields(contour, store, configs, item, item_ref):
+    """Store the grid values of the point configs (interpolated if missing)
+
+    The interpolation is linear in the tap values, so the delta field is the
+    difference of the target and reference fields.
+    """
+
+    target_config, reference_config, delta_config   = configs
+    target      = interpolate_field(contour, store, target_config, "target", item)
+    reference   = interpolate_field(contour, store, reference_config, "reference", item_ref)
+    store_field(store, delta_config.key, "delta", item, lambda: target - reference)
+    store.flush()
+
+
+def point_path(inputs, item, item_ref):
+    """Return the image path of a target point vs its reference point"""
+
+    return os.path.join(
+        inputs.get("save_directory"),
+        "Run_{}_vs_{}".format(int(item["Run Number"]), int(item_ref["Run Number"])),
+        "RH-{}_Run_{}_vs_{}.png".format(int(item["Ride-Height-Number"]), item["run_point"], item_ref["run_point"]))
+
+
+def point_attributes(item, item_ref):
+    """Return the manifest attributes of a point image"""
+
+    return {
+        "target": item["run_point"],
+        "reference": item_ref["run_point"],
+        "ride_height": int(item["Ride-Height-Number"]),
+        "yaw": float(item["YAW"]),
+        "speed": float(item["RRS_SPEED"]),
+    }
+
+
+def plot_repeatability(inputs, progress=None):
+    """Plot the mean and standard deviation of repeated target points
+
+    The points of every target session are grouped by ride height, yaw and
+    speed. The per-tap and per-vertex statistics of each group are computed
+    in one vectorized pass, the per-tap table is written to a CSV file and
+    the mean and repeatability (standard deviation) maps of every repeated
+    condition are rendered side by side.
+    """
+
+    # Read the sessions and compute the point pressure coefficients
+    working_directory   = inputs.get("save_directory")
+    save_directory      = os.path.join(working_directory, "Repeatability")
+    channel_map         = utils.read_channel_map(inputs.get("channel_map_path"))
+    contour             = open_contour(inputs)
+    store               = open_field_store(contour, working_directory)
+    manifest            = RenderManifest(working_directory)
+    points              = []
+    coefficients        = []
+
+    for path in target_data_paths(inputs):
+        data        = utils.read_d1(path, channels=channel_map.channel)
+        data        = data[data.RRS_SPEED >= 20.0].reset_index(drop=True)
+        channels    = resolve_channels(channel_map, data)
+        points.append(data[constants.D1_CONDITIONS + ["run_point"]])
+        coefficients.append(repeatability.pressure_coefficients(data, channels))
+
+    points              = pandas.concat(points, ignore_index=True)
+    coefficients        = numpy.vstack(coefficients)
+    groups, conditions  = repeatability.group_points(points)
+
+    # Per-tap statistics
+    if not os.path.exists(save_directory):
+        os.makedirs(save_directory)
+
+    tap_mean, tap_std, count    = repeatability.group_statistics(coefficients, groups)
+    table                       = repeatability.tap_statistics(tap_mean, tap_std, count, conditions, channel_map.channel)
+    table.to_csv(os.path.join(save_directory, "repeatability.csv"), index=False)
+
+    # Per-vertex statistics of the (stored or interpolated) point fields
+    taps    = tap_points(channel_map)
+    rows    = []
+    for i, (index, item) in enumerate(points.iterrows()):
+        key = field_key(contour, taps, coefficients[i])
+        store_field(store, key, "target", item, lambda: contour.interpolate(taps, coefficients[i]))
+        rows.append(store.find(key))
+
+    store.flush()
+    mean, std, count    = repeatability.group_statistics(store.fields[rows], groups)
+
+    # Render the mean and repeatability maps of the repeated conditions
+    repeated    = numpy.flatnonzero(count > 1)
+    std_bounds  = [0, max(numpy.absolute(inputs.get("delta_bounds")))]
+    for i, group in enumerate(repeated):
+        condition   = conditions.iloc[group]
+        name        = "RH-{}_YAW_{}_SPEED_{}".format(
+                        int(condition["Ride-Height-Number"]),
+                        condition["YAW"],
+                        condition["RRS_SPEED"])
+
+        mean_config = ContourConfig(
+            points=taps,
+            tap_values=tap_mean[group],
+            values=mean[group],
+            key=utils.hash_arrays(mean[group]),
+            title="Mean: RH-{}, Yaw {}, Speed {} (n={})".format(
+                int(condition["Ride-Height-Number"]),
+                condition["YAW"],
+                condition["RRS_SPEED"],
+                count[group]),
+            colormap_path=constants.DEFAULT_ABSOLUTE_COLORMAP_PATH,
+            colorbar_bounds=inputs.get("absolute_bounds"),
+            colorbar_levels=33,
+            colorbar_label=inputs.get("variable"),
+        )
+
+        std_config  = ContourConfig(
+            points=taps,
+            tap_values=tap_std[group],
+            values=std[group],
+            key=utils.hash_arrays(std[group]),
+            title="Standard Deviation",
+            colormap_path=constants.DEFAULT_ABSOLUTE_COLORMAP_PATH,
+            colorbar_bounds=std_bounds,
+            colorbar_levels=17,
+            colorbar_label="std({})".format(inputs.get("variable")),
+        )
+
+        configs = [mean_config, std_config]
+        path    = os.path.join(save_directory, "{}.png".format(name))
+        key     = contour.render_key(configs)
+        if not manifest.is_current(path, key):
+            contour.set_configs(configs)
+            contour.save(path)
+            manifest.update(
+                path,
+                key,
+                target="mean (n={})".format(count[group]),
+                reference="",
+                ride_height=int(condition["Ride-Height-Number"]),
+                yaw=float(condition["YAW"]),
+                speed=float(condition["RRS_SPEED"]))
+            manifest.flush()
+
+        if progress:
+            progress(100.0*(i + 1)/len(repeated))
+
+    write_report(inputs)
+    return table
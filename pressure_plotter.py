@@ -1,6 +1,7 @@
 import os
 import time
 import getpass
+from PyQt5.QtCore import QTimer
 from PyQt5.QtGui import QIcon
 from PyQt5.QtWidgets import (
     QApplication, 
@@ -13,13 +14,16 @@ from PyQt5.QtWidgets import (
     QPushButton,
     QLabel,
     QLineEdit,
+    QComboBox,
     QMessageBox,
     QProgressBar,
 )
 
-import utils
+import assets
 import constants
-from contour import ContourConfig, ContourPlot
+
+# The plotting pipeline (pandas, VTK, SciPy, matplotlib) and the compiled Qt
+# resources are imported on first use so the window opens immediately
 
 
 # Meta data
@@ -29,6 +33,11 @@ __author__      = "Alex Curley"
 __company__     = "Stewart-Haas Racing"
 __released__    = "1/13/2020"
 
+# Separator of the target D1 files (each compared against the one reference)
+TARGET_PATH_SEPARATOR   = "; "
+
+# Inputs that may be left empty
+OPTIONAL_INPUTS         = ["zones_path"]
 
 class PressurePlotterWindow(QMainWindow):
     """Program to configure and execute the pressure plotter"""
@@ -38,8 +47,18 @@ class PressurePlotterWindow(QMainWindow):
         self.setWindowTitle("{} v{}".format(__title__, __version__))
         self.setup_ui()
         self.setMinimumWidth(600)
+        QTimer.singleShot(0, self.load_icon)
+
+
+    def load_icon(self):
+        """Load the window icon (packaged file, else the Qt resources)"""
 
-        icon    = QIcon(":static/logos/shr_logo.png")
+        path    = assets.asset_path("logos", "shr_logo.png")
+        if not os.path.exists(path):
+            import resources
+            path    = assets.resource_path("logos", "shr_logo.png")
+
+        icon    = QIcon(path)
         self.setWindowIcon(icon)
 
 
@@ -62,6 +81,7 @@ class PressurePlotterForm(QWidget):
         self._reference_data_path   = ""#"/home/acurley/projects/shr/pressure_plotter/examples/diffuser/data/200109_115242_Run0010/D1.asc"
         self._channel_map_path      = ""#"/home/acurley/projects/shr/pressure_plotter/examples/diffuser/diffuser_channel_map_3d.csv"
         self._grid_path             = ""#"/home/acurley/projects/shr/pressure_plotter/examples/diffuser/diffuser.stl"
+        self._zones_path            = ""
         self._target_label          = "Run XX"
         self._reference_label       = "Run YY"
         self._variable              = "Cp"
@@ -83,10 +103,18 @@ class PressurePlotterForm(QWidget):
         group_data      = QGroupBox("Data Files")
         group_settings  = QGroupBox("Plot Settings")
         plot_button     = QPushButton("Plot")
+        repeat_button   = QPushButton("Repeatability")
+        export_button   = QPushButton("Export to ParaView")
+        browse_button   = QPushButton("Browse Session")
+        campaign_button = QPushButton("Add to Campaign")
         self.progress   = QProgressBar()
         layout.addWidget(group_data)
         layout.addWidget(group_settings)
         layout.addWidget(plot_button)
+        layout.addWidget(repeat_button)
+        layout.addWidget(export_button)
+        layout.addWidget(browse_button)
+        layout.addWidget(campaign_button)
         layout.addWidget(self.progress)
         self.setLayout(layout)
 
@@ -102,6 +130,8 @@ class PressurePlotterForm(QWidget):
         self._channel_map_path_button       = QPushButton("Select")
         self._grid_path_edit                = QLineEdit()
         self._grid_path_button              = QPushButton("Select")
+        self._zones_path_edit               = QLineEdit()
+        self._zones_path_button             = QPushButton("Select")
 
         # Configure the plott settings group box form
         grid_settings               = QGridLayout(group_settings)
@@ -112,6 +142,9 @@ class PressurePlotterForm(QWidget):
         self._max_absolute_edit     = QLineEdit()
         self._min_delta_edit        = QLineEdit()
         self._max_delta_edit        = QLineEdit()
+        self._precision_edit        = QComboBox()
+        self._interpolation_edit    = QComboBox()
+        self._lod_edit              = QComboBox()
 
         # Set any widget settings
         self._save_directory_path_edit.setReadOnly(True)
@@ -119,6 +152,7 @@ class PressurePlotterForm(QWidget):
         self._reference_data_path_edit.setReadOnly(True)
         self._channel_map_path_edit.setReadOnly(True)
         self._grid_path_edit.setReadOnly(True)
+        self._zones_path_edit.setReadOnly(True)
         self._target_label_edit.setText(self._target_label)
         self._reference_label_edit.setText(self._reference_label)
         self._variable_edit.setText(self._variable)
@@ -126,11 +160,15 @@ class PressurePlotterForm(QWidget):
         self._max_absolute_edit.setText(str(self._max_absolute))
         self._min_delta_edit.setText(str(self._min_delta))
         self._max_delta_edit.setText(str(self._max_delta))
+        self._precision_edit.addItems(constants.PRECISIONS)
+        self._interpolation_edit.addItems(constants.INTERPOLATIONS)
+        self._lod_edit.addItems(list(constants.LOD_LEVELS.keys()))
 
         self._target_data_path_edit.setText(self._target_data_path)
         self._reference_data_path_edit.setText(self._reference_data_path)
         self._channel_map_path_edit.setText(self._channel_map_path)
         self._grid_path_edit.setText(self._grid_path)
+        self._zones_path_edit.setText(self._zones_path)
         self._target_label_edit.setText(self._target_label)
         self._reference_label_edit.setText(self._reference_label)
 
@@ -155,6 +193,10 @@ class PressurePlotterForm(QWidget):
         grid_data.addWidget(self._grid_path_edit, 4, 1)
         grid_data.addWidget(self._grid_path_button, 4, 2)
 
+        grid_data.addWidget(QLabel("Zones (Optional)"), 5, 0)
+        grid_data.addWidget(self._zones_path_edit, 5, 1)
+        grid_data.addWidget(self._zones_path_button, 5, 2)
+
         # Add widgets to the settings grid
         #grid_settings.addWidget(QLabel("Target Label"), 0, 0)
         #grid_settings.addWidget(self._target_label_edit, 0, 1)
@@ -168,14 +210,25 @@ class PressurePlotterForm(QWidget):
         grid_settings.addWidget(QLabel("Delta Scale Range"), 4, 0)
         grid_settings.addWidget(self._min_delta_edit, 4, 1)
         grid_settings.addWidget(self._max_delta_edit, 4, 2)
+        grid_settings.addWidget(QLabel("Precision"), 5, 0)
+        grid_settings.addWidget(self._precision_edit, 5, 1)
+        grid_settings.addWidget(QLabel("Interpolation"), 6, 0)
+        grid_settings.addWidget(self._interpolation_edit, 6, 1)
+        grid_settings.addWidget(QLabel("Mesh Detail"), 7, 0)
+        grid_settings.addWidget(self._lod_edit, 7, 1)
 
         # Connect signals and slots
         plot_button.clicked.connect(self.plot)
+        repeat_button.clicked.connect(self.plot_repeatability)
+        export_button.clicked.connect(self.export_fields)
+        browse_button.clicked.connect(self.browse_session)
+        campaign_button.clicked.connect(self.add_to_campaign)
         self._save_directory_button.clicked.connect(self.select_save_directory)
         self._target_data_path_button.clicked.connect(self.select_target_data_path)
         self._reference_data_path_button.clicked.connect(self.select_reference_data_path)
         self._channel_map_path_button.clicked.connect(self.select_channel_map_path)
         self._grid_path_button.clicked.connect(self.select_grid_path)
+        self._zones_path_button.clicked.connect(self.select_zones_path)
 
 
     def select_save_directory(self):
@@ -194,19 +247,19 @@ class PressurePlotterForm(QWidget):
 
 
     def select_target_data_path(self):
-        """Open a file dialog to select the target data path file"""
+        """Open a file dialog to select one or more target data path files"""
 
         options = QFileDialog.Options()
         options |= QFileDialog.DontUseNativeDialog
-        filename, _ = QFileDialog.getOpenFileName(self, 
-                        "Select Target D1 File", 
+        filenames, _ = QFileDialog.getOpenFileNames(self, 
+                        "Select Target D1 File(s)", 
                         "", 
                         "D1 (D1.asc)",
                         options=options)
 
-        if filename:
-            self._target_data_path  = filename
-            self._target_data_path_edit.setText(filename)
+        if filenames:
+            self._target_data_path  = TARGET_PATH_SEPARATOR.join(filenames)
+            self._target_data_path_edit.setText(self._target_data_path)
 
     
     def select_reference_data_path(self):
@@ -256,19 +309,40 @@ class PressurePlotterForm(QWidget):
             self._grid_path_edit.setText(filename)
 
 
+    def select_zones_path(self):
+        """Open a file dialog to select the surface zones file"""
+
+        options = QFileDialog.Options()
+        options |= QFileDialog.DontUseNativeDialog
+        filename, _ = QFileDialog.getOpenFileName(self, 
+                        "Select Zones File", 
+                        "", 
+                        "JSON (*.json)",
+                        options=options)
+
+        if filename:
+            self._zones_path  = filename
+            self._zones_path_edit.setText(filename)
+
+
     def extract_inputs(self):
         """Extract the user inputs and return the dictionary"""
         
         return {
-            "target_data_path": self._target_data_path_edit.text(),
+            "save_directory": self._save_directory_path_edit.text(),
+            "target_data_paths": [path.strip() for path in self._target_data_path_edit.text().split(TARGET_PATH_SEPARATOR.strip()) if path.strip()],
             "reference_data_path": self._reference_data_path_edit.text(),
             "channel_map_path": self._channel_map_path_edit.text(),
             "grid_path": self._grid_path_edit.text(),
+            "zones_path": self._zones_path_edit.text(),
             "target_label": self._target_label_edit.text(),
             "reference_label": self._reference_label_edit.text(),
             "variable": self._variable_edit.text(),
             "absolute_bounds": [float(self._min_absolute_edit.text()), float(self._max_absolute_edit.text())],
             "delta_bounds": [float(self._min_delta_edit.text()), float(self._max_delta_edit.text())],
+            "precision": self._precision_edit.currentText(),
+            "interpolation": self._interpolation_edit.currentText(),
+            "lod": self._lod_edit.currentText(),
         }
 
 
@@ -277,6 +351,8 @@ class PressurePlotterForm(QWidget):
         
         for key in inputs.keys():
             value   = inputs[key]
+            if key in OPTIONAL_INPUTS:
+                continue
             if not value:
                 return False
             elif isinstance(value, str) and value.strip() == "":
@@ -294,98 +370,29 @@ class PressurePlotterForm(QWidget):
             status  = QMessageBox.critical(self, "Error: Invalid Inputs", "Please fill out all fields", QMessageBox.Ok)
             return False
 
-        # Read any data
-        target_data     = utils.read_d1(inputs.get("target_data_path"))
-        reference_data  = utils.read_d1(inputs.get("reference_data_path"))
-        channel_map     = utils.read_channel_map(inputs.get("channel_map_path"))
-        contour         = ContourPlot(grid_path=inputs.get("grid_path"), title="")
-        skip_index      = []
-
-        # Process the channel map
-        for index, row in channel_map.iterrows():
-            value   = target_data.columns[target_data.columns.str.startswith(row.channel)]
-            channel_map.loc[index, "channel"]  = value[0]
-
-        # Loop through each data point
-        i   = 0
-        for index, item in target_data.iterrows():
-            if index in skip_index or item.RRS_SPEED < 20.0:
-                continue
+        # Execute the plotting pipeline (on the render daemon if running)
+        import daemon
+        daemon.run_job({"action": "plot", "inputs": inputs}, progress=lambda percentage: self.progress.setValue(int(percentage)))
 
-            # Extract the matching ride height (merge if > 1 found)
-            item_ref    = reference_data[
-                            (reference_data["Ride-Height-Number"]==item["Ride-Height-Number"]) & \
-                            (reference_data["YAW"]==item["YAW"]) & \
-                            (reference_data["RRS_SPEED"]==item["RRS_SPEED"])]
+        # Reset the progress bar
+        self.progress.setValue(100)
+        time.sleep(1)
+        self.progress.reset()
 
-            if item_ref.shape == 0:
-                continue
-            elif item_ref.shape[0] > 1:
-                run_point   = item_ref.run_point.iloc[0]
-                skip_index  += list(item_ref.index.values)
-                item_ref    = item_ref.mean()
-                item_ref["run_point"]   = run_point
-            else:
-                item_ref    = item_ref.iloc[0]
-
-
-            # Calculate the values and setup the configs
-            target              = channel_map.copy()
-            reference           = channel_map.copy()
-            delta               = channel_map.copy()
-            target["value"]     = item[target.channel].values*144.0/item["DYNPR"]
-            reference["value"]  = item_ref[reference.channel].values*144.0/item_ref["DYNPR"]
-            delta["value"]      = target.value.values - reference.value.values
-
-
-             # Setup the contour configs
-            target_config   = ContourConfig(
-                data=target,
-                title="Target: Run {}".format(item["run_point"]),
-                colormap_path=constants.DEFAULT_ABSOLUTE_COLORMAP_PATH,
-                colorbar_bounds=inputs.get("absolute_bounds"),
-                colorbar_levels=33,
-                colorbar_label=inputs.get("variable"),
-            )
-    
-            reference_config   = ContourConfig(
-                data=reference,
-                title="Reference: {}".format(item_ref["run_point"]),
-                colormap_path=constants.DEFAULT_ABSOLUTE_COLORMAP_PATH,
-                colorbar_bounds=inputs.get("absolute_bounds"),
-                colorbar_levels=33,
-                colorbar_label=inputs.get("variable"),
-            )
-
-            delta_config    = ContourConfig(
-                data=delta,
-                title="Target - Reference",
-                colormap_path=constants.DEFAULT_DELTA_COLORMAP_PATH,
-                colorbar_bounds=inputs.get("delta_bounds"),
-                colorbar_levels=17,
-                colorbar_label="d{}".format(inputs.get("variable")),
-            )
-
-            configs = [target_config, reference_config, delta_config]
-            contour.set_configs(configs)
-
-            target_run          = int(item["Run Number"])
-            reference_run       = int(item_ref["Run Number"])
-            target_run_point    = item["run_point"]
-            reference_run_point = item_ref["run_point"]
-            target_rh           = item["Ride-Height-Number"]
-            working_directory   = self._save_directory_path_edit.text()
-            save_directory      = os.path.join(working_directory, "Run_{}_vs_{}".format(target_run, reference_run))
-            path                = os.path.join(save_directory, "RH-{}_Run_{}_vs_{}.png".format(target_rh, target_run_point, reference_run_point))
-            
-            if not os.path.exists(save_directory):
-                os.makedirs(save_directory)
-            
-            contour.save(path)
-
-            percentage  = 100.0*(i + 1)/len(target_data)
-            self.progress.setValue(percentage)
-            i           += 1
+
+
+    def plot_repeatability(self):
+        """Execute the repeat-point statistics of the target sessions"""
+
+        # Process the user inputs
+        inputs  = self.extract_inputs()
+        if not self.validate(inputs):
+            status  = QMessageBox.critical(self, "Error: Invalid Inputs", "Please fill out all fields", QMessageBox.Ok)
+            return False
+
+        # Execute the repeatability pipeline (on the render daemon if running)
+        import daemon
+        daemon.run_job({"action": "repeatability", "inputs": inputs}, progress=lambda percentage: self.progress.setValue(int(percentage)))
 
         # Reset the progress bar
         self.progress.setValue(100)
@@ -394,6 +401,64 @@ class PressurePlotterForm(QWidget):
 
 
 
+    def export_fields(self):
+        """Export the interpolated fields of the save directory for ParaView"""
+
+        inputs  = self.extract_inputs()
+        if not inputs.get("save_directory") or not inputs.get("grid_path"):
+            status  = QMessageBox.critical(self, "Error: Invalid Inputs", "Please select the save directory and grid", QMessageBox.Ok)
+            return False
+
+        import daemon
+        path    = daemon.run_job({"action": "export", "inputs": inputs})["result"]
+        QMessageBox.information(self, "Export Complete", "Fields written to {}".format(path), QMessageBox.Ok)
+
+
+    def browse_session(self):
+        """Open the session browser on the stored fields of the save directory"""
+
+        inputs  = self.extract_inputs()
+        if not inputs.get("save_directory") or not inputs.get("grid_path"):
+            status  = QMessageBox.critical(self, "Error: Invalid Inputs", "Please select the save directory and grid", QMessageBox.Ok)
+            return False
+
+        import pipeline
+        from browser import SessionBrowser
+
+        contour         = pipeline.open_contour(inputs)
+        store           = pipeline.open_field_store(contour, inputs.get("save_directory"))
+        self._browser   = SessionBrowser(contour, store, inputs)
+        self._browser.show()
+
+
+    def add_to_campaign(self):
+        """Append the current inputs as a plot job to a campaign file (run by batch.py)"""
+
+        inputs  = self.extract_inputs()
+        if not self.validate(inputs):
+            status  = QMessageBox.critical(self, "Error: Invalid Inputs", "Please fill out all fields", QMessageBox.Ok)
+            return False
+
+        filename, _ = QFileDialog.getSaveFileName(
+                        self,
+                        "Select Campaign File",
+                        inputs.get("save_directory"),
+                        "Campaign Files (*.json)",
+                        options=QFileDialog.DontUseNativeDialog | QFileDialog.DontConfirmOverwrite)
+        if not filename:
+            return False
+
+        import batch
+        try:
+            name    = batch.add_job(filename, dict(inputs, name=os.path.basename(os.path.normpath(inputs["save_directory"]))))
+        except ValueError as error:
+            status  = QMessageBox.critical(self, "Error: Campaign", str(error), QMessageBox.Ok)
+            return False
+
+        QMessageBox.information(self, "Campaign Updated", "Added job '{}' to {}".format(name, filename), QMessageBox.Ok)
+
+
+
 # Execute the program
 if __name__ == "__main__":
     application = QApplication([])
@@ -0,0 +1,62 @@
+import numpy
+import pandas
+
+import constants
+
+
+def pressure_coefficients(data, channels):
+    """Return the (points x taps) pressure coefficients of the D1 data"""
+    return data[list(channels)].values.astype(numpy.float64)*144.0/data["DYNPR"].values[:, None]
+
+
+def group_points(data):
+    """Label each point with its test condition (ride height, yaw, speed)
+
+    Returns the group index of every point and a DataFrame of the distinct
+    conditions (one row per group, in group order).
+    """
+
+    keys                = pandas.MultiIndex.from_frame(data[constants.D1_CONDITIONS])
+    groups, conditions  = pandas.factorize(keys, sort=True)
+    conditions          = conditions.to_frame(index=False)
+    conditions.columns  = constants.D1_CONDITIONS
+    return groups, conditions
+
+
+def group_statistics(values, groups):
+    """Mean, standard deviation and count of the rows of values per group
+
+    The rows are sorted by group once and the sums and sums of squares of
+    every group are accumulated in one reduceat pass (in float64). The
+    standard deviation is the sample one (NaN for single points).
+    """
+
+    groups          = numpy.asarray(groups)
+    order           = numpy.argsort(groups, kind="stable")
+    ordered         = groups[order]
+    starts          = numpy.flatnonzero(numpy.r_[True, ordered[1:] != ordered[:-1]])
+    rows            = numpy.asarray(values, dtype=numpy.float64)[order]
+    count           = numpy.diff(numpy.r_[starts, len(rows)])
+
+    sums            = numpy.add.reduceat(rows, starts, axis=0)
+    squares         = numpy.add.reduceat(rows*rows, starts, axis=0)
+    mean            = sums/count[:, None]
+    variance        = numpy.maximum(squares - sums*mean, 0.0)
+
+    with numpy.errstate(invalid="ignore", divide="ignore"):
+        std     = numpy.sqrt(variance/(count[:, None] - 1))
+
+    std[count < 2]  = numpy.nan
+    return mean, std, count
+
+
+def tap_statistics(mean, std, count, conditions, channels):
+    """Long-format table of the per-tap statistics of every condition"""
+
+    n_groups, n_taps    = mean.shape
+    table               = conditions.iloc[numpy.repeat(numpy.arange(n_groups), n_taps)].reset_index(drop=True)
+    table["channel"]    = numpy.tile(numpy.asarray(channels), n_groups)
+    table["count"]      = numpy.repeat(count, n_taps)
+    table["mean"]       = mean.ravel()
+    table["std"]        = std.ravel()
+    return table
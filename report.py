@@ -0,0 +1,133 @@
+import os
+import html
+import numpy
+from concurrent.futures import ProcessPoolExecutor
+
+
+THUMBNAIL_DIRECTORY = "thumbnails"
+THUMBNAIL_WIDTH     = 320
+
+SORT_SCRIPT = """
+function sortTable(column) {
+    var table   = document.getElementById("images");
+    var rows    = Array.prototype.slice.call(table.tBodies[0].rows);
+    var order   = table.getAttribute("data-order") == column ? -1 : 1;
+    rows.sort(function(a, b) {
+        var x = a.cells[column].textContent, y = b.cells[column].textContent;
+        var u = parseFloat(x), v = parseFloat(y);
+        var c = (isNaN(u) || isNaN(v)) ? x.localeCompare(y) : u - v;
+        return order*c;
+    });
+    rows.forEach(function(row) { table.tBodies[0].appendChild(row); });
+    table.setAttribute("data-order", order == 1 ? column : "");
+}
+"""
+
+
+def downsample(image, factor):
+    """Downsample an (h, w, channels) image by block averaging"""
+
+    if factor <= 1:
+        return image
+
+    h, w    = (image.shape[0]//factor)*factor, (image.shape[1]//factor)*factor
+    blocks  = image[:h, :w].reshape((h//factor, factor, w//factor, factor) + image.shape[2:])
+    return blocks.mean(axis=(1, 3))
+
+
+def is_stale(source, destination):
+    """Return whether a thumbnail is missing or older than its image"""
+    return not os.path.exists(destination) or os.path.getmtime(destination) < os.path.getmtime(source)
+
+
+def thumbnail(source, destination, width=THUMBNAIL_WIDTH):
+    """Write a downsampled copy of a rendered image (skipped if up to date)"""
+
+    from matplotlib import image
+
+    if not is_stale(source, destination):
+        return destination
+
+    data    = image.imread(source)
+    factor  = int(numpy.ceil(data.shape[1]/float(width)))
+    image.imsave(destination, numpy.clip(downsample(data, factor), 0.0, 1.0))
+    return destination
+
+
+def make_thumbnails(sources, destinations, processes=None, executor=None):
+    """Downsample the rendered images into thumbnails in parallel
+
+    Only the stale thumbnails are written, on the given executor if any,
+    otherwise on a process pool started only when one is stale.
+    """
+
+    stale   = [(source, destination) for source, destination in zip(sources, destinations) if is_stale(source, destination)]
+    if stale and executor is not None:
+        list(executor.map(thumbnail, *zip(*stale)))
+    elif stale:
+        with ProcessPoolExecutor(max_workers=processes) as pool:
+            list(pool.map(thumbnail, *zip(*stale)))
+
+    return list(destinations)
+
+
+def write_html(filename, title, columns, rows):
+    """Write an HTML index of thumbnails with a sortable table
+
+    rows is a list of (image path, thumbnail path, values) with one value
+    per column; paths are written relative to the HTML file.
+    """
+
+    directory   = os.path.dirname(os.path.abspath(filename))
+    relative    = lambda path: html.escape(os.path.relpath(path, directory).replace(os.sep, "/"))
+    header      = "".join('<th onclick="sortTable({})">{}</th>'.format(i + 1, html.escape(c)) for i, c in enumerate(columns))
+    body        = []
+    for image, thumb, values in rows:
+        cells   = "".join("<td>{}</td>".format(html.escape(str(v))) for v in values)
+        body.append('<tr><td><a href="{}"><img src="{}"></a></td>{}</tr>'.format(relative(image), relative(thumb), cells))
+
+    lines   = [
+        "<!DOCTYPE html>",
+        "<html>",
+        "<head>",
+        '<meta charset="utf-8">',
+        "<title>{}</title>".format(html.escape(title)),
+        "<style>",
+        "body { font-family: sans-serif; } table { border-collapse: collapse; }",
+        "td, th { border: 1px solid #ccc; padding: 4px 8px; } th { cursor: pointer; background: #eee; }",
+        "</style>",
+        "<script>{}</script>".format(SORT_SCRIPT),
+        "</head>",
+        "<body>",
+        "<h1>{}</h1>".format(html.escape(title)),
+        '<table id="images">',
+        "<thead><tr><th>Image</th>{}</tr></thead>".format(header),
+        "<tbody>",
+    ] + body + [
+        "</tbody>",
+        "</table>",
+        "</body>",
+        "</html>",
+    ]
+
+    with open(filename, "w") as f:
+        f.write("\n".join(lines) + "\n")
+
+
+def write_pdf(filename, sources):
+    """Write the rendered images (not re-rendered) as a multi-page PDF"""
+
+    import matplotlib
+    matplotlib.use("Agg")
+    from matplotlib import image, pyplot
+    from matplotlib.backends.backend_pdf import PdfPages
+
+    with PdfPages(filename) as pdf:
+        for source in sources:
+            data    = image.imread(source)
+            figure  = pyplot.figure(figsize=(data.shape[1]/100.0, data.shape[0]/100.0), dpi=100)
+            axes    = figure.add_axes([0, 0, 1, 1])
+            axes.imshow(data)
+            axes.axis("off")
+            pdf.savefig(figure)
+            pyplot.close(figure)
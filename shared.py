@@ -0,0 +1,83 @@
+import numpy
+
+
+def attach_block(name):
+    """Attach to a shared memory block without tracking it (Python 3.13+) or as usual"""
+
+    from multiprocessing import shared_memory
+
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        return shared_memory.SharedMemory(name=name)
+
+
+class SharedArrays(object):
+    """Named numpy arrays published in shared memory (multiprocessing.shared_memory)
+
+    The publishing process owns the blocks and unlinks them on close. Other
+    processes attach by the descriptor (a small picklable dict of the block
+    names, shapes and dtypes) and get read-only views of the same memory,
+    so nothing is copied or unpickled however large the arrays are.
+    """
+
+    def __init__(self, descriptor, blocks, owner=False):
+        self.descriptor = descriptor
+        self.blocks     = blocks
+        self.owner      = owner
+        self.arrays     = {}
+        for name, (block_name, shape, dtype) in descriptor.items():
+            array                   = numpy.ndarray(shape, dtype=dtype, buffer=blocks[name].buf)
+            array.flags.writeable   = False
+            self.arrays[name]       = array
+
+
+    @classmethod
+    def publish(cls, arrays):
+        """Copy the arrays into new shared memory blocks"""
+
+        from multiprocessing import shared_memory
+
+        descriptor  = {}
+        blocks      = {}
+        for name, array in arrays.items():
+            array   = numpy.ascontiguousarray(array)
+            block   = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+            numpy.ndarray(array.shape, dtype=array.dtype, buffer=block.buf)[...]    = array
+            descriptor[name]    = (block.name, array.shape, array.dtype.str)
+            blocks[name]        = block
+
+        return cls(descriptor, blocks, owner=True)
+
+
+    @classmethod
+    def attach(cls, descriptor):
+        """Attach to the arrays of a descriptor"""
+        return cls(descriptor, {name: attach_block(block[0]) for name, block in descriptor.items()})
+
+
+    def __getitem__(self, name):
+        return self.arrays[name]
+
+
+    def __enter__(self):
+        return self
+
+
+    def __exit__(self, *args):
+        self.close()
+
+
+    def close(self):
+        """Detach from the blocks (and free them if published here)
+
+        Views of the arrays must no longer be in use.
+        """
+
+        self.arrays = {}
+        for block in self.blocks.values():
+            block.close()
+            if self.owner:
+                block.unlink()
+
+        self.blocks = {}
@@ -0,0 +1,238 @@
+import os
+import json
+import numpy
+import pandas
+
+import utils
+import constants
+
+
+class FieldStore(object):
+    """Session-wide store of interpolated fields on the grid vertices
+
+    Fields are appended as rows of one on-disk float32 (fields x vertices)
+    array, whatever the plot precision, and read back through a memory map,
+    so sessions larger than RAM still work; get returns a row in the plot
+    precision (precision, the store dtype if None). Each
+    row is indexed by its key (a hash of the interpolation inputs), kind
+    (target/reference/delta) and the test point conditions.
+
+    Rows are never removed; the keys of the latest plot into the store are
+    kept as its current rows (see set_current), which the loads, exports,
+    sweeps and browser read, so fields of edited data are left out.
+    """
+
+    INDEX_COLUMNS   = ["key", "kind", "run_point", "yaw", "speed", "ride_height"]
+
+    def __init__(self, path, n_vertices, dtype=constants.FIELD_STORE_PRECISION, precision=None):
+        self.path           = path
+        self.n_vertices     = int(n_vertices)
+        self.dtype          = numpy.dtype(dtype)
+        self.precision      = numpy.dtype(precision or dtype)
+        self.data_path      = os.path.join(path, "fields.bin")
+        self.index_path     = os.path.join(path, "index.json")
+        self.records        = []
+        self.keys           = {}
+        self.current        = None
+        self._fields        = None
+
+        if not os.path.exists(path):
+            os.makedirs(path)
+
+        self.load()
+
+
+    def __len__(self):
+        return len(self.records)
+
+
+    def load(self):
+        """Load the index, dropping any rows not fully written to disk"""
+
+        if not os.path.exists(self.index_path):
+            return
+
+        with open(self.index_path, "r") as f:
+            index   = json.load(f)
+
+        if index.get("n_vertices") != self.n_vertices or index.get("dtype") != self.dtype.str:
+            return
+
+        size            = os.path.getsize(self.data_path) if os.path.exists(self.data_path) else 0
+        n               = min(len(index["records"]), size//self.row_bytes)
+        self.records    = index["records"][:n]
+        self.keys       = {record["key"]: i for i, record in enumerate(self.records)}
+        self.current    = index.get("current")
+
+
+    def flush(self):
+        """Write the index (the field rows are written as they are appended)"""
+
+        index   = {
+            "n_vertices": self.n_vertices,
+            "dtype": self.dtype.str,
+            "records": self.records,
+            "current": self.current,
+        }
+        temporary   = utils.temporary_path(self.index_path)
+        with open(temporary, "w") as f:
+            json.dump(index, f)
+        os.replace(temporary, self.index_path)
+
+
+    @property
+    def row_bytes(self):
+        return self.n_vertices*self.dtype.itemsize
+
+
+    @property
+    def fields(self):
+        """Memory-mapped (fields x vertices) array of every stored field"""
+
+        n   = len(self.records)
+        if n == 0:
+            return numpy.empty((0, self.n_vertices), dtype=self.dtype)
+
+        if self._fields is None or self._fields.shape[0] != n:
+            self._fields    = numpy.memmap(self.data_path, dtype=self.dtype, mode="r", shape=(n, self.n_vertices))
+
+        return self._fields
+
+
+    @property
+    def index(self):
+        """DataFrame of the stored field records (one row per field)"""
+        return pandas.DataFrame(self.records, columns=self.INDEX_COLUMNS)
+
+
+    def set_current(self, keys):
+        """Set the keys of the fields of the current inputs (written on flush)"""
+        self.current    = list(dict.fromkeys(keys))
+
+
+    def current_rows(self):
+        """Return the rows of the current fields (every row if never set)"""
+
+        if self.current is None:
+            return numpy.arange(len(self.records))
+
+        return numpy.array(sorted(self.keys[key] for key in self.current if key in self.keys), dtype=numpy.int64)
+
+
+    @property
+    def current_index(self):
+        """DataFrame of the current field records, indexed by row"""
+        return self.index.iloc[self.current_rows()]
+
+
+    def find(self, key):
+        """Return the row of the field with the given key (None if missing)"""
+        return self.keys.get(key)
+
+
+    def get(self, row):
+        """Return the field values of a row in the plot precision"""
+        return numpy.asarray(self.fields[row], dtype=self.precision)
+
+
+    def append(self, values, key, kind="", run_point="", yaw=0.0, speed=0.0, ride_height=0.0):
+        """Append a field and return its row (existing keys are not duplicated)"""
+
+        row = self.find(key)
+        if row is not None:
+            return row
+
+        values  = numpy.ascontiguousarray(values, dtype=self.dtype).ravel()
+        if values.size != self.n_vertices:
+            raise ValueError("Field has {} values, expected {}".format(values.size, self.n_vertices))
+
+        # Truncate any partially written trailing rows before appending
+        with open(self.data_path, "ab") as f:
+            f.truncate(len(self.records)*self.row_bytes)
+            f.seek(0, os.SEEK_END)
+            f.write(values.tobytes())
+
+        row = len(self.records)
+        self.records.append({
+            "key": key,
+            "kind": kind,
+            "run_point": str(run_point),
+            "yaw": float(yaw),
+            "speed": float(speed),
+            "ride_height": float(ride_height),
+        })
+        self.keys[key]  = row
+        return row
+
+
+    def select(self, **criteria):
+        """Return the rows whose index matches all of the given column values"""
+
+        index   = self.index
+        mask    = numpy.ones(len(index), dtype=bool)
+        for column, value in criteria.items():
+            mask    &= (index[column] == value).values
+
+        return numpy.flatnonzero(mask)
+
+
+
+class RenderManifest(object):
+    """Manifest of the images rendered into a save directory
+
+    Maps each image path (relative to the directory) to the render key of
+    its inputs, so images whose key is unchanged can be skipped on re-runs,
+    and to the image attributes (run points, conditions) used by reports.
+    """
+
+    def __init__(self, directory, filename=constants.RENDER_MANIFEST_PATH):
+        self.directory  = directory
+        self.path       = os.path.join(directory, filename)
+        self.entries    = {}
+
+        if os.path.exists(self.path):
+            with open(self.path, "r") as f:
+                self.entries    = json.load(f)
+
+
+    def relative(self, path):
+        return os.path.relpath(path, self.directory).replace(os.sep, "/")
+
+
+    def is_current(self, path, key):
+        """Whether the image exists and was rendered from the same inputs"""
+
+        entry   = self.entries.get(self.relative(path))
+        if isinstance(entry, dict):
+            entry   = entry.get("key")
+
+        return entry == key and os.path.exists(path)
+
+
+    def update(self, path, key, **attributes):
+        attributes["key"]                   = key
+        self.entries[self.relative(path)]   = attributes
+
+
+    def images(self):
+        """Return the (absolute path, attributes) of the existing images"""
+
+        images  = []
+        for relative, entry in sorted(self.entries.items()):
+            path    = os.path.join(self.directory, *relative.split("/"))
+            if os.path.exists(path):
+                images.append((path, entry if isinstance(entry, dict) else {"key": entry}))
+
+        return images
+
+
+    def flush(self):
+        """Write the manifest"""
+
+        if not os.path.exists(self.directory):
+            os.makedirs(self.directory)
+
+        temporary   = utils.temporary_path(self.path)
+        with open(temporary, "w") as f:
+            json.dump(self.entries, f, indent=4, sort_keys=True)
+        os.replace(temporary, self.path)
@@ -0,0 +1,143 @@
+import numpy
+
+
+SWEEP_VARIABLES = ["ride_height", "yaw", "speed"]
+
+
+def sweep_groups(index, kind="target", vary="yaw"):
+    """Group the stored fields of a kind into sweeps of one variable
+
+    Returns a list of (fixed conditions, rows) with the rows of each sweep
+    ordered by the varied condition (then run point).
+    """
+
+    fixed   = [variable for variable in SWEEP_VARIABLES if variable != vary]
+    index   = index[index.kind == kind].sort_values([vary, "run_point"])
+    groups  = []
+    for conditions, group in index.groupby(fixed, sort=True):
+        groups.append((dict(zip(fixed, conditions)), group.index.values))
+
+    return groups
+
+
+def contour_artists(contour_set):
+    """Return the drawable artists of a contour set (matplotlib version agnostic)"""
+
+    from matplotlib.artist import Artist
+
+    if isinstance(contour_set, Artist):
+        return [contour_set]
+
+    return list(contour_set.collections)
+
+
+class SweepRenderer(object):
+    """Render frames of fields on one grid with a fixed figure skeleton
+
+    The figure, border, colorbar and axes are drawn once and cached as a
+    background; each frame restores it and draws only the contour layer and
+    the title.
+    """
+
+    def __init__(self, contour, colormap, levels, label, figsize=(12, 5), dpi=100):
+        from matplotlib.figure import Figure
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+        self.contour    = contour
+        self.colormap   = colormap
+        self.levels     = levels
+        self.figure     = Figure(figsize=figsize, dpi=dpi)
+        self.canvas     = FigureCanvasAgg(self.figure)
+        self.axes       = self.figure.add_subplot(111)
+
+        grid            = contour.grid
+        axes            = contour.axes
+        self.axes.set_aspect("equal")
+        self.axes.axis("off")
+        self.axes.set_xlim([grid[:, axes[0]].min() - contour.margin, grid[:, axes[0]].max() + contour.margin])
+        self.axes.set_ylim([grid[:, axes[1]].min() - contour.margin, grid[:, axes[1]].max() + contour.margin])
+        self.title      = self.axes.set_title(" ", fontsize=8)
+        self.border,    = self.axes.plot(contour.border[:, axes[0]], contour.border[:, axes[1]], "-k", linewidth=0.5)
+
+        # Draw a placeholder field for the colorbar, then cache the background
+        filled          = self.draw_field(numpy.zeros(grid.shape[0]))[0]
+        colorbar        = self.figure.colorbar(filled, ax=self.axes)
+        colorbar.ax.set_title(label)
+        self.clear_field()
+
+        for artist in [self.title, self.border]:
+            artist.set_visible(False)
+
+        self.canvas.draw()
+        self.background = self.canvas.copy_from_bbox(self.figure.bbox)
+
+        for artist in [self.title, self.border]:
+            artist.set_visible(True)
+
+
+    def draw_field(self, values):
+        """Add the filled contours and contour lines of a field"""
+
+        filled  = self.axes.tricontourf(
+                    self.contour.triangulation,
+                    values,
+                    extend="both",
+                    cmap=self.colormap,
+                    levels=self.levels)
+
+        lines   = self.axes.tricontour(
+                    self.contour.triangulation,
+                    values,
+                    extend="both",
+                    levels=self.levels,
+                    linewidths=0.5,
+                    colors="k")
+
+        self.field  = [filled, lines]
+        return self.field
+
+
+    def clear_field(self):
+        for contour_set in self.field:
+            for artist in contour_artists(contour_set):
+                artist.remove()
+
+        self.field  = []
+
+
+    def frame(self, values, title):
+        """Render one field and return the RGBA image"""
+
+        self.canvas.restore_region(self.background)
+        self.title.set_text(title)
+        for contour_set in self.draw_field(values):
+            for artist in contour_artists(contour_set):
+                self.axes.draw_artist(artist)
+
+        self.axes.draw_artist(self.border)
+        self.axes.draw_artist(self.title)
+        image   = numpy.array(self.canvas.buffer_rgba())
+        self.clear_field()
+        return image
+
+
+def write_frames(filename, frames, duration=0.2):
+    """Write the frames as an animated GIF/PNG (Pillow) or a raw .npy stack"""
+
+    if filename.lower().endswith(".npy"):
+        numpy.save(filename, numpy.stack(frames))
+        return filename
+
+    from PIL import Image
+
+    images  = [Image.fromarray(frame) for frame in frames]
+    if filename.lower().endswith(".gif"):
+        images  = [image.convert("RGB").convert("P", palette=Image.ADAPTIVE) for image in images]
+
+    images[0].save(
+        filename,
+        save_all=True,
+        append_images=images[1:],
+        duration=int(1000*duration),
+        loop=0)
+    return filename
@@ -0,0 +1,65 @@
+import os
+import json
+
+import batch
+import daemon
+
+
+def write_campaign(directory):
+    (directory / "run11_D1.asc").write_text("data")
+    campaign    = {
+        "defaults": {"reference_data_path": "run11_D1.asc"},
+        "jobs": [
+            {"name": "first", "target_data_paths": ["run11_D1.asc"]},
+            {"name": "second", "action": "repeatability", "target_data_paths": ["run11_D1.asc"]},
+        ]
+    }
+    path        = str(directory / "campaign.json")
+    with open(path, "w") as f:
+        json.dump(campaign, f)
+    return path
+
+
+def test_read_campaign(tmp_path):
+    jobs    = batch.read_campaign(write_campaign(tmp_path))
+    assert [(job["name"], job["action"]) for job in jobs] == [("first", "plot"), ("second", "repeatability")]
+    assert jobs[0]["inputs"]["save_directory"] == str(tmp_path / "output" / "first")
+    assert jobs[0]["inputs"]["target_data_paths"] == [str(tmp_path / "run11_D1.asc")]
+
+
+def test_skip_and_resume(tmp_path, monkeypatch):
+    filename    = write_campaign(tmp_path)
+    runs        = []
+    failing     = {"second"}
+
+    def run_job(job, progress=None):
+        name    = os.path.basename(job["inputs"]["save_directory"])
+        runs.append(name)
+        if name in failing:
+            raise RuntimeError("interrupted")
+        return {"action": job["action"], "result": {"field_store": "store", "fields": 3}}
+
+    monkeypatch.setattr(daemon, "run_job", run_job)
+
+    entries     = batch.run_campaign(filename)
+    assert runs == ["first", "second"]
+    assert entries["first"]["status"] == "done"
+    assert entries["first"]["result"] == {"save_directory": str(tmp_path / "output" / "first"), "images": 0, "fields": 3}
+    assert entries["second"]["status"] == "failed" and "interrupted" in entries["second"]["error"]
+
+    # The done job is skipped, the failed one is run again
+    failing.clear()
+    entries     = batch.run_campaign(filename)
+    assert runs == ["first", "second", "second"]
+    assert entries["second"]["status"] == "done"
+    assert batch.CampaignState(filename).is_done("second", batch.job_key(batch.read_campaign(filename)[1]))
+
+    # Edited data changes the job keys
+    mtime       = os.stat(str(tmp_path / "run11_D1.asc")).st_mtime_ns + 10**9
+    os.utime(str(tmp_path / "run11_D1.asc"), ns=(mtime, mtime))
+    batch.run_campaign(filename)
+    assert runs[3:] == ["first", "second"]
+
+    # restart forgets the checkpoint
+    batch.run_campaign(filename, restart=True)
+    assert runs[5:] == ["first", "second"]
@@ -0,0 +1,73 @@
+import os
+
+import numpy
+
+import utils
+
+
+HEADER  = ["Run Number", "Point Number", "YAW", "RRS_SPEED", "Ride-Height-Number", "DYNPR", "P001_psi", "P002_psi", "P003_psi"]
+
+
+def write_d1(filename, rows):
+    with open(filename, "w") as f:
+        f.write("hdr1\nhdr2\nhdr3\n")
+        f.write("\t".join(HEADER) + "\n")
+        f.write("\t".join("u" for c in HEADER) + "\n")
+        for row in rows:
+            f.write("\t".join(str(v) for v in row) + "\n")
+
+
+def set_mtime(filename, mtime_ns):
+    os.utime(filename, ns=(mtime_ns, mtime_ns))
+
+
+def test_read_d1_cache(tmp_path):
+    path    = str(tmp_path / "run_D1.asc")
+    write_d1(path, [[11, 1, -2.0, 40.0, 1, 0.15, 0.001, 0.002, 0.003], [11, 2, 0.0, 40.0, 1, 0.15, 0.004, 0.005, 0.006]])
+
+    parsed  = utils.read_d1(path, channels=["P001", "P003"])
+    assert os.path.exists(os.path.join(utils.d1_cache_path(path), "index.json"))
+    assert parsed.run_point.tolist() == ["11.01", "11.02"]
+    assert parsed["P001_psi"].dtype == numpy.float32
+    assert "P002_psi" not in parsed
+
+    cached  = utils.read_d1_cache(path, ["P003"])
+    assert cached is not None
+    header, meta, meta_values, taps, tap_values = cached
+    assert taps == ["P003_psi"]
+    numpy.testing.assert_array_equal(tap_values[:, 0], numpy.array([0.003, 0.006], dtype=numpy.float32))
+
+    # Channels not in the cache are parsed again
+    assert utils.read_d1_cache(path, ["P002"]) is None
+
+
+def test_read_d1_cache_miss_after_change(tmp_path):
+    path    = str(tmp_path / "run_D1.asc")
+    write_d1(path, [[11, 1, -2.0, 40.0, 1, 0.15, 0.001, 0.002, 0.003]])
+    set_mtime(path, 1000000000*10**9)
+    utils.read_d1(path, channels=["P001"])
+    assert utils.read_d1_cache(path, ["P001"]) is not None
+
+    # Same size, new mtime: the cache is stale
+    write_d1(path, [[11, 1, -2.0, 40.0, 1, 0.15, 0.009, 0.002, 0.003]])
+    set_mtime(path, 1000000001*10**9)
+    assert utils.read_d1_cache(path, ["P001"]) is None
+    assert utils.read_d1(path, channels=["P001"])["P001_psi"].tolist() == [numpy.float32(0.009)]
+    assert utils.read_d1_cache(path, ["P001"]) is not None
+
+
+def test_read_d1_without_cache(tmp_path):
+    path    = str(tmp_path / "run_D1.asc")
+    write_d1(path, [[11, 1, -2.0, 40.0, 1, 0.15, 0.001, 0.002, 0.003]])
+    utils.read_d1(path, channels=["P001"], cache=False)
+    assert not os.path.exists(utils.d1_cache_path(path))
+
+
+def test_read_d1_empty_fields(tmp_path):
+    path    = str(tmp_path / "run_D1.asc")
+    write_d1(path, [[11, 1, -2.0, 40.0, 1, 0.15, 0.001, "", 0.003], [11, 2, 0.0, 40.0, 1, 0.15, 0.004, 0.005, "nan"]])
+
+    data    = utils.read_d1(path, channels=["P002", "P003"], cache=False)
+    assert data["P002_psi"].dtype == numpy.float32
+    assert numpy.isnan(data["P002_psi"].values[0]) and numpy.isnan(data["P003_psi"].values[1])
+    assert data["P002_psi"].values[1] == numpy.float32(0.005)
@@ -0,0 +1,90 @@
+import os
+import json
+import socket
+import threading
+
+import pytest
+
+import daemon
+
+
+class Engine(object):
+    """Stand-in for the RenderEngine, running no jobs"""
+
+    def __init__(self):
+        self.jobs   = []
+
+    def status(self):
+        return {"jobs": len(self.jobs)}
+
+    def run(self, job):
+        self.jobs.append(job)
+        return {"action": job.get("action"), "result": None}
+
+
+@pytest.fixture
+def server(tmp_path, monkeypatch):
+    if not hasattr(socket, "AF_UNIX"):
+        pytest.skip("Unix sockets are not available")
+
+    monkeypatch.setenv("HOME", str(tmp_path))
+    path            = daemon.default_address()
+    token           = daemon.read_token(create=True)
+    server          = daemon.UnixHTTPServer(path, daemon.JobHandler)
+    server.token    = token
+    server.engine   = Engine()
+    thread          = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def send(path, body=None, headers=None):
+    """Send a raw request to the daemon socket and return the status and reply"""
+
+    connection  = daemon.UnixHTTPConnection(daemon.default_address(), timeout=5)
+    connection.request("GET" if body is None else "POST", path, body=body, headers=headers or {})
+    response    = connection.getresponse()
+    reply       = json.loads(response.read().decode("utf-8"))
+    connection.close()
+    return response.status, reply
+
+
+def test_token_file(server):
+    path    = daemon.daemon_path("daemon.token")
+    assert os.stat(path).st_mode & 0o777 == 0o600
+    assert os.stat(os.path.dirname(path)).st_mode & 0o777 == 0o700
+    assert os.stat(daemon.default_address()).st_mode & 0o777 == 0o600
+    assert daemon.read_token(create=True) == server.token
+
+
+def test_group_readable_token_is_refused(server):
+    os.chmod(daemon.daemon_path("daemon.token"), 0o640)
+    with pytest.raises(PermissionError):
+        daemon.read_token()
+    assert not daemon.is_running()
+
+
+def test_authorized_requests(server):
+    assert daemon.request("/status") == {"jobs": 0}
+    assert daemon.submit({"action": "warm"}) == {"action": "warm", "result": None}
+    assert daemon.is_running()
+
+
+def test_missing_or_wrong_token(server):
+    body    = json.dumps({"action": "warm"})
+    assert send("/status")[0] == 401
+    assert send("/jobs", body, {"Content-Type": "application/json"})[0] == 401
+    assert send("/jobs", body, {"Content-Type": "application/json", "Authorization": "Bearer wrong"})[0] == 401
+    assert server.engine.jobs == []
+
+
+def test_origin_and_content_type(server):
+    token   = {"Authorization": "Bearer {}".format(server.token)}
+    body    = json.dumps({"action": "warm"})
+    assert send("/jobs", body, dict(token, **{"Content-Type": "application/json", "Origin": "http://evil.example"}))[0] == 403
+    assert send("/shutdown", "{}", dict(token, **{"Content-Type": "application/json", "Origin": "null"}))[0] == 403
+    assert send("/jobs", body, dict(token, **{"Content-Type": "text/plain"}))[0] == 415
+    assert server.engine.jobs == []
+    assert send("/jobs", body, dict(token, **{"Content-Type": "application/json; charset=utf-8"}))[0] == 200
@@ -0,0 +1,27 @@
+import numpy
+import pytest
+
+import export
+
+
+def test_write_vtp_read_back(tmp_path):
+    vtk         = pytest.importorskip("vtk")
+    from vtk.util.numpy_support import vtk_to_numpy
+
+    points      = numpy.array([[0, 0, 0], [1, 0, 0], [1, 1, 0], [0, 1, 0]], dtype=numpy.float64)
+    triangles   = numpy.array([[0, 1, 2], [0, 2, 3]], dtype=numpy.int64)
+    arrays      = [("target 11.01", numpy.array([0.1, 0.2, 0.3, 0.4])), ("delta 11.01", numpy.arange(4, dtype=numpy.float32))]
+    path        = str(tmp_path / "fields.vtp")
+    export.write_vtp(path, points, triangles, arrays)
+
+    reader      = vtk.vtkXMLPolyDataReader()
+    reader.SetFileName(path)
+    reader.Update()
+    output      = reader.GetOutput()
+
+    numpy.testing.assert_array_equal(vtk_to_numpy(output.GetPoints().GetData()), points.astype(numpy.float32))
+    numpy.testing.assert_array_equal(vtk_to_numpy(output.GetPolys().GetConnectivityArray()).reshape(-1, 3), triangles)
+    data        = output.GetPointData()
+    assert [data.GetArrayName(i) for i in range(data.GetNumberOfArrays())] == [name for name, values in arrays]
+    for name, values in arrays:
+        numpy.testing.assert_array_equal(vtk_to_numpy(data.GetArray(name)), numpy.asarray(values, dtype=numpy.float32))
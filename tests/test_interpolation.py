@@ -0,0 +1,21 @@
+import numpy
+import pytest
+
+import interpolation
+
+
+@pytest.mark.parametrize("function, norm", [
+    ("multiquadric", "euclidean"),
+    ("thin_plate", "euclidean"),
+    ("gaussian", "cityblock"),
+    (lambda self, r: r, "euclidean"),
+])
+def test_evaluate_rbf_matches_rbf(function, norm):
+    from scipy.interpolate import Rbf
+
+    rng     = numpy.random.RandomState(0)
+    points  = rng.random_sample((20, 3))
+    grid    = rng.random_sample((300, 3))
+    func    = Rbf(points[:, 0], points[:, 1], points[:, 2], rng.random_sample(20), function=function, norm=norm)
+    values  = interpolation.evaluate_rbf(func, grid, chunk_size=64)
+    numpy.testing.assert_allclose(values, func(grid[:, 0], grid[:, 1], grid[:, 2]), rtol=1e-10, atol=1e-10)
@@ -0,0 +1,32 @@
+import numpy
+
+import loads
+
+
+# Unit square plate in the z = 0 plane, wound for a +z normal
+POINTS      = numpy.array([[0, 0, 0], [1, 0, 0], [1, 1, 0], [0, 1, 0]], dtype=numpy.float64)
+TRIANGLES   = numpy.array([[0, 1, 2], [0, 2, 3]])
+
+
+def test_uniform_pressure():
+    operator    = loads.load_operator(POINTS, TRIANGLES)
+    table       = loads.integrate(numpy.ones((1, 4)), operator)
+    numpy.testing.assert_allclose(table.loc[0, ["Fx", "Fy", "Fz"]].values, [0.0, 0.0, -1.0], atol=1e-12)
+    numpy.testing.assert_allclose(table.loc[0, ["Mx", "My", "Mz"]].values, [-0.5, 0.5, 0.0], atol=1e-12)
+    assert abs(table.loc[0, "Cp_mean"] - 1.0) < 1e-12
+
+    # No moment about the centre of pressure
+    centred     = loads.integrate(numpy.ones((1, 4)), loads.load_operator(POINTS, TRIANGLES, origin=(0.5, 0.5, 0.0)))
+    numpy.testing.assert_allclose(centred.loc[0, ["Mx", "My", "Mz"]].values, 0.0, atol=1e-12)
+
+
+def test_linear_pressure_and_rows():
+    operator    = loads.load_operator(POINTS, TRIANGLES)
+    fields      = numpy.vstack((numpy.ones(4), POINTS[:, 0], 2.0*numpy.ones(4))).astype(numpy.float32)
+    table       = loads.integrate(fields, operator, chunk_size=1, rows=[1, 2])
+
+    # Cp = x: Fz = -(integral of x) = -1/2, exact for a linear field
+    assert len(table) == 2
+    assert abs(table.loc[0, "Fz"] + 0.5) < 1e-12
+    assert abs(table.loc[0, "Cp_mean"] - 0.5) < 1e-12
+    assert abs(table.loc[1, "Fz"] + 2.0) < 1e-12
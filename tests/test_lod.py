@@ -0,0 +1,44 @@
+import numpy
+
+import lod
+import zones
+
+
+def unit_square_grid(n=21):
+    """Return the points and triangles of the unit square split into (n - 1) x (n - 1) squares"""
+
+    x, y        = numpy.meshgrid(numpy.linspace(0, 1, n), numpy.linspace(0, 1, n))
+    points      = numpy.column_stack((x.ravel(), y.ravel(), numpy.zeros(n*n)))
+    corner      = (numpy.arange(n - 1)[:, None]*n + numpy.arange(n - 1)[None, :]).ravel()
+    triangles   = numpy.vstack((
+                    numpy.column_stack((corner, corner + 1, corner + n + 1)),
+                    numpy.column_stack((corner, corner + n + 1, corner + n))))
+    return points, triangles
+
+
+def border_distance(points):
+    return numpy.minimum.reduce([points[:, 0], 1 - points[:, 0], points[:, 1], 1 - points[:, 1]])
+
+
+def test_decimate_keeps_the_boundary():
+    points, triangles   = unit_square_grid()
+    coarse, merged      = lod.decimate(points, triangles, 0.15)
+    assert len(coarse) < len(points)/4
+    assert merged.min() == 0 and merged.max() == len(coarse) - 1
+
+    # Boundary clusters are placed at the mean of their boundary vertices:
+    # on the border, except the corner cells holding two sides (within one
+    # fine spacing); interior vertices stay inside
+    boundary            = lod.boundary_vertices(merged, len(coarse))
+    distance            = border_distance(coarse)
+    assert (distance[boundary] > 0).sum() <= 4
+    assert distance[boundary].max() <= 0.05 + 1e-12
+    assert distance[~boundary].min() > 0
+    assert abs(zones.vertex_areas(coarse, merged).sum() - 1.0) < 0.05
+
+
+def test_cell_size_for_vertices():
+    points, triangles   = unit_square_grid()
+    size                = lod.cell_size_for_vertices(points, 100)
+    assert lod.cluster_vertices(points, size).max() + 1 <= 100
+    assert lod.cluster_vertices(points, 0.9*size).max() + 1 > 100
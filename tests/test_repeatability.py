@@ -0,0 +1,33 @@
+import numpy
+import pandas
+
+import repeatability
+
+
+def test_group_statistics():
+    rng                 = numpy.random.RandomState(0)
+    values              = rng.random_sample((40, 5)).astype(numpy.float32)
+    groups              = rng.randint(0, 6, size=40)
+    groups[groups == 5] = 4
+    groups[0]           = 5
+    mean, std, count    = repeatability.group_statistics(values, groups)
+
+    assert count.tolist() == [int((groups == g).sum()) for g in range(6)]
+    for g in range(6):
+        rows    = values[groups == g].astype(numpy.float64)
+        numpy.testing.assert_allclose(mean[g], rows.mean(axis=0), rtol=1e-12)
+        if len(rows) > 1:
+            numpy.testing.assert_allclose(std[g], rows.std(axis=0, ddof=1), rtol=1e-9)
+
+    # A single point has no sample standard deviation
+    assert numpy.isnan(std[5]).all()
+
+
+def test_group_points():
+    data                = pandas.DataFrame({
+                            "Ride-Height-Number": [1.0, 1.0, 2.0, 1.0],
+                            "YAW": [0.0, 2.0, 0.0, 0.0],
+                            "RRS_SPEED": [40.0, 40.0, 40.0, 40.0]})
+    groups, conditions  = repeatability.group_points(data)
+    assert groups.tolist() == [0, 1, 2, 0]
+    assert conditions.values.tolist() == [[1.0, 0.0, 40.0], [1.0, 2.0, 40.0], [2.0, 0.0, 40.0]]
@@ -0,0 +1,29 @@
+import numpy
+import pytest
+
+from shared import SharedArrays, attach_block
+
+
+def test_attach_and_cleanup():
+    grid        = numpy.arange(12, dtype=numpy.float32).reshape(4, 3)
+    triangles   = numpy.array([[0, 1, 2], [0, 2, 3]])
+    published   = SharedArrays.publish({"grid": grid, "triangles": triangles, "empty": numpy.empty((0, 3))})
+    names       = [block[0] for block in published.descriptor.values()]
+
+    with SharedArrays.attach(published.descriptor) as attached:
+        numpy.testing.assert_array_equal(attached["grid"], grid)
+        numpy.testing.assert_array_equal(attached["triangles"], triangles)
+        assert attached["grid"].dtype == numpy.float32
+        assert attached["empty"].shape == (0, 3)
+        with pytest.raises(ValueError):
+            attached["grid"][0, 0] = 1.0
+
+    # Closing an attached copy leaves the blocks; closing the owner frees them
+    with SharedArrays.attach(published.descriptor) as attached:
+        assert attached["grid"][1, 1] == 4.0
+
+    published.close()
+    assert published.blocks == {}
+    for name in names:
+        with pytest.raises(FileNotFoundError):
+            attach_block(name)
@@ -0,0 +1,103 @@
+import numpy
+import pytest
+
+import utils
+
+
+def holed_square():
+    """Return the (facets x 3 x 3) vertices of a 3 x 3 grid of squares without the middle one"""
+
+    facets  = []
+    for i in range(3):
+        for j in range(3):
+            if (i, j) == (1, 1):
+                continue
+            a, b, c, d  = (i, j, 0), (i + 1, j, 0), (i + 1, j + 1, 0), (i, j + 1, 0)
+            facets      += [[a, b, c], [a, c, d]]
+
+    return numpy.array(facets, dtype=numpy.float32)
+
+
+def write_ascii(filename, facets):
+    with open(filename, "w") as f:
+        f.write("solid holed\n")
+        for facet in facets:
+            f.write("  facet normal 0 0 1\n    outer loop\n")
+            for vertex in facet:
+                f.write("      vertex {} {} {}\n".format(*vertex))
+            f.write("    endloop\n  endfacet\n")
+        f.write("endsolid holed\n")
+
+
+def write_binary(filename, facets):
+    records             = numpy.zeros(len(facets), dtype=utils.STL_FACET)
+    records["normal"]   = [0.0, 0.0, 1.0]
+    records["vertices"] = facets
+    with open(filename, "wb") as f:
+        f.write(b"holed".ljust(80, b" "))
+        f.write(numpy.array([len(facets)], dtype="<u4").tobytes())
+        f.write(records.tobytes())
+
+
+@pytest.fixture(params=["ascii", "binary"])
+def stl_path(request, tmp_path):
+    path    = str(tmp_path / "holed_{}.stl".format(request.param))
+    (write_ascii if request.param == "ascii" else write_binary)(path, holed_square())
+    return path
+
+
+def test_read_stl_facets(stl_path):
+    facets  = utils.read_stl_facets(stl_path)
+    assert facets.dtype == numpy.float32
+    numpy.testing.assert_array_equal(facets, holed_square())
+
+
+def test_weld_vertices(stl_path):
+    points, triangles   = utils.weld_vertices(utils.read_stl_facets(stl_path))
+    assert points.shape == (16, 3)
+    assert triangles.shape == (16, 3)
+    numpy.testing.assert_array_equal(points[triangles], holed_square())
+
+
+def test_weld_vertices_drops_collapsed_triangles():
+    facets              = numpy.array([[[0, 0, 0], [1, 0, 0], [0, 1, 0]], [[0, 0, 0], [0, 0, 0], [1, 0, 0]]], dtype=numpy.float32)
+    points, triangles   = utils.weld_vertices(facets)
+    assert len(points) == 3
+    assert triangles.tolist() == [[0, 1, 2]]
+
+
+def test_boundary_loops(stl_path):
+    points, triangles   = utils.weld_vertices(utils.read_stl_facets(stl_path))
+    loops               = utils.boundary_loops(utils.boundary_edges(triangles))
+    assert sorted(len(loop) for loop in loops) == [5, 13]
+    for loop in loops:
+        assert loop[0] == loop[-1]
+
+    inner   = min(loops, key=len)
+    assert sorted(map(tuple, points[inner[:-1], :2].tolist())) == [(1, 1), (1, 2), (2, 1), (2, 2)]
+
+
+def test_read_stl_border(stl_path):
+    points, triangulation, axes, border = utils.read_stl(stl_path, triangulation=True)
+    assert axes == [0, 1]
+    assert len(triangulation.triangles) == 16
+    assert border.shape == (13 + 1 + 5, 3)
+    assert numpy.isnan(border).all(axis=1).sum() == 1
+
+
+def test_read_stl_matches_vtk(stl_path):
+    vtk         = pytest.importorskip("vtk")
+    from vtk.util.numpy_support import vtk_to_numpy
+
+    reader      = vtk.vtkSTLReader()
+    reader.SetFileName(stl_path)
+    reader.Update()
+    output      = reader.GetOutput()
+    expected    = vtk_to_numpy(output.GetPoints().GetData())
+    cells       = vtk_to_numpy(output.GetPolys().GetConnectivityArray()).reshape(-1, 3)
+
+    points, triangles   = utils.weld_vertices(utils.read_stl_facets(stl_path))
+    assert len(points) == len(expected)
+    assert len(triangles) == len(cells)
+    assert sorted(map(tuple, points.tolist())) == sorted(map(tuple, expected.tolist()))
+    numpy.testing.assert_array_equal(points[triangles], expected[cells])
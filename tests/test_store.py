@@ -0,0 +1,57 @@
+import os
+
+import numpy
+
+from store import FieldStore, RenderManifest
+
+
+def test_render_manifest_skip(tmp_path):
+    directory   = str(tmp_path)
+    path        = os.path.join(directory, "Run_11_vs_10", "a.png")
+    manifest    = RenderManifest(directory)
+    assert not manifest.is_current(path, "k1")
+
+    # Recorded but not yet written, then written
+    manifest.update(path, "k1", target="11.01")
+    assert not manifest.is_current(path, "k1")
+    os.makedirs(os.path.dirname(path))
+    open(path, "wb").close()
+    assert manifest.is_current(path, "k1")
+    manifest.flush()
+
+    manifest    = RenderManifest(directory)
+    assert manifest.is_current(path, "k1")
+    assert not manifest.is_current(path, "k2")
+    assert manifest.images() == [(path, {"key": "k1", "target": "11.01"})]
+
+    os.remove(path)
+    assert not manifest.is_current(path, "k1")
+    assert manifest.images() == []
+
+
+def test_field_store_rows(tmp_path):
+    path    = str(tmp_path / "store")
+    store   = FieldStore(path, 3, precision=numpy.float64)
+    assert store.append(numpy.array([1.0, 2.0, 3.0]), "a", kind="target", run_point="11.01") == 0
+    assert store.append(numpy.array([4.0, 5.0, 6.0]), "b", kind="reference") == 1
+    assert store.append(numpy.array([9.0, 9.0, 9.0]), "a") == 0
+    assert store.fields.dtype == numpy.float32
+    assert store.get(1).dtype == numpy.float64
+    assert store.get(1).tolist() == [4.0, 5.0, 6.0]
+
+    # Every row is current until the current keys are set
+    assert store.current_rows().tolist() == [0, 1]
+    store.append(numpy.array([7.0, 8.0, 9.0]), "c")
+    store.set_current(["c", "a", "c", "missing"])
+    assert store.current_rows().tolist() == [0, 2]
+    assert store.current_index.key.tolist() == ["a", "c"]
+    store.flush()
+
+    store   = FieldStore(path, 3)
+    assert len(store) == 3
+    assert store.find("b") == 1
+    assert store.current_rows().tolist() == [0, 2]
+    assert store.get(2).tolist() == [7.0, 8.0, 9.0]
+
+    # A store of another vertex count starts empty
+    assert len(FieldStore(path, 4)) == 0
@@ -0,0 +1,83 @@
+import os
+
+import workqueue
+
+
+def age(path, seconds):
+    """Date a file of the queue seconds earlier"""
+
+    mtime   = os.stat(path).st_mtime - seconds
+    os.utime(path, (mtime, mtime))
+
+
+def test_put_and_claim(tmp_path):
+    queue   = workqueue.WorkQueue(str(tmp_path))
+    assert queue.put("a", {"inputs": {"n": 1}})
+    assert queue.put("b", {"inputs": {"n": 2}})
+    assert not queue.put("a", {"inputs": {"n": 1}})
+
+    assert queue.claim("w1") == ("a", {"inputs": {"n": 1}})
+    assert queue.claim("w2") == ("b", {"inputs": {"n": 2}})
+    assert queue.claim("w1") is None
+    assert not queue.put("a", {"inputs": {"n": 1}})
+    assert queue.counts() == {"pending": 0, "claimed": 2, "done": 0, "failed": 0}
+
+
+def test_finish(tmp_path):
+    queue   = workqueue.WorkQueue(str(tmp_path))
+    queue.put("a", {"inputs": {}})
+    queue.put("b", {"inputs": {}})
+    queue.claim("w1")
+    queue.claim("w1")
+
+    assert queue.finish("a", "w1", "done", shard="s")
+    assert queue.finish("b", "w1", "failed", error="e")
+    assert queue.read(queue.path("done", "a.json")) == {"inputs": {}, "shard": "s", "worker": "w1"}
+    assert queue.counts() == {"pending": 0, "claimed": 0, "done": 1, "failed": 1}
+
+    # Done jobs are not queued again, failed jobs are retried
+    assert not queue.put("a", {"inputs": {}})
+    assert queue.put("b", {"inputs": {}})
+    assert queue.counts()["failed"] == 0
+
+    # A lost claim drops the outcome
+    assert not queue.finish("c", "w1", "done")
+
+
+def test_requeue_dead(tmp_path):
+    queue   = workqueue.WorkQueue(str(tmp_path))
+    for job_id in ["a", "b", "c"]:
+        queue.put(job_id, {"inputs": {}})
+    queue.heartbeat("alive")
+    queue.heartbeat("dead")
+    queue.claim("alive")
+    queue.claim("dead")
+    queue.claim("starting")
+
+    age(queue.path("workers", "dead"), 600)
+    now     = queue.heartbeat("other")
+    assert queue.requeue_dead(now, timeout=60) == ["b"]
+    assert "dead" not in queue.workers()
+
+    # A claim without a heartbeat file is only dead once older than the timeout
+    age(queue.path("claimed", "c@starting.json"), 600)
+    assert queue.requeue_dead(now, timeout=60) == ["c"]
+    assert queue.jobs("pending") == ["b.json", "c.json"]
+    assert queue.jobs("claimed") == ["a@alive.json"]
+
+    assert queue.finish("a", "alive", "done")
+    assert not queue.finish("b", "dead", "done")
+
+
+def test_point_job_id(tmp_path):
+    path        = tmp_path / "run_D1.asc"
+    path.write_text("data")
+    job_inputs  = {"target_data_paths": [str(path)], "run_points": ["11.01"], "save_directory": str(tmp_path)}
+    job_id      = workqueue.point_job_id(job_inputs)
+    assert job_id.startswith("11.01_")
+    assert workqueue.point_job_id(dict(job_inputs)) == job_id
+
+    # Edited data supersedes the job
+    mtime       = os.stat(str(path)).st_mtime_ns + 10**9
+    os.utime(str(path), ns=(mtime, mtime))
+    assert workqueue.point_job_id(job_inputs) != job_id
@@ -0,0 +1,44 @@
+import numpy
+
+import zones
+
+
+def square_grid(n=4):
+    """Return the points and triangles of an (n - 1) x (n - 1) grid of unit squares"""
+
+    x, y        = numpy.meshgrid(numpy.arange(n, dtype=numpy.float64), numpy.arange(n, dtype=numpy.float64))
+    points      = numpy.column_stack((x.ravel(), y.ravel(), numpy.zeros(n*n)))
+    corner      = (numpy.arange(n - 1)[:, None]*n + numpy.arange(n - 1)[None, :]).ravel()
+    triangles   = numpy.vstack((
+                    numpy.column_stack((corner, corner + 1, corner + n + 1)),
+                    numpy.column_stack((corner, corner + n + 1, corner + n))))
+    return points, triangles
+
+
+def test_vertex_areas():
+    points, triangles   = square_grid()
+    assert abs(zones.vertex_areas(points, triangles).sum() - 9.0) < 1e-12
+
+
+def test_zone_masks_and_averages():
+    points, triangles   = square_grid()
+    definitions         = [
+                            {"name": "left", "polygon": [[-0.5, -0.5], [1.5, -0.5], [1.5, 3.5], [-0.5, 3.5]]},
+                            {"name": "pair", "vertices": [6, 5, 5]},
+                            {"name": "outside", "polygon": [[10, 10], [11, 10], [11, 11]]}]
+    masks               = zones.zone_masks(points, triangles, [0, 1], definitions)
+    areas               = zones.vertex_areas(points, triangles)
+
+    assert masks.shape == (3, 16)
+    left                = numpy.flatnonzero(points[:, 0] < 1.5)
+    assert sorted(masks[0].indices.tolist()) == left.tolist()
+    assert sorted(masks[1].indices.tolist()) == [5, 6]
+    assert masks[2].nnz == 0
+    numpy.testing.assert_allclose(numpy.asarray(masks.sum(axis=1)).ravel(), [1.0, 1.0, 0.0])
+
+    # Area-weighted means of Cp = x, for the given rows
+    fields              = numpy.vstack((numpy.zeros(16), points[:, 0], numpy.ones(16))).astype(numpy.float32)
+    means               = zones.zone_averages(fields, masks, chunk_size=1, rows=[1, 2])
+    expected            = (areas[left]*points[left, 0]).sum()/areas[left].sum()
+    numpy.testing.assert_allclose(means[0], [expected, 1.5, 0.0], atol=1e-12)
+    numpy.testing.assert_allclose(means[1], [1.0, 1.0, 0.0], atol=1e-12)
@@ -1,20 +1,24 @@
 import os
-import vtk
+import re
 import json
+import socket
+import hashlib
+import functools
 import numpy
 import pandas
-from vtk.util import numpy_support
-from matplotlib.colors import LinearSegmentedColormap
-from matplotlib.tri import Triangulation
-from scipy.spatial import KDTree
-from PyQt5.QtCore import QFile, QIODevice, QTextStream
 
-import resources
+import assets
+import constants
+
+# SciPy, matplotlib and the Qt resources are imported by the functions
+# that need them, so importing this module stays cheap
 
 
 def sort_perimeter(data):
     """Sort a pool of points in perimeter order"""
 
+    from scipy.spatial import KDTree
+
     pool    = numpy.array(data)
     query   = pool[0, :]
     pool    = pool[1:, :]
@@ -38,51 +42,178 @@ def sort_perimeter(data):
     return order
 
 
-def read_stl(filename, triangulation=False):
-    """Read an ASCII or binary STL file"""
+def hash_arrays(*arrays):
+    """Return a content hash (hex) of the given arrays and strings"""
+
+    digest  = hashlib.sha1()
+    for array in arrays:
+        if isinstance(array, str):
+            digest.update(array.encode("utf-8"))
+        else:
+            array   = numpy.ascontiguousarray(array)
+            digest.update(str((array.dtype.str, array.shape)).encode("utf-8"))
+            digest.update(array.tobytes())
+
+    return digest.hexdigest()
+
+
+def file_stamp(path):
+    """Return the [absolute path, modification time (ns), size] of a file ([path] if missing)"""
+
+    if not path or not os.path.exists(path):
+        return [path]
+
+    stat    = os.stat(path)
+    return [os.path.abspath(path), stat.st_mtime_ns, stat.st_size]
+
+
+def temporary_path(path):
+    """Return a temporary path next to a file, unique to this host and process
+
+    Written there and moved into place with os.replace, a cache file is
+    never seen half written, even by other nodes sharing the directory.
+    The extension is kept so numpy does not append its own.
+    """
+
+    root, extension = os.path.splitext(path)
+    return "{}.{}-{}.tmp{}".format(root, socket.gethostname(), os.getpid(), extension)
+
+
+STL_FACET           = numpy.dtype([("normal", "<f4", 3), ("vertices", "<f4", (3, 3)), ("attribute", "<u2")])
+STL_ASCII_VERTEX    = re.compile(rb"vertex\s+(\S+)\s+(\S+)\s+(\S+)")
+
+
+def read_stl_facets(filename):
+    """Return the (facets x 3 x 3) float32 vertices of an ASCII or binary STL
+
+    Binary files are memory-mapped; ASCII files are parsed a block of whole
+    lines at a time.
+    """
+
+    size    = os.path.getsize(filename)
+    with open(filename, "rb") as f:
+        header  = f.read(84)
+
+    if len(header) == 84:
+        count   = int(numpy.frombuffer(header[80:84], dtype="<u4")[0])
+        if size == 84 + count*STL_FACET.itemsize:
+            if count == 0:
+                return numpy.zeros((0, 3, 3), dtype=numpy.float32)
+            return numpy.memmap(filename, dtype=STL_FACET, mode="r", offset=84, shape=(count,))["vertices"]
+
+    blocks  = []
+    rest    = b""
+    with open(filename, "rb") as f:
+        for chunk in iter(lambda: f.read(constants.STL_ASCII_BLOCK_SIZE), b""):
+            text            = rest + chunk
+            end             = text.rfind(b"\n") + 1
+            vertices        = STL_ASCII_VERTEX.findall(text[:end])
+            rest            = text[end:]
+            blocks.append(numpy.array(vertices, dtype=numpy.float32).reshape(-1, 3))
+
+    blocks.append(numpy.array(STL_ASCII_VERTEX.findall(rest), dtype=numpy.float32).reshape(-1, 3))
+
+    return numpy.concatenate(blocks).reshape(-1, 3, 3)
+
+
+def weld_vertices(vertices):
+    """Merge identical vertices (in order of first use)
+
+    Returns the unique points and the (facets x 3) triangles indexing them;
+    triangles that collapse onto fewer than three points are dropped.
+    """
+
+    corners                 = numpy.ascontiguousarray(vertices.reshape(-1, 3)) + numpy.float32(0.0)
+    rows                    = corners.view(numpy.dtype((numpy.void, corners.dtype.itemsize*3))).ravel()
+    _, first, inverse       = numpy.unique(rows, return_index=True, return_inverse=True)
+    order                   = numpy.argsort(first)
+    rank                    = numpy.empty_like(order)
+    rank[order]             = numpy.arange(len(order))
+    points                  = corners[first[order]]
+    triangles               = rank[inverse.ravel()].reshape(-1, 3).astype(numpy.int64)
+    keep                    = (triangles[:, 0] != triangles[:, 1]) & (triangles[:, 1] != triangles[:, 2]) & (triangles[:, 2] != triangles[:, 0])
+    return points, triangles[keep]
+
+
+def vertex_normals(points, triangles):
+    """Return the unit normals at the vertices (mean of the adjacent facet normals)"""
+
+    points  = numpy.asarray(points, dtype=numpy.float64)
+    facets  = numpy.cross(points[triangles[:, 1]] - points[triangles[:, 0]], points[triangles[:, 2]] - points[triangles[:, 0]])
+    facets  /= numpy.maximum(numpy.linalg.norm(facets, axis=1), 1e-300)[:, None]
+    normals = numpy.zeros_like(points)
+    for i in range(3):
+        numpy.add.at(normals, triangles[:, i], facets)
+
+    return normals/numpy.maximum(numpy.linalg.norm(normals, axis=1), 1e-300)[:, None]
+
+
+def boundary_edges(triangles):
+    """Return the (edges x 2) boundary edges (used by one triangle), as oriented in it"""
+
+    edges               = numpy.vstack((triangles[:, [0, 1]], triangles[:, [1, 2]], triangles[:, [2, 0]]))
+    keys                = edges.min(axis=1)*(int(edges.max()) + 1) + edges.max(axis=1)
+    _, inverse, counts  = numpy.unique(keys, return_inverse=True, return_counts=True)
+    return edges[counts[inverse.ravel()] == 1]
+
+
+def boundary_loops(edges):
+    """Chain boundary edges into closed loops of vertex ids (first id repeated)"""
+
+    following   = {}
+    for a, b in edges:
+        following.setdefault(a, []).append(b)
+
+    loops   = []
+    while following:
+        start   = next(iter(following))
+        loop    = [start]
+        vertex  = start
+        while vertex in following:
+            targets = following[vertex]
+            after   = targets.pop()
+            if not targets:
+                del following[vertex]
+            loop.append(after)
+            vertex  = after
+            if vertex == start:
+                break
+
+        loops.append(loop)
+
+    return loops
+
+
+def read_stl(filename, triangulation=False, dtype=None):
+    """Read an ASCII or binary STL file
+
+    Identical vertices are welded, the plot plane axes are the two axes
+    across the mean vertex normal and the border is the chain of boundary
+    edges (loops separated by NaN rows). The points (and border) are
+    returned as read (float32) unless a dtype is given.
+    """
     
     if not os.path.exists(filename):
         return None if not triangulation else None, None
 
-    # Read in the STL with VTK
-    reader  = vtk.vtkSTLReader()
-    reader.SetFileName(filename)
-    reader.Update()
-    data    = reader.GetOutput()
-    points  = numpy_support.vtk_to_numpy(data.GetPoints().GetData())
+    from matplotlib.tri import Triangulation
+
+    points, triangles   = weld_vertices(read_stl_facets(filename))
+    if dtype is not None:
+        points  = points.astype(dtype)
 
     if not triangulation:
         return points
 
     # Compute the average normal
-    normals_filter  = vtk.vtkPolyDataNormals()
-    normals_filter.SetInputData(data)
-    normals_filter.ComputeCellNormalsOn()
-    normals_filter.Update()
-    
-    normals_data    = normals_filter.GetOutput().GetPointData().GetNormals()
-    normals         = numpy_support.vtk_to_numpy(normals_data)
-    normals_mean    = numpy.mean(normals_data, axis=0)
+    normals_mean    = numpy.mean(vertex_normals(points, triangles), axis=0)
     normals_ordered = numpy.argsort(numpy.absolute(normals_mean))
     axes            = sorted(normals_ordered[:-1])
-    normal_idx      = normals_ordered[-1]
-   
+
     # Extract the border
-    feature_edges   = vtk.vtkFeatureEdges()
-    feature_edges.SetInputData(data)
-    feature_edges.BoundaryEdgesOn()
-    feature_edges.FeatureEdgesOff()
-    feature_edges.NonManifoldEdgesOff()
-    feature_edges.ManifoldEdgesOff()
-    feature_edges.Update()
-    border  = numpy_support.vtk_to_numpy(feature_edges.GetOutput().GetPoints().GetData())
-    border  = sort_perimeter(border)
-
-    # Compute the triangulation
-    n           = data.GetNumberOfCells()
-    triangles   = numpy.ndarray((n, 3), dtype=numpy.int64)
-    for i in range(n):
-        triangles[i, :] = [data.GetCell(i).GetPointId(j) for j in range(3)]
+    loops   = boundary_loops(boundary_edges(triangles))
+    gap     = numpy.full((1, 3), numpy.nan, dtype=points.dtype)
+    border  = numpy.vstack(sum([[points[loop], gap] for loop in loops], [])[:-1]) if loops else points[:0]
 
     x               = points[:, axes[0]]
     y               = points[:, axes[1]]
@@ -91,16 +222,201 @@ def read_stl(filename, triangulation=False):
 
 
 
-def read_d1(filename):
-    """Read a D1.asc file (raw Windshear data)"""
-    
-    skiprows            = [0, 1, 2, 4]
-    data                = pandas.read_csv(filename, skiprows=skiprows, delimiter="\t")
+def read_d1_header(filename):
+    """Read the column names from the header row of a D1.asc file"""
+
+    with open(filename, "r") as f:
+        for i, line in enumerate(f):
+            if i == constants.D1_HEADER_ROW:
+                return line.rstrip("\r\n").split(constants.D1_DELIMITER)
+
+    return []
+
+
+def format_run_point(run, point):
+    """Build the run.point labels (e.g. 11.02) from integer run/point codes"""
+
+    codes           = numpy.rint(run).astype(numpy.int64)*1000 + numpy.rint(point).astype(numpy.int64)
+    unique, inverse = numpy.unique(codes, return_inverse=True)
+    labels          = numpy.array(
+                        ["{}.{:02d}".format(code//1000, code%1000) for code in unique],
+                        dtype=object)
+    return labels[inverse.ravel()]
+
+
+def select_d1_columns(header, channels):
+    """Select the run/condition columns and the columns of the given channels"""
+
+    if channels is None:
+        return list(header)
+
+    prefixes    = set(str(channel) for channel in channels)
+    lengths     = sorted(set(len(prefix) for prefix in prefixes))
+    return [c for c in header if c in constants.D1_COLUMNS or any(c[:n] in prefixes for n in lengths)]
+
+
+def d1_cache_path(filename):
+    """Return the sidecar cache directory of a D1.asc file"""
+    return filename + constants.D1_CACHE_SUFFIX
+
+
+def d1_cache_stamp(filename):
+    """Return the source file stamp the sidecar cache is validated against"""
+
+    stat    = os.stat(filename)
+    return {
+        "version": constants.D1_CACHE_VERSION,
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+    }
+
+
+def read_d1_cache(filename, channels):
+    """Read the cached projected columns of a D1.asc file
+
+    Returns the header and the memory-mapped (columns, meta values, tap
+    values), or None if the cache is missing, stale or lacks a column.
+    """
+
+    path    = d1_cache_path(filename)
+    try:
+        with open(os.path.join(path, "index.json"), "r") as f:
+            index   = json.load(f)
+
+        if index.get("stamp") != d1_cache_stamp(filename):
+            return None
+
+        header  = index["header"]
+        columns = select_d1_columns(header, channels)
+        if not set(columns).issubset(index["meta"] + index["taps"]):
+            return None
+
+        meta_values = numpy.load(os.path.join(path, "meta.npy"), mmap_mode="r")
+        tap_values  = numpy.load(os.path.join(path, "taps.npy"), mmap_mode="r")
+
+    except (OSError, ValueError, KeyError):
+        return None
+
+    meta    = [c for c in columns if c in constants.D1_COLUMNS]
+    taps    = [c for c in columns if c not in constants.D1_COLUMNS]
+    if meta != index["meta"]:
+        position    = {c: i for i, c in enumerate(index["meta"])}
+        meta_values = meta_values[:, [position[c] for c in meta]]
+    if taps != index["taps"]:
+        position    = {c: i for i, c in enumerate(index["taps"])}
+        tap_values  = tap_values[:, [position[c] for c in taps]]
+
+    return header, meta, meta_values, taps, tap_values
+
+
+def write_d1_cache(filename, stamp, header, meta, meta_values, taps, tap_values):
+    """Write the projected columns of a D1.asc file to its sidecar cache
+
+    The index is written last so a partially written cache is never valid.
+    Unwritable locations (read-only shares) are silently skipped.
+    """
+
+    path    = d1_cache_path(filename)
+    try:
+        if not os.path.exists(path):
+            os.makedirs(path)
+
+        index_path  = os.path.join(path, "index.json")
+        if os.path.exists(index_path):
+            os.remove(index_path)
+
+        for name, values in [("meta.npy", meta_values), ("taps.npy", tap_values)]:
+            temporary   = temporary_path(os.path.join(path, name))
+            numpy.save(temporary, values)
+            os.replace(temporary, os.path.join(path, name))
+
+        index       = {"stamp": stamp, "header": header, "meta": meta, "taps": taps}
+        temporary   = temporary_path(index_path)
+        with open(temporary, "w") as f:
+            json.dump(index, f)
+        os.replace(temporary, index_path)
+
+    except OSError:
+        pass
+
+
+def finalize_d1(data):
+    """Round the test conditions and add the run.point labels"""
+
     data["YAW"]         = data.YAW.round(2)
     data["RRS_SPEED"]   = data.RRS_SPEED.round(1)
-    data["run_point"]   = data["Run Number"].round(0).astype(str) + "." + data["Point Number"].round(0).astype(str).str.zfill(2)
-    data["run_point"]   = data.run_point.astype(str)
-    return data
+    run_point           = pandas.Series(
+                            format_run_point(data["Run Number"].values, data["Point Number"].values),
+                            index=data.index,
+                            name="run_point")
+    return pandas.concat([data, run_point], axis=1)
+
+
+def read_d1(filename, channels=None, cache=True):
+    """Read a D1.asc file (raw Windshear data)
+
+    Only the run/condition columns and the columns starting with one of the
+    given channel names are parsed (all columns when channels is None). The
+    run/condition columns are float64 and the channel columns float32; a
+    projected read parses one float64 block and casts the channels after.
+
+    Projected reads are stored in a memory-mapped sidecar cache next to the
+    file (D1.asc.cache) and reused while the file size and mtime match.
+    """
+
+    if channels is None:
+        header  = read_d1_header(filename)
+        data    = pandas.read_csv(
+                    filename,
+                    skiprows=constants.D1_SKIPROWS,
+                    delimiter=constants.D1_DELIMITER,
+                    dtype={c: constants.D1_COLUMNS[c] for c in header if c in constants.D1_COLUMNS})
+        return finalize_d1(data)
+
+    cached  = read_d1_cache(filename, channels) if cache else None
+    if cached is not None:
+        header, meta, meta_values, taps, tap_values = cached
+        data    = pandas.concat([
+                    pandas.DataFrame(meta_values, columns=meta),
+                    pandas.DataFrame(tap_values, columns=taps),
+                  ], axis=1)
+        return finalize_d1(data)
+
+    # Parse only the projected columns as one float64 block (numpy's parser
+    # is about twice as fast as pandas' here; pandas reads the files with
+    # empty fields, as NaN), then cast the channels
+    stamp       = d1_cache_stamp(filename)
+    header      = read_d1_header(filename)
+    columns     = select_d1_columns(header, channels)
+    meta        = [c for c in columns if c in constants.D1_COLUMNS]
+    taps        = [c for c in columns if c not in constants.D1_COLUMNS]
+    try:
+        values  = numpy.loadtxt(
+                    filename,
+                    dtype=numpy.float64,
+                    delimiter=constants.D1_DELIMITER,
+                    skiprows=max(constants.D1_SKIPROWS) + 1,
+                    usecols=[header.index(c) for c in columns],
+                    ndmin=2)
+    except ValueError:
+        values  = pandas.read_csv(
+                    filename,
+                    skiprows=constants.D1_SKIPROWS,
+                    delimiter=constants.D1_DELIMITER,
+                    usecols=columns).to_numpy(dtype=numpy.float64)
+    position    = {c: i for i, c in enumerate(columns)}
+    meta_values = values[:, [position[c] for c in meta]]
+    tap_values  = values[:, [position[c] for c in taps]].astype(constants.D1_CHANNEL_DTYPE)
+    del values
+
+    if cache:
+        write_d1_cache(filename, stamp, header, meta, meta_values, taps, tap_values)
+
+    data    = pandas.concat([
+                pandas.DataFrame(meta_values, columns=meta, copy=False),
+                pandas.DataFrame(tap_values, columns=taps, copy=False),
+              ], axis=1)
+    return finalize_d1(data)
 
 
 def read_channel_map(filename):
@@ -109,28 +425,38 @@ def read_channel_map(filename):
 
 
 def read_colormap(filename, resource=True):
-    """Read a ParaView JSON colormap file"""
+    """Read a ParaView JSON colormap file
 
-    if not os.path.exists(filename) and not resource:
-        return None
+    Built-in colormaps (resource=True) are read from the packaged static
+    files, falling back to the compiled Qt resources, once per process.
+    """
 
     if resource:
-        stream  = QFile(":static/colormaps/{}".format(filename))
-        stream.open(QIODevice.ReadOnly)
-        text    = QTextStream(stream).readAll()
-        data    = json.loads(text)[0]
-        stream.close()
-
-    else:
-        with open(filename, "r") as f:
-            data    = json.load(f)[0]
-        
+        return read_builtin_colormap(filename)
+
+    if not os.path.exists(filename):
+        return None
+
+    with open(filename, "r") as f:
+        return parse_colormap(json.load(f)[0])
+
+
+@functools.lru_cache(maxsize=None)
+def read_builtin_colormap(filename):
+    """Read a built-in colormap (cached, the colormaps are never modified)"""
+
+    text    = assets.read_asset("colormaps", filename).decode("utf-8")
+    return parse_colormap(json.loads(text)[0])
+
+
+def parse_colormap(data):
+    """Return the matplotlib colormap of a ParaView colormap definition"""
+
+    from matplotlib.colors import LinearSegmentedColormap
+
     name    = data.get("Name", "New Colormap")
     colors  = data.get("RGBPoints", [])
     n       = int(len(colors)/4)
     colors  = numpy.array(colors).reshape((n, 4))
 
     return LinearSegmentedColormap.from_list(name, colors[:, 1:])
-
-
-
@@ -0,0 +1,395 @@
+import os
+import sys
+import json
+import time
+import socket
+import threading
+
+import utils
+import constants
+
+
+def worker_name():
+    """Return the name of this worker process (host and process id)"""
+    return "{}-{}".format(socket.gethostname(), os.getpid()).replace("@", "-")
+
+
+class WorkQueue(object):
+    """Queue of point-render jobs in a shared directory (no broker service)
+
+    Jobs are JSON files moving between state directories:
+
+        pending/<job>.json              waiting to be claimed
+        claimed/<job>@<worker>.json     being rendered by a worker
+        done/<job>.json                 rendered (with the worker's shard)
+        failed/<job>.json               raised an error
+        workers/<worker>                heartbeat of a running worker
+
+    A job is claimed by renaming it from pending to claimed, which is
+    atomic on a shared filesystem (NFS included), so exactly one worker
+    wins each job; the claim is then touched to date it. Workers touch
+    their heartbeat file while running; the jobs claimed by a worker whose
+    heartbeat is older than the timeout are renamed back to pending by any
+    other worker. Times are compared as file
+    modification times of the shared filesystem, so the node clocks need
+    not agree.
+    """
+
+    STATES  = ["pending", "claimed", "done", "failed", "workers", "shards"]
+
+    def __init__(self, directory):
+        self.directory  = os.path.abspath(directory)
+        for state in self.STATES:
+            if not os.path.exists(self.path(state)):
+                os.makedirs(self.path(state), exist_ok=True)
+
+
+    def path(self, *parts):
+        return os.path.join(self.directory, *parts)
+
+
+    def write(self, path, data):
+        """Write a JSON file atomically"""
+
+        temporary   = utils.temporary_path(path)
+        with open(temporary, "w") as f:
+            json.dump(data, f, indent=4)
+        os.replace(temporary, path)
+
+
+    def read(self, path):
+        with open(path, "r") as f:
+            return json.load(f)
+
+
+    def jobs(self, state):
+        """Return the sorted job file names of a state"""
+        return sorted(name for name in os.listdir(self.path(state)) if name.endswith(".json"))
+
+
+    def counts(self):
+        """Return the number of jobs in each state"""
+        return {state: len(self.jobs(state)) for state in ["pending", "claimed", "done", "failed"]}
+
+
+    def put(self, job_id, job):
+        """Add a job unless it is already queued, claimed or done (failed jobs are retried)"""
+
+        if any(os.path.exists(self.path(state, job_id + ".json")) for state in ["pending", "done"]):
+            return False
+        if any(name.startswith(job_id + "@") for name in self.jobs("claimed")):
+            return False
+
+        self.write(self.path("pending", job_id + ".json"), job)
+        if os.path.exists(self.path("failed", job_id + ".json")):
+            os.remove(self.path("failed", job_id + ".json"))
+        return True
+
+
+    def claim(self, worker):
+        """Claim the next pending job, returning its id and job (None if none left)"""
+
+        for name in self.jobs("pending"):
+            job_id  = name[:-len(".json")]
+            claimed = self.path("claimed", "{}@{}.json".format(job_id, worker))
+            try:
+                os.rename(self.path("pending", name), claimed)
+                os.utime(claimed, None)
+            except OSError:
+                continue
+
+            return job_id, self.read(claimed)
+
+        return None
+
+
+    def finish(self, job_id, worker, state, **attributes):
+        """Move a claimed job to done or failed with the attributes of its outcome
+
+        Returns False if the claim was lost (the job was re-queued after the
+        worker was taken for dead), in which case the outcome is dropped.
+        """
+
+        claimed = self.path("claimed", "{}@{}.json".format(job_id, worker))
+        try:
+            job = self.read(claimed)
+        except OSError:
+            return False
+
+        job.update(attributes, worker=worker)
+        self.write(self.path(state, job_id + ".json"), job)
+        try:
+            os.remove(claimed)
+        except OSError:
+            pass
+
+        return True
+
+
+    def heartbeat(self, worker):
+        """Touch the heartbeat file of a worker and return its modification time"""
+
+        path    = self.path("workers", worker)
+        if not os.path.exists(path):
+            self.write(path, {"host": socket.gethostname(), "pid": os.getpid()})
+        os.utime(path, None)
+        return os.stat(path).st_mtime
+
+
+    def remove_worker(self, worker):
+        try:
+            os.remove(self.path("workers", worker))
+        except OSError:
+            pass
+
+
+    def workers(self):
+        """Return the heartbeat modification time of each worker"""
+
+        times   = {}
+        for worker in os.listdir(self.path("workers")):
+            try:
+                times[worker]   = os.stat(self.path("workers", worker)).st_mtime
+            except OSError:
+                pass
+
+        return times
+
+
+    def requeue_dead(self, now, timeout=constants.QUEUE_HEARTBEAT_TIMEOUT):
+        """Return the jobs of workers without a heartbeat since now - timeout to pending
+
+        now is a modification time of the shared filesystem (e.g. that of
+        the caller's own heartbeat). The claims are listed before the
+        heartbeats are read, so a worker that starts and claims a job in
+        between is seen as alive. A claim of a worker without any heartbeat
+        file is only taken for dead once the claim itself is older than the
+        timeout. Returns the re-queued job ids.
+        """
+
+        claims  = self.jobs("claimed")
+        workers = self.workers()
+        dead    = set(worker for worker, mtime in workers.items() if now - mtime > timeout)
+        queued  = []
+        for name in claims:
+            job_id, worker  = name[:-len(".json")].split("@", 1)
+            if worker in workers and worker not in dead:
+                continue
+            if worker not in workers:
+                try:
+                    if now - os.stat(self.path("claimed", name)).st_mtime <= timeout:
+                        continue
+                except OSError:
+                    continue
+            try:
+                os.rename(self.path("claimed", name), self.path("pending", job_id + ".json"))
+                queued.append(job_id)
+            except OSError:
+                pass
+
+        for worker in dead:
+            self.remove_worker(worker)
+
+        return queued
+
+
+class Heartbeat(object):
+    """Touch a worker's heartbeat file from a background thread"""
+
+    def __init__(self, queue, worker, interval=constants.QUEUE_HEARTBEAT_INTERVAL):
+        self.queue      = queue
+        self.worker     = worker
+        self.interval   = interval
+        self.stopped    = threading.Event()
+        self.thread     = threading.Thread(target=self.run, daemon=True)
+
+
+    def run(self):
+        while not self.stopped.wait(self.interval):
+            try:
+                self.queue.heartbeat(self.worker)
+            except OSError:
+                pass
+
+
+    def __enter__(self):
+        self.queue.heartbeat(self.worker)
+        self.thread.start()
+        return self
+
+
+    def __exit__(self, *args):
+        self.stopped.set()
+        self.thread.join()
+        self.queue.remove_worker(self.worker)
+
+
+def point_job_id(job_inputs):
+    """Return the id of a point job: its run point and the hash of its inputs and data file stamps"""
+
+    import batch
+
+    paths   = list(job_inputs["target_data_paths"]) + [job_inputs.get(name) for name in batch.DATA_INPUTS]
+    stamps  = [utils.file_stamp(path) for path in paths]
+    return "{}_{}".format(job_inputs["run_points"][0], utils.hash_arrays(json.dumps([job_inputs, stamps], sort_keys=True))[:12])
+
+
+def enqueue_points(directory, inputs):
+    """Queue one job per plotted target point of plot inputs and return the number added
+
+    The jobs of a point are identified by the hash of its inputs and the
+    stamps of their data files (see point_job_id), so queuing the same
+    inputs again adds nothing while edited data is queued anew.
+    """
+
+    import pipeline
+
+    if inputs.get("parts"):
+        raise ValueError("Plots of several grid parts cannot be split into point jobs")
+
+    queue           = WorkQueue(directory)
+    channel_map     = utils.read_channel_map(inputs.get("channel_map_path"))
+    reference_data  = utils.read_d1(inputs.get("reference_data_path"), channels=channel_map.channel)
+    references      = pipeline.reference_points(reference_data)
+    added           = 0
+    for path in pipeline.target_data_paths(inputs):
+        target_data = utils.read_d1(path, channels=channel_map.channel)
+        for j, item, item_ref in pipeline.matched_points(target_data, references):
+            job_inputs  = dict(inputs, target_data_paths=[path], run_points=[item["run_point"]], processes=1)
+            added       += queue.put(point_job_id(job_inputs), {"inputs": job_inputs})
+
+    return added
+
+
+def work(directory, worker=None, callback=None):
+    """Render queued jobs until none are pending or being rendered
+
+    The worker keeps polling while other workers hold claims, so the jobs
+    of a worker that dies are picked up. Jobs run on the local render
+    daemon if one is running, otherwise in this process (see
+    daemon.run_job), writing the images to the job's save directory and
+    the fields and render manifest to a shard of the worker. callback is
+    an optional function taking the job id and its outcome. Returns the
+    number of jobs rendered.
+    """
+
+    import daemon
+
+    queue   = WorkQueue(directory)
+    worker  = worker or worker_name()
+    count   = 0
+    with Heartbeat(queue, worker):
+        while True:
+            queue.requeue_dead(queue.heartbeat(worker))
+            claimed = queue.claim(worker)
+            if claimed is None:
+                if not queue.jobs("claimed"):
+                    break
+                time.sleep(constants.QUEUE_POLL_INTERVAL)
+                continue
+
+            job_id, job = claimed
+            shard       = queue.path("shards", "{}@{}".format(job_id, worker))
+            start       = time.perf_counter()
+            try:
+                daemon.run_job({"action": "plot", "inputs": dict(job["inputs"], shard_directory=shard)})
+                state   = "done"
+                outcome = {"shard": shard, "seconds": time.perf_counter() - start}
+            except Exception as error:
+                state   = "failed"
+                outcome = {"error": "{}: {}".format(type(error).__name__, error), "seconds": time.perf_counter() - start}
+
+            if queue.finish(job_id, worker, state, **outcome):
+                count   += state == "done"
+                if callback:
+                    callback(job_id, dict(outcome, state=state))
+
+    return count
+
+
+def collect(directory):
+    """Merge the shards of the done jobs into their save directories
+
+    The fields are added to the field store and the images to the render
+    manifest of each save directory, then its loads and report are written
+    as by a plot. Only the jobs of the current data are merged: a done job
+    whose id no longer matches its inputs and data file stamps (see
+    point_job_id) was superseded by the job of the edited data. Jobs are
+    merged in the order they finished, so the latest image of a path wins.
+    Returns the save directories.
+    """
+
+    import pipeline
+    from store import RenderManifest
+
+    queue       = WorkQueue(directory)
+    directories = {}
+    names       = sorted(queue.jobs("done"), key=lambda name: os.stat(queue.path("done", name)).st_mtime)
+    for name in names:
+        job     = queue.read(queue.path("done", name))
+        if name[:-len(".json")] != point_job_id(job["inputs"]):
+            continue
+        directories.setdefault(job["inputs"]["save_directory"], []).append(job)
+
+    for save_directory, jobs in directories.items():
+        inputs      = jobs[0]["inputs"]
+        contour     = pipeline.open_contour(inputs)
+        store       = pipeline.open_field_store(contour, save_directory)
+        manifest    = RenderManifest(save_directory)
+        current     = []
+        for job in jobs:
+            shard   = pipeline.open_field_store(contour, job["shard"])
+            for row, record in enumerate(shard.records):
+                store.append(shard.get(row), **record)
+            current += [shard.records[row]["key"] for row in shard.current_rows()]
+            for path, attributes in RenderManifest(job["shard"]).images():
+                manifest.update(path, **attributes)
+
+        store.set_current(current)
+        store.flush()
+        manifest.flush()
+        pipeline.write_loads(contour, store, save_directory, inputs.get("moment_origin", [0.0, 0.0, 0.0]))
+        pipeline.write_report(dict(inputs, target_data_paths=sorted(set(path for job in jobs for path in job["inputs"]["target_data_paths"]))))
+
+    return list(directories)
+
+
+# Distribute the point renders of a campaign over several nodes:
+#   python workqueue.py enqueue <queue directory> campaign.json
+#   python workqueue.py work <queue directory>          (on every node)
+#   python workqueue.py collect <queue directory>
+#   python workqueue.py status <queue directory>
+if __name__ == "__main__":
+    if len(sys.argv) < 3:
+        sys.exit("Usage: python workqueue.py enqueue|work|collect|status <queue directory> [campaign.json]")
+
+    command, directory  = sys.argv[1:3]
+    if command == "enqueue":
+        import batch
+
+        for job in batch.read_campaign(sys.argv[3]):
+            if job["action"] != "plot" or job["inputs"].get("parts"):
+                print("{}: not split into point jobs, run it with batch.py".format(job["name"]))
+                continue
+            try:
+                print("{}: {} point jobs queued".format(job["name"], enqueue_points(directory, job["inputs"])))
+            except (OSError, ValueError) as error:
+                print("{}: not queued ({}: {})".format(job["name"], type(error).__name__, error))
+
+    elif command == "work":
+        def report(job_id, outcome):
+            print("{}: {} in {:.1f} s{}".format(job_id, outcome["state"], outcome["seconds"], " ({})".format(outcome["error"]) if "error" in outcome else ""))
+            sys.stdout.flush()
+
+        print("{} jobs rendered".format(work(directory, callback=report)))
+
+    elif command == "collect":
+        for save_directory in collect(directory):
+            print("Collected {}".format(save_directory))
+
+    elif command == "status":
+        queue   = WorkQueue(directory)
+        print(json.dumps(dict(queue.counts(), workers=sorted(queue.workers())), indent=4))
+
+    else:
+        sys.exit("Unknown command '{}', expected enqueue, work, collect or status".format(command))
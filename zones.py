@@ -0,0 +1,101 @@
+import os
+import json
+import numpy
+from scipy import sparse
+
+import utils
+import constants
+
+
+def read_zones(filename):
+    """Read a JSON zone definition file
+
+    The file holds a list of named zones, each either a polygon in the
+    projected plot plane or a list of grid vertex ids:
+
+        [{"name": "front", "polygon": [[x, y], ...]},
+         {"name": "splitter", "vertices": [0, 1, 2, ...]}]
+    """
+
+    if not filename or not os.path.exists(filename):
+        return []
+
+    with open(filename, "r") as f:
+        return json.load(f)
+
+
+def vertex_areas(points, triangles):
+    """Return the area of each vertex (a third of its adjacent triangles)"""
+
+    p0, p1, p2  = (points[triangles[:, j]].astype(numpy.float64) for j in range(3))
+    areas       = 0.5*numpy.linalg.norm(numpy.cross(p1 - p0, p2 - p0), axis=1)
+    return numpy.bincount(triangles.ravel(), weights=numpy.repeat(areas/3.0, 3), minlength=len(points))
+
+
+def zone_masks(points, triangles, axes, zones):
+    """Rasterize the zones into a sparse (zones x vertices) weight matrix
+
+    Each row holds the area weights of the zone vertices normalized to one,
+    so the matrix times a field gives the area-weighted zone means.
+    """
+
+    from matplotlib.path import Path
+
+    areas   = vertex_areas(points, triangles)
+    plane   = points[:, axes]
+    rows    = []
+    columns = []
+    weights = []
+
+    for i, zone in enumerate(zones):
+        if "polygon" in zone:
+            inside  = numpy.flatnonzero(Path(numpy.asarray(zone["polygon"], dtype=float)).contains_points(plane))
+        else:
+            inside  = numpy.unique(numpy.asarray(zone.get("vertices", []), dtype=numpy.int64))
+
+        total   = areas[inside].sum()
+        if total > 0:
+            rows    += [numpy.full(len(inside), i)]
+            columns += [inside]
+            weights += [areas[inside]/total]
+
+    if not rows:
+        return sparse.csr_matrix((len(zones), len(points)))
+
+    return sparse.csr_matrix(
+        (numpy.concatenate(weights), (numpy.concatenate(rows), numpy.concatenate(columns))),
+        shape=(len(zones), len(points)))
+
+
+def cached_zone_masks(grid_path, grid_hash, points, triangles, axes, zones):
+    """Return the zone masks, cached next to the grid file per definition"""
+
+    key     = utils.hash_arrays(grid_hash, json.dumps(zones, sort_keys=True))
+    path    = os.path.join(grid_path + constants.MESH_CACHE_SUFFIX, "zones_{}.npz".format(key[:16]))
+    if os.path.exists(path):
+        return sparse.load_npz(path)
+
+    masks   = zone_masks(points, triangles, axes, zones)
+    try:
+        if not os.path.exists(os.path.dirname(path)):
+            os.makedirs(os.path.dirname(path))
+        temporary   = utils.temporary_path(path)
+        sparse.save_npz(temporary, masks)
+        os.replace(temporary, path)
+    except OSError:
+        pass
+
+    return masks
+
+
+def zone_averages(fields, masks, chunk_size=1024, rows=None):
+    """Area-weighted zone means of every field (row), or the given rows, one sparse product per chunk"""
+
+    rows    = numpy.arange(fields.shape[0]) if rows is None else numpy.asarray(rows)
+    n       = len(rows)
+    means   = numpy.empty((n, masks.shape[0]))
+    for start in range(0, n, chunk_size):
+        block                           = numpy.asarray(fields[rows[start:start + chunk_size]], dtype=numpy.float64)
+        means[start:start + chunk_size] = masks.dot(block.T).T
+
+    return means